@@ -1,6 +1,5 @@
-from amplpy import AMPL, modules
-modules.install()
-ampl = AMPL()
+from MA_Jensen_Start import installiere_module_einmalig
+installiere_module_einmalig()  # nur beim ersten Start je Umgebung installieren
 import openai
 import subprocess
 import tempfile
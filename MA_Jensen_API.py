@@ -0,0 +1,385 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - API-ANFRAGEN
+Gemeinsamer Scheduler für Claude- und GPT-Anfragen: Rate-Limits, Wiederholungen, Backoff
+
+Die Rate-Limits gelten je Prozess. Mehrere Prozesse (z.B. Arbeiter von MA_Jensen_Verteilt.py)
+teilen sie nur über MA_JENSEN_RATE_VERZEICHNIS: dann liegen die Buckets als Dateien dort
+und werden mit fcntl.flock gesperrt (ohne fcntl, z.B. unter Windows, bleibt es je Prozess).
+"""
+
+import email.utils
+import contextlib
+import threading
+import random
+import time
+import json
+import os
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# ===== KONFIGURATION =====
+ANFRAGEN_PRO_MINUTE = 50       # Limit des Providers für Requests pro Minute
+TOKENS_PRO_MINUTE = 40000      # Limit des Providers für Tokens pro Minute (Ein- + Ausgabe)
+ANTWORT_TOKENS_SCHAETZUNG = 4000  # Reserve für die Antwort bei der Token-Schätzung
+MAX_WIEDERHOLUNGEN = 6
+BASIS_WARTEZEIT = 1.0          # Sekunden, verdoppelt sich je Wiederholung
+MAX_WARTEZEIT = 60.0
+WIEDERHOLBARE_STATUS = {408, 409, 429, 500, 502, 503, 504, 529}
+CACHE_MIN_TOKENS = 1024        # kürzester Präfix, den OpenAI und Anthropic (Sonnet/Opus) cachen
+RATE_VERZEICHNIS_VARIABLE = 'MA_JENSEN_RATE_VERZEICHNIS'  # Verzeichnis für prozessübergreifende Buckets
+
+
+class TokenBucket:
+    """
+    Token-Bucket: füllt sich kontinuierlich mit 'pro_minute' Einheiten pro Minute auf
+    """
+    _uhr = staticmethod(time.monotonic)
+
+    def __init__(self, pro_minute):
+        self.kapazitaet = float(pro_minute)
+        self.bestand = float(pro_minute)
+        self.rate = pro_minute / 60.0
+        self.letzte_auffuellung = self._uhr()
+        self.lock = threading.Lock()
+
+    def _gesperrt(self):
+        return self.lock
+
+    def _auffuellen(self):
+        jetzt = self._uhr()
+        self.bestand = min(self.kapazitaet, self.bestand + (jetzt - self.letzte_auffuellung) * self.rate)
+        self.letzte_auffuellung = jetzt
+
+    def entnehme(self, menge):
+        """
+        Wartet, bis 'menge' Einheiten verfügbar sind, und gibt die Wartezeit zurück
+        """
+        # Anfragen größer als die Kapazität dürfen nicht ewig blockieren
+        menge = min(float(menge), self.kapazitaet)
+        gewartet = 0.0
+        while True:
+            with self._gesperrt():
+                self._auffuellen()
+                if self.bestand >= menge:
+                    self.bestand -= menge
+                    return gewartet
+                wartezeit = (menge - self.bestand) / self.rate
+            time.sleep(wartezeit)
+            gewartet += wartezeit
+
+    def korrigiere(self, differenz):
+        """
+        Verbucht die Abweichung zwischen geschätztem und tatsächlichem Verbrauch
+        (negativ: Gutschrift, z.B. für eine fehlgeschlagene Anfrage)
+        """
+        with self._gesperrt():
+            self._auffuellen()
+            self.bestand = min(self.kapazitaet, self.bestand - differenz)
+
+
+class GeteilterTokenBucket(TokenBucket):
+    """
+    Token-Bucket, dessen Bestand in einer Datei liegt - geteilt von allen Prozessen, die dieselbe
+    Datei verwenden (auch auf mehreren Rechnern, sofern das Dateisystem flock unterstützt)
+    """
+    # Wanduhr statt monotonic: der Zeitpunkt der letzten Auffüllung gilt prozessübergreifend
+    _uhr = staticmethod(time.time)
+
+    def __init__(self, pro_minute, datei):
+        super().__init__(pro_minute)
+        self.datei = datei
+
+    @contextlib.contextmanager
+    def _gesperrt(self):
+        with self.lock, open(f"{self.datei}.lock", 'a') as sperre:
+            fcntl.flock(sperre, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.datei, 'r', encoding='utf-8') as f:
+                        zustand = json.load(f)
+                    self.bestand = float(zustand['bestand'])
+                    self.letzte_auffuellung = float(zustand['zeit'])
+                except (OSError, ValueError, KeyError):
+                    pass  # erster Prozess: voller Bucket
+                yield
+                temp_pfad = f"{self.datei}.{os.getpid()}.tmp"
+                with open(temp_pfad, 'w', encoding='utf-8') as f:
+                    json.dump({'bestand': self.bestand, 'zeit': self.letzte_auffuellung}, f)
+                os.replace(temp_pfad, self.datei)
+            finally:
+                fcntl.flock(sperre, fcntl.LOCK_UN)
+
+
+class AnfrageScheduler:
+    """
+    Von allen parallelen Läufen eines Prozesses geteilter Scheduler für API-Anfragen
+
+    Mit verzeichnis teilen sich alle Prozesse mit demselben Verzeichnis die Rate-Limits;
+    die Pause nach einem 429 gilt weiterhin je Prozess.
+    """
+
+    def __init__(self, anfragen_pro_minute=None, tokens_pro_minute=None, verzeichnis=None):
+        if verzeichnis and fcntl is not None:
+            os.makedirs(verzeichnis, exist_ok=True)
+            self.anfragen = GeteilterTokenBucket(anfragen_pro_minute or ANFRAGEN_PRO_MINUTE,
+                                                 os.path.join(verzeichnis, 'rate_anfragen.json'))
+            self.tokens = GeteilterTokenBucket(tokens_pro_minute or TOKENS_PRO_MINUTE,
+                                               os.path.join(verzeichnis, 'rate_tokens.json'))
+        else:
+            self.anfragen = TokenBucket(anfragen_pro_minute or ANFRAGEN_PRO_MINUTE)
+            self.tokens = TokenBucket(tokens_pro_minute or TOKENS_PRO_MINUTE)
+        # Nach einem 429 mit retry-after pausieren alle Läufe bis zu diesem Zeitpunkt
+        self.pause_bis = 0.0
+        self.lock = threading.Lock()
+
+    def _warte_auf_pause(self):
+        with self.lock:
+            restzeit = self.pause_bis - time.monotonic()
+        if restzeit > 0:
+            time.sleep(restzeit)
+            return restzeit
+        return 0.0
+
+    def _setze_pause(self, sekunden):
+        with self.lock:
+            self.pause_bis = max(self.pause_bis, time.monotonic() + sekunden)
+
+    def sende(self, anfrage, geschaetzte_tokens, token_verbrauch=None):
+        """
+        Führt anfrage() unter Rate-Limits mit Wiederholungen aus
+
+        token_verbrauch(antwort) liefert die tatsächlich verbrauchten Tokens zur Korrektur
+        """
+        ergebnis = {
+            'erfolg': False,
+            'antwort': None,
+            'fehler': None,
+            'status_code': None,
+            'wiederholbar': False,
+            'wiederholungen': 0,
+            'wartezeit': 0.0,
+            'zeit': 0
+        }
+
+        for wiederholung in range(MAX_WIEDERHOLUNGEN + 1):
+            ergebnis['wiederholungen'] = wiederholung
+            ergebnis['wartezeit'] += self._warte_auf_pause()
+            ergebnis['wartezeit'] += self.anfragen.entnehme(1)
+            ergebnis['wartezeit'] += self.tokens.entnehme(geschaetzte_tokens)
+
+            start = time.time()
+            try:
+                antwort = anfrage()
+            except Exception as e:
+                # Fehlgeschlagene Anfrage verbraucht keine Tokens: Schätzung zurückbuchen
+                self.tokens.korrigiere(-geschaetzte_tokens)
+                status_code = _status_code(e)
+                wiederholbar = _ist_wiederholbar(e, status_code)
+                ergebnis.update({
+                    'fehler': str(e),
+                    'status_code': status_code,
+                    'wiederholbar': wiederholbar
+                })
+                if not wiederholbar or wiederholung == MAX_WIEDERHOLUNGEN:
+                    return ergebnis
+
+                # Exponentielles Backoff mit vollem Jitter, retry-after hat Vorrang
+                backoff = random.uniform(0, min(MAX_WARTEZEIT, BASIS_WARTEZEIT * 2 ** wiederholung))
+                retry_after = _retry_after(e)
+                if retry_after is not None:
+                    backoff = max(backoff, retry_after)
+                if status_code == 429:
+                    self._setze_pause(backoff)
+                time.sleep(backoff)
+                ergebnis['wartezeit'] += backoff
+                continue
+
+            ergebnis['zeit'] = time.time() - start
+            if token_verbrauch:
+                try:
+                    self.tokens.korrigiere(token_verbrauch(antwort) - geschaetzte_tokens)
+                except Exception:
+                    pass
+            ergebnis.update({'erfolg': True, 'antwort': antwort, 'fehler': None, 'status_code': None, 'wiederholbar': False})
+            return ergebnis
+
+        return ergebnis
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def hole_scheduler():
+    """
+    Liefert den prozessweit geteilten Scheduler (prozessübergreifend mit MA_JENSEN_RATE_VERZEICHNIS)
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = AnfrageScheduler(verzeichnis=os.environ.get(RATE_VERZEICHNIS_VARIABLE))
+        return _scheduler
+
+
+def prompt_text(prompt):
+    """
+    Gesamttext eines Prompts {'system': [(text, cache)], 'nachricht': [(text, cache)]}
+    """
+    if isinstance(prompt, str):
+        return prompt
+    return "\n".join(text for text, _ in prompt['system'] + prompt['nachricht'])
+
+
+def schaetze_tokens(prompt):
+    """
+    Grobe Token-Schätzung (ca. 4 Zeichen pro Token) plus Reserve für die Antwort
+    """
+    return len(prompt_text(prompt)) // 4 + ANTWORT_TOKENS_SCHAETZUNG
+
+
+def cache_praefix_tokens(prompt):
+    """
+    Geschätzte Tokens bis einschließlich des letzten Blocks mit cache=True (0 ohne solchen Block)
+
+    Zum Abgleich mit cache_gelesen: unter CACHE_MIN_TOKENS cachen die Provider nichts.
+    """
+    zeichen, praefix = 0, 0
+    for text, cache in prompt['system'] + prompt['nachricht']:
+        zeichen += len(text) + 1
+        if cache:
+            praefix = zeichen
+    return praefix // 4
+
+
+def anthropic_bloecke(bloecke, vorlauf=0):
+    """
+    Textblöcke für die Anthropic-API; Blöcke mit cache=True erhalten einen Cache-Breakpoint,
+    sofern der Präfix bis dort (vorlauf: Zeichen davor, z.B. system) CACHE_MIN_TOKENS erreicht
+
+    Dazwischen liegende Blöcke werden wie bei OpenAI mit Zeilenumbruch zu einem Text verbunden.
+    """
+    inhalt, offen = [], []
+    zeichen = vorlauf
+    for text, cache in bloecke:
+        offen.append(text)
+        zeichen += len(text) + 1
+        if cache and zeichen // 4 >= CACHE_MIN_TOKENS:
+            inhalt.append({"type": "text", "text": "\n".join(offen), "cache_control": {"type": "ephemeral"}})
+            offen = ['']  # Zeilenumbruch vor dem nächsten Block wie in prompt_text
+    if offen != ['']:
+        inhalt.append({"type": "text", "text": "\n".join(offen)})
+    return inhalt
+
+
+def anthropic_inhalt(prompt):
+    """
+    system und messages für die Anthropic-API (ohne system, wenn der Prompt keinen system-Teil hat)
+    """
+    system_zeichen = sum(len(text) + 1 for text, _ in prompt['system'])
+    inhalt = {"messages": [{"role": "user", "content": anthropic_bloecke(prompt['nachricht'], system_zeichen)}]}
+    if prompt['system']:
+        inhalt["system"] = anthropic_bloecke(prompt['system'])
+    return inhalt
+
+
+def openai_nachrichten(prompt):
+    """
+    Nachrichten für die OpenAI-API; OpenAI cached gleiche Präfixe ab CACHE_MIN_TOKENS automatisch
+    """
+    nachrichten = []
+    if prompt['system']:
+        nachrichten.append({"role": "system", "content": "\n".join(text for text, _ in prompt['system'])})
+    nachrichten.append({"role": "user", "content": "\n".join(text for text, _ in prompt['nachricht'])})
+    return nachrichten
+
+
+def token_metriken_anthropic(usage):
+    """
+    Token- und Cache-Kennzahlen einer Anthropic-Antwort (input_tokens enthält keine Cache-Treffer)
+    """
+    cache_gelesen = getattr(usage, 'cache_read_input_tokens', 0) or 0
+    cache_geschrieben = getattr(usage, 'cache_creation_input_tokens', 0) or 0
+    return {
+        'eingabe_tokens': usage.input_tokens + cache_gelesen + cache_geschrieben,
+        'ausgabe_tokens': usage.output_tokens,
+        'cache_gelesen': cache_gelesen,
+        'cache_geschrieben': cache_geschrieben
+    }
+
+
+def token_metriken_openai(usage):
+    """
+    Token- und Cache-Kennzahlen einer OpenAI-Antwort
+    """
+    details = getattr(usage, 'prompt_tokens_details', None)
+    return {
+        'eingabe_tokens': usage.prompt_tokens,
+        'ausgabe_tokens': usage.completion_tokens,
+        'cache_gelesen': (getattr(details, 'cached_tokens', 0) or 0) if details else 0,
+        'cache_geschrieben': 0
+    }
+
+
+def verbrauchte_tokens(metriken):
+    """
+    Für das Token-Limit zählende Tokens (Ein- und Ausgabe)
+    """
+    return metriken['eingabe_tokens'] + metriken['ausgabe_tokens']
+
+
+def summiere_token_metriken(versuche):
+    """
+    Summiert Token-Kennzahlen aller Versuche und berechnet die Cache-Trefferquote
+    """
+    summe = {'eingabe_tokens': 0, 'ausgabe_tokens': 0, 'cache_gelesen': 0, 'cache_geschrieben': 0}
+    for versuch in versuche:
+        for schluessel in summe:
+            summe[schluessel] += (versuch.get('tokens') or {}).get(schluessel, 0)
+    summe['cache_trefferquote'] = summe['cache_gelesen'] / summe['eingabe_tokens'] if summe['eingabe_tokens'] else 0.0
+    return summe
+
+
+def _status_code(fehler):
+    """
+    HTTP-Status aus Fehlern der anthropic- und openai-SDKs
+    """
+    status_code = getattr(fehler, 'status_code', None)
+    if status_code is None:
+        status_code = getattr(getattr(fehler, 'response', None), 'status_code', None)
+    return status_code
+
+
+def _ist_wiederholbar(fehler, status_code):
+    """
+    Wiederholbar: Rate-Limits, Überlastung, 5xx sowie Verbindungsabbrüche/Timeouts
+    """
+    if status_code is not None:
+        return status_code in WIEDERHOLBARE_STATUS
+    name = type(fehler).__name__
+    return 'Connection' in name or 'Timeout' in name
+
+
+def _retry_after(fehler):
+    """
+    Liest retry-after (Sekunden oder HTTP-Datum) bzw. retry-after-ms aus der Antwort
+    """
+    headers = getattr(getattr(fehler, 'response', None), 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000.0
+        wert = headers.get('retry-after')
+        if not wert:
+            return None
+        try:
+            return float(wert)
+        except ValueError:
+            datum = email.utils.parsedate_to_datetime(wert)
+            return max(0.0, datum.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,533 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - AUSFÜHRUNGSUMGEBUNG
+Isolierte Arbeitsverzeichnisse je Versuch, inhaltsadressierte Artefakte, vorgestartete Sonden,
+Reparatursitzungen, Ressourcenlimits und -verbrauch sowie begrenzte Ausgabe-Erfassung des generierten Codes
+"""
+
+import collections
+import subprocess
+import threading
+import tempfile
+import datetime
+import queue
+import hashlib
+import gzip
+import shutil
+import signal
+import json
+import uuid
+import time
+import os
+
+# ===== KONFIGURATION =====
+ARBEITSVERZEICHNIS_BASIS = os.environ.get('MA_JENSEN_ARBEITSVERZEICHNIS', 'laeufe')
+ARTEFAKT_VERZEICHNIS = os.environ.get('MA_JENSEN_ARTEFAKTE', 'artefakte')
+AUFBEWAHRUNG = 'fehler'  # 'immer' | 'fehler' (nur fehlgeschlagene Versuche behalten) | 'nie'
+ARTEFAKT_DATEIEN = ['model.mod', 'data.dat', 'stdout.txt.gz', 'stderr.txt.gz']
+WARME_PROZESSE = 2  # vorgestartete Sonden-Prozesse (amplpy geladen, AMPL gestartet)
+
+# Limits je Prozess (gelten auch für AMPL und Solver, die der Code startet); None = kein Limit
+RESSOURCEN_LIMITS = {
+    'RLIMIT_CPU': 300,                 # CPU-Sekunden
+    'RLIMIT_AS': 4 * 1024 ** 3,        # Adressraum in Bytes
+    'RLIMIT_NOFILE': 1024              # offene Dateien
+}
+
+# Ausgabe-Erfassung: nur Anfang, Ende und Fehlerzeilen bleiben im Speicher, der Rest liegt als .gz vor
+AUSGABE_KOPF = 8 * 1024       # Zeichen vom Anfang
+AUSGABE_ENDE = 16 * 1024      # Zeichen vom Ende
+AUSGABE_TREFFER_MAX = 50      # Zeilen mit Fehlermustern aus dem ausgelassenen Mittelteil
+
+_warme_prozesse = []
+_warm_lock = threading.Lock()
+
+
+def erstelle_lauf_id():
+    """
+    Eindeutige Lauf-Kennung - auch bei mehreren Läufen in derselben Sekunde
+    """
+    return f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:8]}"
+
+
+def erstelle_versuchsverzeichnis(lauf_id, versuch_nr):
+    """
+    Eigenes Arbeitsverzeichnis je Versuch: laeufe/<lauf_id>/versuch_<n>
+    """
+    verzeichnis = os.path.abspath(os.path.join(ARBEITSVERZEICHNIS_BASIS, lauf_id, f"versuch_{versuch_nr}"))
+    os.makedirs(verzeichnis, exist_ok=True)
+    return verzeichnis
+
+
+def datei_hash(pfad):
+    """
+    SHA-256 des Dateiinhalts
+    """
+    sha = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def sammle_artefakte(versuchsverzeichnis):
+    """
+    Kopiert model.mod/data.dat inhaltsadressiert nach artefakte/ (z.B. model_3f2a...e1.mod)
+    """
+    os.makedirs(ARTEFAKT_VERZEICHNIS, exist_ok=True)
+    artefakte = {}
+    for name in ARTEFAKT_DATEIEN:
+        quelle = os.path.join(versuchsverzeichnis, name)
+        if not os.path.exists(quelle):
+            continue
+        inhalt_hash = datei_hash(quelle)
+        stamm, _, endung = name.partition('.')  # 'stdout.txt.gz' -> 'stdout', 'txt.gz'
+        endung = f".{endung}"
+        ziel = os.path.abspath(os.path.join(ARTEFAKT_VERZEICHNIS, f"{stamm}_{inhalt_hash[:16]}{endung}"))
+        if not os.path.exists(ziel):
+            # Erst temporär kopieren, dann atomar umbenennen - parallele Läufe sehen keine halben Dateien
+            temp_ziel = f"{ziel}.{uuid.uuid4().hex[:8]}.tmp"
+            shutil.copyfile(quelle, temp_ziel)
+            os.replace(temp_ziel, ziel)
+        artefakte[name] = {'pfad': ziel, 'hash': inhalt_hash}
+    return artefakte
+
+
+def raeume_auf(versuchsverzeichnis, erfolg):
+    """
+    Löscht das Arbeitsverzeichnis gemäß AUFBEWAHRUNG (Artefakte liegen bereits in artefakte/)
+    """
+    if AUFBEWAHRUNG == 'immer' or (AUFBEWAHRUNG == 'fehler' and not erfolg):
+        return False
+    shutil.rmtree(versuchsverzeichnis, ignore_errors=True)
+
+    # Leeres Laufverzeichnis ebenfalls entfernen
+    laufverzeichnis = os.path.dirname(versuchsverzeichnis)
+    try:
+        os.rmdir(laufverzeichnis)
+    except OSError:
+        pass
+    return True
+
+
+class MessProzess(subprocess.Popen):
+    """
+    Popen in eigener Prozessgruppe, das beim Abholen des Kindes dessen Ressourcenverbrauch (wait4) festhält
+
+    Die Werte umfassen auch alle Enkelprozesse (AMPL, Solver), auf die das Kind gewartet hat.
+    Abholen nur über warte()/laeuft()/beende_gruppe() - wait()/poll() verlieren den Verbrauch.
+    """
+    rusage = None
+    rueckgabe_unbekannt = False
+    RUECKGABE_UNBEKANNT = -1  # Kind anderweitig abgeholt: gilt als fehlgeschlagen
+
+    def __init__(self, befehl, **kwargs):
+        # Eigene Sitzung: beende_gruppe() trifft auch AMPL- und Solver-Enkel
+        kwargs.setdefault('start_new_session', hasattr(os, 'killpg'))
+        super().__init__(befehl, **kwargs)
+
+    def _hole_ab(self, blockieren):
+        """
+        Holt das beendete Kind mit os.wait4 ab; Rückgabe: True, wenn es beendet ist
+        """
+        if self.returncode is not None:
+            return True
+        if not hasattr(os, 'wait4'):
+            # Windows: ohne Verbrauchsmessung
+            return (self.wait() if blockieren else self.poll()) is not None
+        try:
+            pid, status, rusage = os.wait4(self.pid, 0 if blockieren else os.WNOHANG)
+        except ChildProcessError:
+            # Bereits anderweitig abgeholt - Rückgabe unbekannt, also kein Erfolg
+            self.rueckgabe_unbekannt = True
+            self.returncode = self.RUECKGABE_UNBEKANNT
+            return True
+        if not pid:
+            return False
+        self.rusage = rusage
+        # returncode gesetzt: Popen.wait()/poll() holen danach nicht erneut ab
+        self.returncode = os.waitstatus_to_exitcode(status)
+        return True
+
+    def laeuft(self):
+        return not self._hole_ab(False)
+
+    def warte(self, timeout=None):
+        """
+        Wie wait(timeout), aber mit Ressourcenmessung; bei Ablauf subprocess.TimeoutExpired
+        """
+        if timeout is None:
+            self._hole_ab(True)
+            return self.returncode
+        ende = time.monotonic() + timeout
+        pause = 0.0005
+        while not self._hole_ab(False):
+            rest = ende - time.monotonic()
+            if rest <= 0:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            time.sleep(min(pause, rest))
+            pause = min(pause * 2, 0.05)
+        return self.returncode
+
+    def beende_gruppe(self):
+        """
+        Beendet das Kind samt AMPL- und Solver-Enkeln (ganze Prozessgruppe) und holt es ab
+        """
+        try:
+            os.killpg(self.pid, signal.SIGKILL)
+        except (AttributeError, ProcessLookupError, PermissionError):
+            if self.returncode is None:
+                self.kill()
+        self.warte()
+
+
+def limit_umgebung():
+    """
+    Umgebungsvariable, aus der die Sonde ihre Limits setzt (vor amplpy und dem generierten Code)
+    """
+    return {'MA_JENSEN_LIMITS': json.dumps({k: v for k, v in RESSOURCEN_LIMITS.items() if v is not None})}
+
+
+def ressourcen_verbrauch(prozess):
+    """
+    Spitzen-Speicher, CPU-Zeit und Block-I/O eines beendeten MessProzess
+    """
+    ressourcen = {'rueckgabe': prozess.returncode}
+    if getattr(prozess, 'rueckgabe_unbekannt', False):
+        ressourcen['rueckgabe_unbekannt'] = True
+    elif prozess.returncode is not None and prozess.returncode < 0:
+        try:
+            ressourcen['signal'] = signal.Signals(-prozess.returncode).name
+        except ValueError:
+            ressourcen['signal'] = str(-prozess.returncode)
+    if prozess.rusage is not None:
+        ressourcen.update({
+            'max_rss_mb': prozess.rusage.ru_maxrss / 1024.0,  # Linux: KiB
+            'cpu_user': prozess.rusage.ru_utime,
+            'cpu_system': prozess.rusage.ru_stime,
+            'io_lesen_bloecke': prozess.rusage.ru_inblock,
+            'io_schreiben_bloecke': prozess.rusage.ru_oublock
+        })
+    return ressourcen
+
+
+def limit_hinweis(ressourcen):
+    """
+    Verständliche Meldung, falls der Prozess an einem Limit gescheitert ist
+    """
+    if ressourcen.get('signal') == 'SIGXCPU':
+        return f"Ressourcenlimit: CPU-Zeit ({RESSOURCEN_LIMITS['RLIMIT_CPU']}s) überschritten"
+    if ressourcen.get('rueckgabe_unbekannt'):
+        return "Rückgabe unbekannt (Prozess anderweitig abgeholt) - als Fehler gewertet"
+    return None
+
+
+class BegrenzteAusgabe:
+    """
+    Erfasst einen Ausgabestrom mit fester Speichergrenze: Anfang, Ende und Zeilen mit
+    Fehlermustern im Speicher, der vollständige Strom komprimiert in spill_datei
+    """
+
+    def __init__(self, spill_datei, muster=()):
+        self.spill_datei = spill_datei
+        self.muster = list(muster)
+        self.kopf = []
+        self.kopf_zeichen = 0
+        self.ende = collections.deque()
+        self.ende_zeichen = 0
+        self.treffer = []
+        self.gefundene_muster = set()
+        self.gesamt_zeichen = 0
+        self._datei = gzip.open(spill_datei, 'wt', encoding='utf-8', errors='replace')
+
+    def schreibe(self, text):
+        self._datei.write(text)
+        self.gesamt_zeichen += len(text)
+
+        if self.kopf_zeichen < AUSGABE_KOPF:
+            stueck = text[:AUSGABE_KOPF - self.kopf_zeichen]
+            self.kopf.append(stueck)
+            self.kopf_zeichen += len(stueck)
+            text = text[len(stueck):]
+            if not text:
+                return
+
+        neue_muster = [m for m in self.muster if m in text and m not in self.gefundene_muster]
+        if neue_muster or (len(self.treffer) < AUSGABE_TREFFER_MAX and any(m in text for m in self.muster)):
+            # Erste Zeile jedes Musters immer behalten, damit die Fehlererkennung sie im Auszug findet
+            self.gefundene_muster.update(neue_muster)
+            self.treffer.append(text[:500])
+
+        self.ende.append(text)
+        self.ende_zeichen += len(text)
+        while self.ende_zeichen > AUSGABE_ENDE:
+            ueberschuss = self.ende_zeichen - AUSGABE_ENDE
+            if len(self.ende[0]) <= ueberschuss:
+                self.ende_zeichen -= len(self.ende.popleft())
+            else:
+                self.ende[0] = self.ende[0][ueberschuss:]
+                self.ende_zeichen -= ueberschuss
+
+    def schliesse(self):
+        """
+        Schließt die Spill-Datei; ist nichts ausgelassen worden, wird sie nicht benötigt
+        """
+        self._datei.close()
+        if not self.gekuerzt:
+            os.unlink(self.spill_datei)
+
+    @property
+    def gekuerzt(self):
+        return self.gesamt_zeichen > self.kopf_zeichen + self.ende_zeichen
+
+    def auszug(self):
+        """
+        Anfang + Fehlerzeilen aus dem Mittelteil + Ende; ungekürzt identisch mit der Ausgabe
+        """
+        kopf = ''.join(self.kopf)
+        ende = ''.join(self.ende)
+        if not self.gekuerzt:
+            return kopf + ende
+        ausgelassen = self.gesamt_zeichen - self.kopf_zeichen - self.ende_zeichen
+        teile = [kopf, f"\n... [{ausgelassen} Zeichen ausgelassen - vollständig in {os.path.basename(self.spill_datei)}] ...\n"]
+        fehlerzeilen = [zeile for zeile in self.treffer if zeile not in ende]
+        if fehlerzeilen:
+            teile.append("[Fehlerzeilen aus dem ausgelassenen Teil]\n" + ''.join(fehlerzeilen) + "...\n")
+        teile.append(ende)
+        return ''.join(teile)
+
+    def info(self):
+        return {
+            'zeichen': self.gesamt_zeichen,
+            'gekuerzt': self.gekuerzt,
+            'datei': os.path.basename(self.spill_datei) if self.gekuerzt else None
+        }
+
+
+def _lies_strom(strom, ausgabe):
+    # readline mit Grenze: auch sehr lange Zeilen belegen nur begrenzt Speicher
+    for stueck in iter(lambda: strom.readline(64 * 1024), ''):
+        ausgabe.schreibe(stueck)
+    strom.close()
+
+
+def _kommuniziere(prozess, eingabe, timeout, arbeitsverzeichnis, muster=()):
+    """
+    Wie communicate() mit Timeout, aber mit begrenzter Erfassung von stdout/stderr
+
+    Bei Ablauf wird der Prozess beendet und der Verbrauch am Fehler vermerkt.
+    """
+    stdout = BegrenzteAusgabe(os.path.join(arbeitsverzeichnis, 'stdout.txt.gz'), muster)
+    stderr = BegrenzteAusgabe(os.path.join(arbeitsverzeichnis, 'stderr.txt.gz'), muster)
+    leser = [
+        threading.Thread(target=_lies_strom, args=(prozess.stdout, stdout), daemon=True),
+        threading.Thread(target=_lies_strom, args=(prozess.stderr, stderr), daemon=True)
+    ]
+    for thread in leser:
+        thread.start()
+    if eingabe is not None:
+        try:
+            prozess.stdin.write(eingabe)
+            prozess.stdin.close()
+        except (BrokenPipeError, OSError):
+            pass
+
+    try:
+        prozess.warte(timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        prozess.beende_gruppe()
+        e.ressourcen = dict(ressourcen_verbrauch(prozess), timeout=True)
+        raise
+    finally:
+        for thread in leser:
+            thread.join()
+        stdout.schliesse()
+        stderr.schliesse()
+
+    ressourcen = ressourcen_verbrauch(prozess)
+    ressourcen['ausgabe'] = {'stdout': stdout.info(), 'stderr': stderr.info()}
+    return subprocess.CompletedProcess(prozess.args, prozess.returncode, stdout.auszug(), stderr.auszug()), ressourcen
+
+
+def fuehre_begrenzt_aus(befehl, arbeitsverzeichnis, umgebung, timeout, muster=()):
+    """
+    Wie subprocess.run(befehl, capture_output=True, ...) - mit Limits, Ressourcenmessung
+    und begrenzter Ausgabe (muster: Fehlertexte, deren Zeilen im Auszug erhalten bleiben)
+
+    Rückgabe: (CompletedProcess, ressourcen)
+    """
+    prozess = MessProzess(
+        befehl,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        env=dict(umgebung, **limit_umgebung()),
+        cwd=arbeitsverzeichnis
+    )
+    return _kommuniziere(prozess, None, timeout, arbeitsverzeichnis, muster)
+
+
+def _starte_warmen_prozess(sonde_datei):
+    return MessProzess(
+        ['python', sonde_datei, '--warm'],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        env=dict(os.environ, **limit_umgebung())
+    )
+
+
+def hole_warmen_prozess(sonde_datei):
+    """
+    Liefert einen vorgestarteten Sonden-Prozess und startet sofort Ersatz für den Vorrat
+    """
+    with _warm_lock:
+        # Beendete Prozesse (z.B. Fehler beim Vorwärmen) verwerfen
+        _warme_prozesse[:] = [p for p in _warme_prozesse if p.laeuft()]
+        prozess = _warme_prozesse.pop(0) if _warme_prozesse else _starte_warmen_prozess(sonde_datei)
+        while len(_warme_prozesse) < WARME_PROZESSE:
+            _warme_prozesse.append(_starte_warmen_prozess(sonde_datei))
+    return prozess
+
+
+def fuehre_warm_aus(sonde_datei, skript, arbeitsverzeichnis, umgebung, timeout, muster=()):
+    """
+    Wie fuehre_begrenzt_aus(['python', sonde_datei, skript], ...) - aber in einem vorgestarteten Prozess
+    """
+    prozess = hole_warmen_prozess(sonde_datei)
+    auftrag = {'skript': skript, 'arbeitsverzeichnis': arbeitsverzeichnis, 'umgebung': umgebung}
+    return _kommuniziere(prozess, json.dumps(auftrag) + "\n", timeout, arbeitsverzeichnis, muster)
+
+
+def beende_warme_prozesse():
+    """
+    Beendet alle unbenutzten vorgestarteten Prozesse
+    """
+    with _warm_lock:
+        for prozess in _warme_prozesse:
+            prozess.beende_gruppe()
+            prozess.communicate()
+        _warme_prozesse.clear()
+
+
+class Reparatursitzung:
+    """
+    Sonden-Prozess im Sitzungsmodus: führt einen Versuch aus und bleibt danach mit seiner
+    AMPL-Instanz bestehen, damit ein korrigiertes Modell ohne Neustart gelöst werden kann
+
+    Die CPU-Zeit-Grenze gilt für die ganze Sitzung (Versuch und Korrekturen zusammen).
+    stderr der Sonde außerhalb der Aufträge (z.B. Absturz) landet in einer temporären Datei und
+    wird an den Fehlerauszug angehängt, wenn die Sonde während eines Auftrags endet.
+    """
+
+    def __init__(self, sonde_datei, umgebung):
+        self._sonden_stderr = tempfile.TemporaryFile()
+        self.prozess = MessProzess(
+            ['python', sonde_datei, '--sitzung'],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=self._sonden_stderr,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            env=dict(umgebung, **limit_umgebung())
+        )
+        self.ampl_aktiv = False
+        self._antworten = queue.Queue()
+        threading.Thread(target=self._lies_antworten, daemon=True).start()
+
+    def _lies_antworten(self):
+        for zeile in iter(self.prozess.stdout.readline, ''):
+            self._antworten.put(json.loads(zeile))
+        self._antworten.put(None)  # Prozess beendet
+
+    @staticmethod
+    def _lies_ausgabe(arbeitsverzeichnis, name, muster):
+        # Ausgabedatei der Sonde wie einen Strom begrenzt erfassen
+        ausgabe = BegrenzteAusgabe(os.path.join(arbeitsverzeichnis, f"{name}.txt.gz"), muster)
+        pfad = os.path.join(arbeitsverzeichnis, f"{name}.txt")
+        if os.path.exists(pfad):
+            _lies_strom(open(pfad, 'r', encoding='utf-8', errors='replace'), ausgabe)
+            os.unlink(pfad)
+        ausgabe.schliesse()
+        return ausgabe
+
+    def _sende(self, auftrag, timeout, muster):
+        try:
+            self.prozess.stdin.write(json.dumps(auftrag) + "\n")
+            self.prozess.stdin.flush()
+        except (BrokenPipeError, OSError):
+            pass
+        try:
+            antwort = self._antworten.get(timeout=timeout)
+        except queue.Empty:
+            self.prozess.beende_gruppe()
+            self.ampl_aktiv = False
+            fehler = subprocess.TimeoutExpired(self.prozess.args, timeout)
+            fehler.ressourcen = dict(ressourcen_verbrauch(self.prozess), timeout=True)
+            raise fehler
+
+        if antwort is None:
+            # Sonde beendet (z.B. Ressourcenlimit): Rückgabe und Verbrauch wie beim normalen Lauf
+            self.prozess.warte()
+            self.ampl_aktiv = False
+            ressourcen = ressourcen_verbrauch(self.prozess)
+        else:
+            self.ampl_aktiv = antwort['ampl']
+            ressourcen = {'rueckgabe': antwort['rueckgabe'], 'sitzung_zeit': antwort['zeit'], 'sitzung_modus': antwort['modus']}
+
+        stdout = self._lies_ausgabe(auftrag['arbeitsverzeichnis'], 'stdout', muster)
+        stderr = self._lies_ausgabe(auftrag['arbeitsverzeichnis'], 'stderr', muster)
+        ressourcen['ausgabe'] = {'stdout': stdout.info(), 'stderr': stderr.info()}
+        fehlertext = stderr.auszug()
+        if antwort is None:
+            fehlertext += self._sonden_fehler()
+        return subprocess.CompletedProcess(self.prozess.args, ressourcen['rueckgabe'], stdout.auszug(), fehlertext), ressourcen
+
+    def _sonden_fehler(self):
+        # Ende des stderr der Sonde selbst (Traceback, Limit-Meldung)
+        self._sonden_stderr.seek(0, os.SEEK_END)
+        groesse = self._sonden_stderr.tell()
+        self._sonden_stderr.seek(max(0, groesse - AUSGABE_ENDE))
+        return self._sonden_stderr.read().decode('utf-8', errors='replace')
+
+    def fuehre_aus(self, skript, arbeitsverzeichnis, umgebung, timeout, muster=()):
+        """
+        Wie fuehre_begrenzt_aus(['python', sonde_datei, skript], ...) - die Sitzung bleibt danach offen
+
+        Rückgabe: (CompletedProcess, ressourcen); rusage erst mit beende()
+        """
+        auftrag = {'befehl': 'ausfuehren', 'skript': skript, 'arbeitsverzeichnis': arbeitsverzeichnis, 'umgebung': umgebung}
+        return self._sende(auftrag, timeout, muster)
+
+    def repariere(self, modell, skript, arbeitsverzeichnis, umgebung, timeout, muster=()):
+        """
+        Korrigiertes Modell in der bestehenden AMPL-Sitzung laden und lösen (Daten bleiben erhalten)
+
+        skript: vollständiger korrigierter Code, falls die Sitzung noch keine Daten hat
+        """
+        auftrag = {'befehl': 'reparieren', 'modell': modell, 'skript': skript,
+                   'arbeitsverzeichnis': arbeitsverzeichnis, 'umgebung': umgebung}
+        return self._sende(auftrag, timeout, muster)
+
+    def beende(self):
+        """
+        Beendet die Sitzung und liefert den Ressourcenverbrauch des Prozesses (wait4 wie beim normalen Lauf)
+        """
+        if self.prozess.laeuft():
+            try:
+                self.prozess.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.prozess.warte(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.prozess.beende_gruppe()
+        self.ampl_aktiv = False
+        self._sonden_stderr.close()
+        return ressourcen_verbrauch(self.prozess)
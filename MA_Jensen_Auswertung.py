@@ -0,0 +1,278 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - AUSWERTUNG MIT KONFIDENZINTERVALLEN
+Mehrere Stichproben je (Problem, Provider, Temperatur), parallel ausgeführt: pass@k,
+mittlere Versuche bis zum Erfolg und Latenzen mit Bootstrap-Konfidenzintervallen, die
+Erfolgsquote mit Wilson-Intervall. Die Stichprobenziehung endet je Zelle, sobald das
+Wilson-Intervall eng genug ist. Läufe, die durch API-Fehler enden, zählen nicht als
+Stichprobe und werden neu gezogen.
+
+Aufruf:
+    python MA_Jensen_Auswertung.py auswertung.json
+
+auswertung.json:
+    {"probleme": ["...", ...], "provider": ["claude", "gpt"], "temperaturen": [0.1, 0.6],
+     "max_versuche": 3, "k_werte": [1, 3, 5]}
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import itertools
+import datetime
+import random
+import math
+import time
+import json
+import sys
+
+from MA_Jensen_Ausfuehrung import beende_warme_prozesse
+from MA_Jensen_Dienst import lade_provider
+
+# ===== KONFIGURATION =====
+STICHPROBEN_MIN = 5          # je Zelle, bevor über einen Abbruch entschieden wird
+STICHPROBEN_MAX = 40
+RUNDEN_GROESSE = 5           # neue Stichproben je Zelle und Runde
+KI_BREITE_ZIEL = 0.25        # Zielbreite des Wilson-Intervalls der Erfolgsquote
+API_FEHLER_MAX = 10          # je Zelle neu gezogene Läufe nach API-Fehlern, danach endet die Zelle
+KONFIDENZ = 0.95
+BOOTSTRAP_ZIEHUNGEN = 2000
+PARALLELE_LAEUFE = 4
+K_WERTE = [1, 3, 5]
+ZUFALLS_SAAT = 42
+
+
+def pass_at_k(n, c, k):
+    """
+    Erwartungstreuer Schätzer für pass@k aus n Stichproben mit c Erfolgen
+    """
+    if k > n:
+        return None
+    if n - c < k:
+        return 1.0
+    return 1.0 - math.comb(n - c, k) / math.comb(n, k)
+
+
+def _quantil(werte, q):
+    werte = sorted(werte)
+    if not werte:
+        return None
+    position = (len(werte) - 1) * q
+    unten, oben = math.floor(position), math.ceil(position)
+    return werte[unten] + (werte[oben] - werte[unten]) * (position - unten)
+
+
+def wilson_intervall(erfolge, n, konfidenz=None):
+    """
+    Wilson-Score-Intervall der Erfolgsquote - anders als der Bootstrap auch bei 0 oder n
+    Erfolgen nicht entartet (5/5 ergibt nicht [1.0, 1.0])
+    """
+    if not n:
+        return None, None
+    konfidenz = konfidenz or KONFIDENZ
+    z = statistics.NormalDist().inv_cdf(1 - (1 - konfidenz) / 2)
+    quote = erfolge / n
+    nenner = 1 + z * z / n
+    mitte = (quote + z * z / (2 * n)) / nenner
+    abstand = z * math.sqrt(quote * (1 - quote) / n + z * z / (4 * n * n)) / nenner
+    return max(0.0, mitte - abstand), min(1.0, mitte + abstand)
+
+
+def bootstrap_intervall(stichproben, kennzahl, ziehungen=None, konfidenz=None, zufall=None):
+    """
+    Perzentil-Bootstrap: (untere, obere) Grenze für kennzahl(stichproben)
+    """
+    ziehungen = ziehungen or BOOTSTRAP_ZIEHUNGEN
+    konfidenz = konfidenz or KONFIDENZ
+    zufall = zufall or random.Random(ZUFALLS_SAAT)
+    werte = []
+    for _ in range(ziehungen):
+        wert = kennzahl([zufall.choice(stichproben) for _ in stichproben])
+        if wert is not None:
+            werte.append(wert)
+    if not werte:
+        return None, None
+    alpha = (1 - konfidenz) / 2
+    return _quantil(werte, alpha), _quantil(werte, 1 - alpha)
+
+
+def _mittlere_versuche(stichproben):
+    erfolge = [s['anzahl_versuche'] for s in stichproben if s['erfolg']]
+    return statistics.mean(erfolge) if erfolge else None
+
+
+def _median_latenz(stichproben):
+    return statistics.median(s['latenz'] for s in stichproben)
+
+
+def werte_zelle_aus(stichproben, k_werte=None):
+    """
+    Kennzahlen einer Zelle mit Konfidenzintervallen (None ohne gültige Stichprobe)
+    """
+    if not stichproben:
+        return None
+    k_werte = k_werte or K_WERTE
+    zufall = random.Random(ZUFALLS_SAAT)
+    n = len(stichproben)
+    c = sum(1 for s in stichproben if s['erfolg'])
+    latenzen = [s['latenz'] for s in stichproben]
+
+    auswertung = {
+        'stichproben': n,
+        'erfolge': c,
+        'erfolgsquote': c / n,
+        'erfolgsquote_ki': wilson_intervall(c, n),
+        'erfolg_erster_versuch': sum(1 for s in stichproben if s['erfolg'] and s['anzahl_versuche'] == 1) / n,
+        'pass_at_k': {},
+        'mittlere_versuche': _mittlere_versuche(stichproben),
+        'mittlere_versuche_ki': bootstrap_intervall(stichproben, _mittlere_versuche, zufall=zufall),
+        'latenz_median': statistics.median(latenzen),
+        'latenz_median_ki': bootstrap_intervall(stichproben, _median_latenz, zufall=zufall),
+        'latenz_p90': _quantil(latenzen, 0.9),
+        'latenz_mittel': statistics.mean(latenzen)
+    }
+    for k in k_werte:
+        wert = pass_at_k(n, c, k)
+        if wert is None:
+            continue
+        ki = bootstrap_intervall(
+            stichproben,
+            lambda s, k=k: pass_at_k(len(s), sum(1 for x in s if x['erfolg']), k),
+            zufall=zufall
+        )
+        auswertung['pass_at_k'][k] = {'wert': wert, 'ki': ki}
+    return auswertung
+
+
+def ist_genau_genug(stichproben):
+    """
+    Adaptiver Abbruch: Mindestzahl erreicht und Wilson-Intervall der Erfolgsquote eng genug
+    """
+    if len(stichproben) < STICHPROBEN_MIN:
+        return False
+    if len(stichproben) >= STICHPROBEN_MAX:
+        return True
+    unten, oben = wilson_intervall(sum(1 for s in stichproben if s['erfolg']), len(stichproben))
+    return oben - unten <= KI_BREITE_ZIEL
+
+
+def _gueltige(stichproben):
+    """
+    Stichproben ohne Läufe, die durch API-Fehler endeten
+    """
+    return [s for s in stichproben if not s['api_abbruch']]
+
+
+def _stichprobe(zelle, max_versuche):
+    """
+    Ein vollständiger Lauf (inkl. Reprompting) als Stichprobe
+
+    api_abbruch: der Lauf endete durch einen API-Fehler - kein Ergebnis des Modells, keine Stichprobe
+    """
+    modul = lade_provider(zelle['provider'])
+    start = time.time()
+    statistiken = modul.loese_problem(zelle['problem'], temperatur=zelle['temperatur'], max_versuche=max_versuche)
+    return {
+        'erfolg': statistiken['erfolg'],
+        'anzahl_versuche': len(statistiken['versuche']),
+        'latenz': time.time() - start,
+        'api_fehler': len(statistiken['api_fehler']),
+        'api_abbruch': bool(statistiken['api_fehler']) and not statistiken['erfolg'],
+        'bericht_datei': statistiken.get('bericht_datei')
+    }
+
+
+def fuehre_auswertung_aus(konfiguration):
+    """
+    Zieht rundenweise Stichproben für alle noch ungenauen Zellen, parallel über alle Zellen
+
+    Läufe mit API-Abbruch bleiben in 'stichproben' (zur Nachvollziehbarkeit), zählen aber weder für
+    den Abbruch noch für die Kennzahlen; je Zelle werden höchstens API_FEHLER_MAX davon neu gezogen.
+    """
+    zellen = [
+        {'problem_nr': problem_nr, 'problem': problem, 'provider': provider, 'temperatur': temperatur, 'stichproben': []}
+        for (problem_nr, problem), provider, temperatur in itertools.product(
+            enumerate(konfiguration['probleme']),
+            konfiguration.get('provider', ['claude']),
+            konfiguration.get('temperaturen', [None])
+        )
+    ]
+    max_versuche = konfiguration.get('max_versuche')
+
+    with ThreadPoolExecutor(max_workers=PARALLELE_LAEUFE) as pool:
+        runde = 0
+        while True:
+            offen = [zelle for zelle in zellen
+                     if not ist_genau_genug(_gueltige(zelle['stichproben']))
+                     and len(zelle['stichproben']) - len(_gueltige(zelle['stichproben'])) < API_FEHLER_MAX]
+            if not offen:
+                break
+            runde += 1
+            print(f"\n🔁 Runde {runde}: {len(offen)} Zellen, je {RUNDEN_GROESSE} Stichproben")
+            auftraege = [(zelle, pool.submit(_stichprobe, zelle, max_versuche))
+                         for zelle in offen
+                         for _ in range(min(RUNDEN_GROESSE, STICHPROBEN_MAX - len(_gueltige(zelle['stichproben']))))]
+            for zelle, zukunft in auftraege:
+                zelle['stichproben'].append(zukunft.result())
+
+    ergebnisse = []
+    for zelle in zellen:
+        gueltige = _gueltige(zelle['stichproben'])
+        ergebnisse.append({
+            'problem_nr': zelle['problem_nr'],
+            'provider': zelle['provider'],
+            'temperatur': zelle['temperatur'],
+            'auswertung': werte_zelle_aus(gueltige, konfiguration.get('k_werte')),
+            'api_abbrueche': len(zelle['stichproben']) - len(gueltige),
+            'stichproben': zelle['stichproben']
+        })
+    return {
+        'zeitpunkt': datetime.datetime.now().isoformat(),
+        'konfidenz': KONFIDENZ,
+        'ki_breite_ziel': KI_BREITE_ZIEL,
+        'zellen': ergebnisse
+    }
+
+
+def _intervall(ki):
+    unten, oben = ki
+    return "-" if unten is None else f"[{unten:.2f}, {oben:.2f}]"
+
+
+def main():
+    """
+    Auswertung ausführen, Tabelle ausgeben und als JSON speichern
+    """
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        konfiguration = json.load(f)
+
+    try:
+        ergebnis = fuehre_auswertung_aus(konfiguration)
+    finally:
+        beende_warme_prozesse()
+
+    print("\n" + "=" * 70)
+    print(" AUSWERTUNG")
+    print("=" * 70)
+    for zelle in ergebnis['zellen']:
+        a = zelle['auswertung']
+        if a is None:
+            print(f"Problem {zelle['problem_nr']} | {zelle['provider']} | T={zelle['temperatur']} | "
+                  f"keine gültige Stichprobe ({zelle['api_abbrueche']} API-Abbrüche)")
+            continue
+        pass_texte = ", ".join(f"pass@{k} {v['wert']:.2f} {_intervall(v['ki'])}" for k, v in a['pass_at_k'].items())
+        print(f"Problem {zelle['problem_nr']} | {zelle['provider']} | T={zelle['temperatur']} | n={a['stichproben']}"
+              + (f" (+{zelle['api_abbrueche']} API-Abbrüche verworfen)" if zelle['api_abbrueche'] else ""))
+        print(f"   - Erfolgsquote: {a['erfolgsquote']:.2f} {_intervall(a['erfolgsquote_ki'])}")
+        print(f"   - {pass_texte}")
+        if a['mittlere_versuche'] is not None:
+            print(f"   - Versuche bis Erfolg: {a['mittlere_versuche']:.2f} {_intervall(a['mittlere_versuche_ki'])}")
+        print(f"   - Latenz: Median {a['latenz_median']:.1f}s {_intervall(a['latenz_median_ki'])}, p90 {a['latenz_p90']:.1f}s")
+
+    datei = f"auswertung_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(datei, 'w', encoding='utf-8') as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f"\n📁 Ergebnisse: {datei}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - BATCH-SWEEPS
+Erste Versuche eines ganzen Sweeps gesammelt über die asynchronen Batch-APIs von Anthropic
+und OpenAI anfragen; nur fehlgeschlagene Läufe gehen danach ins interaktive Reprompting
+
+Aufruf:
+    python MA_Jensen_Batch.py sweep.json [--lokal]
+
+sweep.json:
+    {"probleme": ["...", ...], "provider": ["claude", "gpt"], "temperaturen": [0.1, 0.6],
+     "wiederholungen": 1, "max_versuche": 3}
+--lokal: lokaler Ersatz für die Batch-Endpunkte (ohne API, zum Testen)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import itertools
+import tempfile
+import datetime
+import types
+import time
+import json
+import uuid
+import sys
+import os
+
+from MA_Jensen_API import anthropic_inhalt, openai_nachrichten, token_metriken_anthropic, token_metriken_openai
+from MA_Jensen_Ausfuehrung import beende_warme_prozesse
+from MA_Jensen_Dienst import lade_provider
+
+# ===== KONFIGURATION =====
+POLL_INTERVALL = 30              # Sekunden zwischen Statusabfragen
+MAX_WARTEZEIT = 24 * 3600        # Batch-Fenster der Provider
+PARALLELE_LAEUFE = 4             # gleichzeitig ausgeführte Läufe nach dem Batch
+MAX_TOKENS = 4000
+LOKALE_VERZOEGERUNG = 1.0        # simulierte Bearbeitungszeit des lokalen Ersatzes
+
+# Antwort des lokalen Ersatzes: kleines, lösbares Modell
+LOKALE_ANTWORT = '''```python
+from amplpy import AMPL, modules
+modules.install()
+ampl = AMPL()
+ampl.eval("""
+var x >= 0;
+var y >= 0;
+maximize gewinn: 3 * x + 2 * y;
+subject to kapazitaet: x + y <= 4;
+subject to material: x + 3 * y <= 6;
+""")
+ampl.solve()
+print("Zielfunktion:", ampl.get_objective("gewinn").value())
+```'''
+
+
+def _antwort(text, tokens, zeit=0.0):
+    """
+    Batch-Ergebnis im Format von gpt_anfrage
+    """
+    return {
+        'erfolg': True,
+        'antwort': text,
+        'zeit': zeit,
+        'wiederholungen': 0,
+        'wartezeit': 0.0,
+        'tokens': tokens,
+        'batch': True
+    }
+
+
+def _als_objekt(wert):
+    # JSON-Ergebnisse wie SDK-Objekte ansprechbar machen (für token_metriken_openai)
+    if isinstance(wert, dict):
+        return types.SimpleNamespace(**{k: _als_objekt(v) for k, v in wert.items()})
+    return wert
+
+
+# ----- Anthropic Message Batches -----
+
+def _anthropic_einreichen(modul, anfragen):
+    client = modul.hole_client()
+    batch = client.messages.batches.create(requests=[
+        {
+            'custom_id': anfrage['id'],
+            'params': {
+                'model': modul.MODELL,
+                'max_tokens': MAX_TOKENS,
+                'temperature': anfrage['temperatur'],
+                **anthropic_inhalt(anfrage['prompt'])
+            }
+        }
+        for anfrage in anfragen
+    ])
+    return batch.id
+
+
+def _anthropic_fertig(modul, batch_id):
+    return modul.hole_client().messages.batches.retrieve(batch_id).processing_status == 'ended'
+
+
+def _anthropic_ergebnisse(modul, batch_id):
+    ergebnisse = {}
+    for eintrag in modul.hole_client().messages.batches.results(batch_id):
+        if eintrag.result.type == 'succeeded':
+            nachricht = eintrag.result.message
+            ergebnisse[eintrag.custom_id] = _antwort(nachricht.content[0].text, token_metriken_anthropic(nachricht.usage))
+    return ergebnisse
+
+
+# ----- OpenAI Batch API -----
+
+def _openai_einreichen(modul, anfragen):
+    client = modul.hole_client()
+    with tempfile.NamedTemporaryFile('w', suffix='.jsonl', delete=False, encoding='utf-8') as f:
+        for anfrage in anfragen:
+            f.write(json.dumps({
+                'custom_id': anfrage['id'],
+                'method': 'POST',
+                'url': '/v1/chat/completions',
+                'body': {
+                    'model': modul.MODELL,
+                    'messages': openai_nachrichten(anfrage['prompt']),
+                    'temperature': anfrage['temperatur']
+                }
+            }, ensure_ascii=False) + "\n")
+        pfad = f.name
+    try:
+        with open(pfad, 'rb') as f:
+            datei = client.files.create(file=f, purpose='batch')
+    finally:
+        os.unlink(pfad)
+    batch = client.batches.create(input_file_id=datei.id, endpoint='/v1/chat/completions', completion_window='24h')
+    return batch.id
+
+
+def _openai_fertig(modul, batch_id):
+    return modul.hole_client().batches.retrieve(batch_id).status in ('completed', 'failed', 'expired', 'cancelled')
+
+
+def _openai_ergebnisse(modul, batch_id):
+    client = modul.hole_client()
+    batch = client.batches.retrieve(batch_id)
+    ergebnisse = {}
+    if not batch.output_file_id:
+        return ergebnisse
+    for zeile in client.files.content(batch.output_file_id).text.splitlines():
+        eintrag = json.loads(zeile)
+        antwort = eintrag.get('response') or {}
+        if eintrag.get('error') or antwort.get('status_code') != 200:
+            continue
+        body = antwort['body']
+        ergebnisse[eintrag['custom_id']] = _antwort(
+            body['choices'][0]['message']['content'],
+            token_metriken_openai(_als_objekt(body['usage']))
+        )
+    return ergebnisse
+
+
+# ----- Lokaler Ersatz (gleicher Ablauf, keine API) -----
+
+_lokale_batches = {}
+
+
+def _lokal_einreichen(modul, anfragen):
+    batch_id = f"lokal_{uuid.uuid4().hex[:8]}"
+    _lokale_batches[batch_id] = {'fertig_ab': time.time() + LOKALE_VERZOEGERUNG,
+                                 'ids': [anfrage['id'] for anfrage in anfragen]}
+    return batch_id
+
+
+def _lokal_fertig(modul, batch_id):
+    return time.time() >= _lokale_batches[batch_id]['fertig_ab']
+
+
+def _lokal_ergebnisse(modul, batch_id):
+    tokens = {'eingabe_tokens': 0, 'ausgabe_tokens': 0, 'cache_gelesen': 0, 'cache_geschrieben': 0}
+    return {lauf_id: _antwort(LOKALE_ANTWORT, dict(tokens)) for lauf_id in _lokale_batches.pop(batch_id)['ids']}
+
+
+BACKENDS = {
+    'claude': (_anthropic_einreichen, _anthropic_fertig, _anthropic_ergebnisse),
+    'gpt': (_openai_einreichen, _openai_fertig, _openai_ergebnisse),
+    'lokal': (_lokal_einreichen, _lokal_fertig, _lokal_ergebnisse)
+}
+
+
+def erstelle_laeufe(sweep):
+    """
+    Alle Kombinationen aus Problem, Provider, Temperatur und Wiederholung
+    """
+    laeufe = []
+    kombinationen = itertools.product(
+        enumerate(sweep['probleme']),
+        sweep.get('provider', ['claude']),
+        sweep.get('temperaturen', [None]),
+        range(sweep.get('wiederholungen', 1))
+    )
+    for (problem_nr, problem), provider, temperatur, wiederholung in kombinationen:
+        laeufe.append({
+            'id': f"p{problem_nr}_{provider}_T{temperatur}_{wiederholung}".replace('.', ''),
+            'problem_nr': problem_nr,
+            'problem': problem,
+            'provider': provider,
+            'temperatur': temperatur,
+            'max_versuche': sweep.get('max_versuche')
+        })
+    return laeufe
+
+
+def hole_erste_antworten(laeufe, lokal=False):
+    """
+    Reicht die ersten Prompts je Provider als ein Batch ein und wartet auf alle Ergebnisse
+
+    Rückgabe: {lauf_id: Antwort im Format von gpt_anfrage}; fehlende Läufe fragen Versuch 1 direkt an
+    """
+    batches = {}
+    for provider, gruppe in itertools.groupby(sorted(laeufe, key=lambda l: l['provider']), key=lambda l: l['provider']):
+        modul = lade_provider(provider)
+        anfragen = []
+        for lauf in gruppe:
+            temperatur = modul.TEMPERATURE if lauf['temperatur'] is None else lauf['temperatur']
+            anfragen.append({'id': lauf['id'], 'temperatur': temperatur, 'prompt': modul.erstelle_gpt_prompt(lauf['problem'])})
+        einreichen = BACKENDS['lokal' if lokal else provider][0]
+        batches[provider] = (modul, einreichen(modul, anfragen))
+        print(f"📦 Batch für {provider} eingereicht: {batches[provider][1]} ({len(anfragen)} Anfragen)")
+
+    antworten = {}
+    offen = dict(batches)
+    start = time.time()
+    while offen and time.time() - start < MAX_WARTEZEIT:
+        for provider, (modul, batch_id) in list(offen.items()):
+            _, fertig, ergebnisse = BACKENDS['lokal' if lokal else provider]
+            if fertig(modul, batch_id):
+                neue = ergebnisse(modul, batch_id)
+                antworten.update(neue)
+                print(f"✅ Batch {batch_id} fertig: {len(neue)} Antworten")
+                del offen[provider]
+        if offen:
+            time.sleep(LOKALE_VERZOEGERUNG if lokal else POLL_INTERVALL)
+    for provider, (_, batch_id) in offen.items():
+        print(f"⚠️  Batch {batch_id} ({provider}) nicht rechtzeitig fertig - erste Versuche werden direkt angefragt")
+    return antworten
+
+
+def fuehre_sweep_aus(sweep, lokal=False):
+    """
+    Batch für alle ersten Versuche, danach parallele Ausführung; Reprompts laufen interaktiv
+    """
+    laeufe = erstelle_laeufe(sweep)
+    antworten = hole_erste_antworten(laeufe, lokal)
+
+    def bearbeite(lauf):
+        modul = lade_provider(lauf['provider'])
+        statistiken = modul.loese_problem(
+            lauf['problem'],
+            temperatur=lauf['temperatur'],
+            max_versuche=lauf['max_versuche'],
+            erste_antwort=antworten.get(lauf['id'])
+        )
+        return {
+            'id': lauf['id'],
+            'problem_nr': lauf['problem_nr'],
+            'provider': lauf['provider'],
+            'temperatur': statistiken['temperature'],
+            'batch': lauf['id'] in antworten,
+            'erfolg': statistiken['erfolg'],
+            'anzahl_versuche': len(statistiken['versuche']),
+            'bericht_datei': statistiken.get('bericht_datei')
+        }
+
+    with ThreadPoolExecutor(max_workers=PARALLELE_LAEUFE) as pool:
+        ergebnisse = list(pool.map(bearbeite, laeufe))
+
+    return {
+        'zeitpunkt': datetime.datetime.now().isoformat(),
+        'lokal': lokal,
+        'laeufe': ergebnisse,
+        'erfolgreich': sum(1 for e in ergebnisse if e['erfolg']),
+        'erfolg_im_ersten_versuch': sum(1 for e in ergebnisse if e['erfolg'] and e['anzahl_versuche'] == 1)
+    }
+
+
+def main():
+    """
+    Sweep aus JSON-Datei ausführen und Zusammenfassung speichern
+    """
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        sweep = json.load(f)
+    lokal = '--lokal' in sys.argv[2:]
+
+    try:
+        ergebnis = fuehre_sweep_aus(sweep, lokal)
+    finally:
+        beende_warme_prozesse()
+
+    datei = f"sweep_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(datei, 'w', encoding='utf-8') as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f"\n📊 Sweep: {ergebnis['erfolgreich']}/{len(ergebnis['laeufe'])} gelöst, "
+          f"davon {ergebnis['erfolg_im_ersten_versuch']} im ersten Versuch (Batch)")
+    print(f"📁 Ergebnisse: {datei}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,27 +5,52 @@ KI-basierte Generierung mathematischer Modelle für praktische Optimierungsaufga
 Mit CLAUDE 3.5 SONNET
 """
 
-from amplpy import AMPL, modules
-import anthropic
 import subprocess
 import tempfile
 import time
 import json
 import datetime
+import hashlib
+import shutil
 import re
 import os
-
-# AMPL Module installieren
-try:
-    modules.install()
-    print("✅ AMPL Module installiert")
-except:
-    print("⚠️ AMPL Module bereits vorhanden")
+from MA_Jensen_Start import installiere_module_einmalig
+from MA_Jensen_Solver import summiere_solver_metriken, WARMSTART_DATEI
+from MA_Jensen_Sonde import lies_sondenbericht
+from MA_Jensen_Modell import letzte_modellanalyse
+from MA_Jensen_Diagnose import formatiere_diagnose, letzte_diagnose
+from MA_Jensen_Profil import formatiere_profil, PHASEN_NAMEN
+from MA_Jensen_Duplikate import kandidaten_fingerabdruck, diversifizierte_temperatur
+from MA_Jensen_Vorlagen import VORLAGEN_DATEI, finde_vorlage, uebertrage_daten, pruefe_daten, extraktions_prompt, daten_aus_antwort, vorlagen_code, speichere_vorlage, vermerke_wiederverwendung, EXTRAKTION_TEMPERATUR
+from MA_Jensen_Ausfuehrung import erstelle_lauf_id, erstelle_versuchsverzeichnis, sammle_artefakte, raeume_auf, fuehre_warm_aus, fuehre_begrenzt_aus, limit_hinweis, Reparatursitzung, RESSOURCEN_LIMITS
+from MA_Jensen_Reparatur import ist_modellfehler, modell_reparatur_prompt, modell_aus_antwort, setze_modell_ein
+from MA_Jensen_Fehlerauszug import verdichte_fehler
+from MA_Jensen_Kaskade import waehle_modell, zaehle_modelle
+from MA_Jensen_Historie import bewerte_reprompt, historie_aktualisieren
+from MA_Jensen_API import hole_scheduler, schaetze_tokens, summiere_token_metriken, verbrauchte_tokens, anthropic_inhalt, token_metriken_anthropic, cache_praefix_tokens, CACHE_MIN_TOKENS
 
 # ===== KONFIGURATION =====
 API_KEY = "hier API-Key einfügen"
 MAX_VERSUCHE = 3
+VERSUCH_TIMEOUT = 120  # Sekunden je Ausführung des generierten Codes
 TEMPERATURE = 1.0  # HIER ÄNDERN für verschiedene Experimente (0.0 - 1.0)
+MODELL = "claude-sonnet-4-20250514"
+HISTORIE_NUTZEN = True  # Reprompt-Entscheidung aus früheren Berichten (bericht_*.json) lernen
+SOLVER_PORTFOLIO = False  # opt-in: jeder Solve als Wettlauf HiGHS/CBC auf derselben .nl-Datei - erstes bewiesenes Optimum gewinnt
+WARMSTART = True  # Letzte zulässige Lösung je Modell als Startpunkt für den nächsten Solve
+SOLVER_LOG = True  # Solver-Log (HiGHS/CBC) einschalten und in Kennzahlen zerlegen
+MODELLANALYSE = True  # Größe/Struktur des Modells vor jedem Solve erfassen (Empfehlung für Solver und Zeitbudget)
+IIS_DIAGNOSE = True  # bei Unzulässigkeit widersprüchliche Nebenbedingungen bestimmen und im Reprompt nennen
+PROFILING = False  # Laufzeitprofil des generierten Codes (Phasen, langsamste Zeilen) - opt-in, kostet etwas Laufzeit
+PROFIL_IM_REPROMPT = True  # bei Timeout/CPU-Limit das Profil in den Reprompt übernehmen
+WARME_AUSFUEHRUNG = False  # vorgestartete Sonden-Prozesse nutzen (vom Dienst aktiviert)
+VORLAGEN_NUTZEN = True  # bekannte Problemstruktur: verifiziertes Modell mit neuen Daten statt Generierung
+KASKADE = False  # erster Versuch einfacher Aufgaben mit GUENSTIGES_MODELL, danach und bei schwierigen Aufgaben MODELL
+GUENSTIGES_MODELL = "claude-3-5-haiku-20241022"
+REPARATUR_SITZUNG = True  # reiner Modellfehler: nur das Modell neu anfordern und in der offenen AMPL-Sitzung lösen (nicht mit WARME_AUSFUEHRUNG)
+
+# Sonde instrumentiert amplpy im Kindprozess (Warmstart, Messwerte)
+SONDE_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MA_Jensen_Sonde.py')
 
 # ===== OPTIMIERUNGSAUFGABE =====
 # HIER WIRD DAS PROBLEM DEFINIERT - EINZIGER ANPASSUNGSPUNKT
@@ -33,11 +58,12 @@ user_problem = """
 Hier Optimierungsaufgabe einfügen
 """
 
-def erstelle_gpt_prompt(problem):
-    return f"""Löse diese Optimierungsaufgabe mit AMPL und Python:
-
-{problem}
+# Prompt des ersten Versuchs: PROMPT_KOPF, Aufgabe, PROMPT_SCHLUSS (mit Zeilenumbrüchen verbunden).
+# Reprompts beginnen byte-gleich mit diesem Prompt - der gemeinsame Präfix wird vom Provider gecacht.
+PROMPT_KOPF = """Löse diese Optimierungsaufgabe mit AMPL und Python:
+"""
 
+PROMPT_SCHLUSS = """
 Erstelle vollständigen Python-Code mit:
 - from amplpy import AMPL, modules
 - modules.install() und ampl = AMPL()
@@ -49,6 +75,70 @@ Erstelle vollständigen Python-Code mit:
 
 Gib NUR Python-Code zurück!"""
 
+# Regeln für Korrekturversuche - folgen im Reprompt auf den unveränderten Prompt des ersten Versuchs
+REPROMPT_REGELN = """
+FÜR KORREKTURVERSUCHE (REPROMPTING) GILT ZUSÄTZLICH:
+
+ERWEITERTE CHAIN-OF-THOUGHT KORREKTUR-ANALYSE:
+
+1. FEHLERMUSTER-ERKENNUNG:
+   - Was genau ist beim vorherigen Versuch schiefgelaufen?
+   - Welche Annahmen waren falsch?
+   - Welche AMPL-Syntax war fehlerhaft?
+
+2. LÖSUNGSANSATZ-ÜBERARBEITUNG:
+   - Wie kann die Modellstruktur verbessert werden?
+   - Welche alternativen Implementierungsstrategien gibt es?
+   - Welche Validierungsschritte sind notwendig?
+
+3. QUALITÄTSSICHERUNG:
+   - Überprüfe alle Set-Parameter-Konsistenzen
+   - Validiere AMPL-Syntax vor der Implementierung
+   - Stelle sicher, dass alle Daten korrekt zugewiesen werden
+
+WICHTIG: Verwende AUSSCHLIESSLICH AMPL mit amplpy! 
+KEINE anderen Libraries wie PuLP, scipy, gurobipy, cvxpy oder ortools!
+
+STRIKTE ANFORDERUNGEN:
+1. NUR amplpy verwenden: from amplpy import AMPL, modules
+2. KEINE Unicode-Zeichen in print-Statements (nur ASCII: ->, nicht →)
+3. Korrekte AMPL-Syntax für den jeweiligen Optimierungstyp
+4. Vollständige Dateninitialisierung im Python-Teil
+5. Fehlerfreie Solver-Aufrufe mit ampl.setOption('solver', 'highs')
+6. Generierung von .mod und .dat Dateien
+7. Encoding-sichere Ausgabe ohne Sonderzeichen
+
+ZWINGEND: STRIKTE DATEN-TRENNUNG:
+- Modell: NUR als String definieren, dann ampl.eval(model_str)
+- Daten: NUR mit ampl.set[] und ampl.param[] setzen
+- NIEMALS ampl.eval() mit Daten verwenden (verursacht "already defined" Fehler)
+- Variable-Zugriff: IMMER .getValues().toDict()
+
+AUSGABE-REGELN:
+- Verwende nur ASCII-sichere Ausgaben
+- Bei solve_result == 'solved': print("Optimale Lösung gefunden")
+- Für ALLE Variablen: verwende .getValues().toDict() statt direkten Zugriff
+- Beispiel: var_dict = ampl.getVariable('var_name').getValues().toDict()
+- Dann: for key, val in var_dict.items(): print(key, val)
+
+**UNIVERSELLES TEMPLATE für alle Optimierungstypen:**
+Für alle Variablen-Ausgaben verwende:
+- values_dict = ampl.getVariable('var_name').getValues().toDict()
+- for key, val in values_dict.items(): print(key, val)
+- Das funktioniert für binäre, ganzzahlige und kontinuierliche Variablen
+
+Generiere AUSSCHLIESSLICH AMPL-basierten Python-Code ohne andere Optimierungs-Libraries!
+"""
+
+def erstelle_gpt_prompt(problem):
+    """
+    Prompt für den ersten Versuch: Kopf und Aufgabe bilden den gecachten Präfix aller Versuche
+    """
+    return {
+        'system': [],
+        'nachricht': [(PROMPT_KOPF, False), (problem, True), (PROMPT_SCHLUSS, False)]
+    }
+
 
 def repariere_code(code):
     """
@@ -119,59 +209,109 @@ def repariere_code(code):
     
     return code, reparaturen
 
-def fuehre_code_aus(code):
+def fuehre_code_aus(code, arbeitsverzeichnis=None, sitzung=None, modell=None, reparierbar=True):
     """
-    Führt generierten Code sicher aus
+    Führt generierten Code sicher aus - im eigenen Arbeitsverzeichnis des Versuchs
+    
+    sitzung/modell: korrigiertes Modell in der offenen Reparatursitzung eines Vorversuchs lösen
+    Nach einem Fehler enthält das Ergebnis unter 'sitzung' die noch offene Reparatursitzung (sonst None);
+    der Aufrufer muss sie beenden. reparierbar=False: ohne Reparatursitzung (z.B. Modellvorlagen).
     """
+    if arbeitsverzeichnis is None:
+        arbeitsverzeichnis = tempfile.mkdtemp(prefix='versuch_')
     try:
-        # Temporäre Datei erstellen
-        with tempfile.NamedTemporaryFile(mode='w', suffix='.py', delete=False, encoding='utf-8') as f:
+        # Code-Datei im Arbeitsverzeichnis erstellen (model.mod/data.dat entstehen ebenfalls dort)
+        temp_file = os.path.join(arbeitsverzeichnis, 'versuch.py')
+        with open(temp_file, 'w', encoding='utf-8') as f:
             f.write(code)
-            temp_file = f.name
-        
-        # Code ausführen
-        result = subprocess.run(
-            ['python', temp_file], 
-            capture_output=True, 
-            text=True, 
-            encoding='utf-8',
-            errors='replace',
-            timeout=120
-        )
         
-        # Temporäre Datei löschen
-        os.unlink(temp_file)
+        # Sonden-Konfiguration über Umgebungsvariablen
+        sonde_bericht = os.path.join(arbeitsverzeichnis, 'sonde.json')
+        umgebung = dict(os.environ)
+        umgebung.update({
+            'MA_JENSEN_SONDE_BERICHT': sonde_bericht,
+            'MA_JENSEN_WARMSTART': '1' if WARMSTART else '0',
+            'MA_JENSEN_SOLVER_LOG': '1' if SOLVER_LOG else '0',
+            'MA_JENSEN_MODELLANALYSE': '1' if MODELLANALYSE else '0',
+            'MA_JENSEN_IIS': '1' if IIS_DIAGNOSE else '0',
+            'MA_JENSEN_PROFIL': '1' if PROFILING else '0',
+            'MA_JENSEN_PORTFOLIO': '1' if SOLVER_PORTFOLIO else '0',
+            'MA_JENSEN_ZEITLIMIT': str(VERSUCH_TIMEOUT),
+            'MA_JENSEN_WARMSTART_DATEI': os.path.abspath(WARMSTART_DATEI)
+        })
         
         # Verbesserte Fehler-Erkennung für AMPL-Probleme
         ampl_errors = ['syntax error', 'no value for', 'Error executing', 'infeasible problem', 'unbounded', 'undefined']
+        
+        # Code ausführen (über die Sonde, mit Ressourcenlimits und -messung)
+        # stdout/stderr sind Auszüge (Anfang, Fehlerzeilen, Ende) - vollständig ggf. als .gz-Artefakt
+        if sitzung is not None:
+            # Daten und AMPL-Prozess des Vorversuchs bleiben erhalten - nur das Modell wird ersetzt
+            result, ressourcen = sitzung.repariere(modell, temp_file, arbeitsverzeichnis, umgebung, timeout=VERSUCH_TIMEOUT, muster=ampl_errors)
+        elif WARME_AUSFUEHRUNG:
+            result, ressourcen = fuehre_warm_aus(SONDE_DATEI, temp_file, arbeitsverzeichnis, umgebung, timeout=VERSUCH_TIMEOUT, muster=ampl_errors)
+        elif REPARATUR_SITZUNG and reparierbar:
+            sitzung = Reparatursitzung(SONDE_DATEI, umgebung)
+            result, ressourcen = sitzung.fuehre_aus(temp_file, arbeitsverzeichnis, umgebung, timeout=VERSUCH_TIMEOUT, muster=ampl_errors)
+        else:
+            result, ressourcen = fuehre_begrenzt_aus(['python', SONDE_DATEI, temp_file], arbeitsverzeichnis, umgebung, timeout=VERSUCH_TIMEOUT, muster=ampl_errors)
+        
+        sonde = lies_sondenbericht(sonde_bericht)
+        artefakte = sammle_artefakte(arbeitsverzeichnis)
+        
         output_text = result.stdout + result.stderr
         
         has_ampl_error = any(error_msg in output_text for error_msg in ampl_errors)
+        erfolg = result.returncode == 0 and not has_ampl_error
+        
+        # Sitzung nur nach einem Fehler offen halten (für eine mögliche Modellkorrektur)
+        if sitzung is not None and (erfolg or not sitzung.ampl_aktiv):
+            ressourcen = dict(sitzung.beende(), **ressourcen)
+            sitzung = None
         
-        if result.returncode == 0 and not has_ampl_error:
+        if erfolg:
             return {
                 'erfolg': True,
                 'ausgabe': result.stdout,
-                'fehler': None
+                'fehler': None,
+                'sonde': sonde,
+                'artefakte': artefakte,
+                'ressourcen': ressourcen,
+                'sitzung': None
             }
         else:
+            fehler = result.stderr if result.returncode != 0 else f"AMPL-Fehler erkannt: {output_text}"
+            hinweis = limit_hinweis(ressourcen)
             return {
                 'erfolg': False,
                 'ausgabe': result.stdout,
-                'fehler': result.stderr if result.returncode != 0 else f"AMPL-Fehler erkannt: {output_text}"
+                'fehler': f"{hinweis}\n{fehler}" if hinweis else fehler,
+                'sonde': sonde,
+                'artefakte': artefakte,
+                'ressourcen': ressourcen,
+                'sitzung': sitzung
             }
     
-    except subprocess.TimeoutExpired:
+    except subprocess.TimeoutExpired as e:
         return {
             'erfolg': False,
             'ausgabe': '',
-            'fehler': 'Timeout: Code lief länger als 2 Minuten'
+            'fehler': 'Timeout: Code lief länger als 2 Minuten',
+            'sonde': lies_sondenbericht(sonde_bericht),  # Zwischenstand, z.B. Laufzeitprofil
+            'artefakte': {},
+            'ressourcen': getattr(e, 'ressourcen', {}),
+            'timeout': True
         }
     except Exception as e:
+        if sitzung is not None:
+            sitzung.beende()
         return {
             'erfolg': False,
             'ausgabe': '',
-            'fehler': str(e)
+            'fehler': str(e),
+            'sonde': {'solves': []},
+            'artefakte': {},
+            'ressourcen': {}
         }
 
 def analysiere_fehler_detailliert(fehler, ausgabe="", code=""):
@@ -331,9 +471,12 @@ def analysiere_fehler_typ(fehler, ausgabe=""):
     fehler_bericht, korrektur_anweisung = analysiere_fehler_detailliert(fehler, ausgabe, "")
     return fehler_bericht['fehler_kategorie'], korrektur_anweisung
 
-def soll_reprompting_erfolgen(fehler, versuch_nr, max_versuche):
+def soll_reprompting_erfolgen(fehler, versuch_nr, max_versuche, temperatur=None, fehlversuch_nr=None, modell=None):
     """
     Intelligente Entscheidung ob Reprompting sinnvoll ist
+    
+    Mit HISTORIE_NUTZEN entscheidet der Erwartungswert aus früheren Läufen
+    (Kategorie, Modell des fehlgeschlagenen Versuchs, Temperatur, Nummer des fehlgeschlagenen Versuchs).
     """
     if versuch_nr >= max_versuche:
         return False, "Maximale Versuche erreicht"
@@ -341,6 +484,18 @@ def soll_reprompting_erfolgen(fehler, versuch_nr, max_versuche):
     fehler_bericht, _ = analysiere_fehler_detailliert(fehler, "", "")
     kategorie = fehler_bericht['fehler_kategorie']
     
+    if HISTORIE_NUTZEN:
+        bewertung = bewerte_reprompt(
+            kategorie,
+            modell or MODELL,
+            TEMPERATURE if temperatur is None else temperatur,
+            versuch_nr if fehlversuch_nr is None else fehlversuch_nr
+        )
+        details = f"P(Erfolg)={bewertung['p_erfolg']:.2f}, EV={bewertung['erwartungswert']:+.2f}, {bewertung['beobachtungen']} Beobachtungen"
+        if bewertung['reprompt']:
+            return True, f"Reprompting sinnvoll für {kategorie} ({details})"
+        return False, f"Reprompting nicht erfolgversprechend für {kategorie} ({details})"
+    
     # Kategorien, die durch Reprompting lösbar sind
     loesbare_kategorien = [
         'SET_PARAMETER_INCONSISTENZ',
@@ -358,49 +513,27 @@ def soll_reprompting_erfolgen(fehler, versuch_nr, max_versuche):
     else:
         return False, f"Reprompting nicht sinnvoll für {kategorie}"
 
-def erstelle_intelligenten_reprompt(fehler, original_problem, alter_code, versuch_nr):
+def erstelle_intelligenten_reprompt(fehler, original_problem, alter_code, versuch_nr, diagnose=None, duplikat_von=None, profil=None):
     """
     Erstellt intelligenten, fehler-spezifischen Reprompt mit Chain-of-Thought und Lernfähigkeit
+
+    diagnose: IIS-Diagnose der Sonde bei unzulässigen Modellen (konkrete Nebenbedingungen und Daten)
+    duplikat_von: Versuch, mit dem der letzte Code identisch war - fordert einen anderen Ansatz an
+    profil: Laufzeitprofil der Sonde nach Timeout (Phasenanteile und langsamste Zeilen)
+
+    Aufbau für Prompt-Caching: fester Präfix -> Aufgabe -> Kategorie-Block -> variable Fehlerdetails
     """
     fehler_bericht, spezifische_anweisung = analysiere_fehler_detailliert(fehler, "", alter_code)
     fehler_typ = fehler_bericht['fehler_kategorie']
     
-    base_prompt = f"""
-INTELLIGENTES CHAIN-OF-THOUGHT REPROMPTING - VERSUCH {versuch_nr}
-
-FEHLERANALYSE UND LERNSCHRITT:
-Der vorherige Code (Versuch {versuch_nr-1}) hatte einen Fehler:
-FEHLER-KATEGORIE: {fehler_typ}
-FEHLER-BESCHREIBUNG: {fehler_bericht['fehler_beschreibung']}
-URSACHEN-ANALYSE: {fehler_bericht['ursache_analyse']}
-
+    # Kategorie-Block: nur von der Fehlerkategorie abhängig
+    kategorie_block = f"""
 DETAILIERTE KORREKTUR-STRATEGIE:
 {spezifische_anweisung}
-
-ERWEITERTE CHAIN-OF-THOUGHT KORREKTUR-ANALYSE:
-
-1. FEHLERMUSTER-ERKENNUNG:
-   - Was genau ist beim vorherigen Versuch schiefgelaufen?
-   - Welche Annahmen waren falsch?
-   - Welche AMPL-Syntax war fehlerhaft?
-
-2. LÖSUNGSANSATZ-ÜBERARBEITUNG:
-   - Wie kann die Modellstruktur verbessert werden?
-   - Welche alternativen Implementierungsstrategien gibt es?
-   - Welche Validierungsschritte sind notwendig?
-
-3. QUALITÄTSSICHERUNG:
-   - Überprüfe alle Set-Parameter-Konsistenzen
-   - Validiere AMPL-Syntax vor der Implementierung
-   - Stelle sicher, dass alle Daten korrekt zugewiesen werden
-
-ORIGINAL-AUFGABE: {original_problem}
-
-ADAPTIVE LERN-STRATEGIEN basierend auf Versuch {versuch_nr}:
 """
     
     if fehler_typ == "SET_PARAMETER_INCONSISTENZ":
-        base_prompt += """
+        kategorie_block += """
 SPEZIELLE SET-PARAMETER-KORREKTUR:
 1. Definiere ALLE Sets ZUERST im model_str
 2. Verwende EXAKT dieselben String-Namen in Sets und Parametern
@@ -411,7 +544,7 @@ SPEZIELLE SET-PARAMETER-KORREKTUR:
 """
     
     elif fehler_typ == "DOPPELDEFINITION":
-        base_prompt += """
+        kategorie_block += """
 SPEZIELLE DOPPELDEFINITION-KORREKTUR:
 1. NUR model_str mit ampl.eval() verwenden
 2. ALLE Daten mit ampl.set[] und ampl.param[] setzen
@@ -424,7 +557,7 @@ SPEZIELLE DOPPELDEFINITION-KORREKTUR:
 """
     
     elif fehler_typ == "UNLÖSBAR":
-        base_prompt += """
+        kategorie_block += """
 SPEZIELLE UNLÖSBARKEIT-KORREKTUR:
 1. Prüfe Balance: Gesamt-Angebot >= Gesamt-Nachfrage
 2. Relaxiere kritische Constraints
@@ -432,50 +565,45 @@ SPEZIELLE UNLÖSBARKEIT-KORREKTUR:
 4. Verwende <= statt = für strenge Gleichungen wo möglich
 """
     
-    base_prompt += f"""
-
-WICHTIG: Verwende AUSSCHLIESSLICH AMPL mit amplpy! 
-KEINE anderen Libraries wie PuLP, scipy, gurobipy, cvxpy oder ortools!
-
-STRIKTE ANFORDERUNGEN für Versuch {versuch_nr}:
-1. NUR amplpy verwenden: from amplpy import AMPL, modules
-2. KEINE Unicode-Zeichen in print-Statements (nur ASCII: ->, nicht →)
-3. Korrekte AMPL-Syntax für den jeweiligen Optimierungstyp
-4. Vollständige Dateninitialisierung im Python-Teil
-5. Fehlerfreie Solver-Aufrufe mit ampl.setOption('solver', 'highs')
-6. Generierung von .mod und .dat Dateien
-7. Encoding-sichere Ausgabe ohne Sonderzeichen
-
-ZWINGEND: STRIKTE DATEN-TRENNUNG:
-- Modell: NUR als String definieren, dann ampl.eval(model_str)
-- Daten: NUR mit ampl.set[] und ampl.param[] setzen
-- NIEMALS ampl.eval() mit Daten verwenden (verursacht "already defined" Fehler)
-- Variable-Zugriff: IMMER .getValues().toDict()
-
-AUSGABE-REGELN:
-- Verwende nur ASCII-sichere Ausgaben
-- Bei solve_result == 'solved': print("Optimale Lösung gefunden")
-- Für ALLE Variablen: verwende .getValues().toDict() statt direkten Zugriff
-- Beispiel: var_dict = ampl.getVariable('var_name').getValues().toDict()
-- Dann: for key, val in var_dict.items(): print(key, val)
+    # Variabler Teil ganz am Ende
+    versuch_block = f"""
+INTELLIGENTES CHAIN-OF-THOUGHT REPROMPTING - VERSUCH {versuch_nr}
 
-**UNIVERSELLES TEMPLATE für alle Optimierungstypen:**
-Für alle Variablen-Ausgaben verwende:
-- values_dict = ampl.getVariable('var_name').getValues().toDict()
-- for key, val in values_dict.items(): print(key, val)
-- Das funktioniert für binäre, ganzzahlige und kontinuierliche Variablen
+FEHLERANALYSE UND LERNSCHRITT:
+Der vorherige Code (Versuch {versuch_nr-1}) hatte einen Fehler:
+FEHLER-KATEGORIE: {fehler_typ}
+FEHLER-BESCHREIBUNG: {fehler_bericht['fehler_beschreibung']}
+URSACHEN-ANALYSE: {fehler_bericht['ursache_analyse']}
 
-Generiere AUSSCHLIESSLICH AMPL-basierten Python-Code ohne andere Optimierungs-Libraries!
+FEHLERAUSZUG (vom System verdichtet):
+{verdichte_fehler(fehler)}{formatiere_diagnose(diagnose) if diagnose else ""}{formatiere_profil(profil) if profil else ""}
+Wende die Korrektur-Analyse und die strikten Anforderungen für Versuch {versuch_nr} an.
+"""
+    
+    if duplikat_von:
+        versuch_block += f"""
+ACHTUNG - WIEDERHOLUNG ERKANNT:
+Dein letzter Code (bzw. sein AMPL-Modell) war inhaltlich identisch mit Versuch {duplikat_von} und scheitert genauso.
+Wähle einen grundlegend anderen Modellierungsansatz (andere Sets/Indizes, andere Formulierung
+der Nebenbedingungen) statt den bisherigen Code leicht umzuformulieren.
 """
     
-    return base_prompt
+    # Prompt des ersten Versuchs unverändert vorne, damit der Präfix mit ihm übereinstimmt
+    erster_prompt = erstelle_gpt_prompt(original_problem)
+    return {
+        'system': [],
+        'nachricht': erster_prompt['nachricht'] + [
+            (REPROMPT_REGELN + kategorie_block, True),
+            (versuch_block, False)
+        ]
+    }
 
 def erstelle_detaillierten_fehlerbericht(statistiken):
     """
     Erstellt umfassenden Fehlerbericht mit Lösungsstrategien
     """
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    bericht_datei = f"fehleranalyse_bericht_{timestamp}.txt"
+    bericht_datei = f"fehleranalyse_bericht_{statistiken.get('lauf_id', timestamp)}.txt"
     
     bericht = []
     bericht.append("=" * 80)
@@ -516,9 +644,11 @@ def erstelle_detaillierten_fehlerbericht(statistiken):
                 bericht.append(f"Code-Analyse: {fa['code_analyse']}")
                 bericht.append("")
                 bericht.append("TECHNISCHE DETAILS:")
-                for line in fa['technische_details'].split('\n')[:5]:  # Erste 5 Zeilen
+                # Verdichteter Auszug statt der ersten Zeilen der gesamten Ausgabe
+                details = versuch.get('fehler_auszug') or fa['technische_details']
+                for line in details.strip().split('\n')[:8]:
                     bericht.append(f"  {line}")
-                if len(fa['technische_details'].split('\n')) > 5:
+                if len(details.strip().split('\n')) > 8:
                     bericht.append("  [...weitere Details in JSON-Bericht...]")
                 bericht.append("")
     
@@ -563,20 +693,23 @@ def erstelle_detaillierten_fehlerbericht(statistiken):
     print(f"📊 Detaillierter Fehlerbericht: {bericht_datei}")
     return bericht_datei
 
-def speichere_finale_dateien(erfolgreicher_code=""):
+def speichere_finale_dateien(erfolgreicher_code="", temperatur=None):
     """
     Speichert finale Lösung und Nachweis-Dateien
     """
+    if temperatur is None:
+        temperatur = TEMPERATURE
     timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-    temp_str = f"T{str(TEMPERATURE).replace('.', '')}"
+    temp_str = f"T{str(temperatur).replace('.', '')}"
     api_name = "CLAUDE"  # API-Bezeichner für Claude
     
-    # Finale Python-Lösung speichern
-    finale_datei = f"finale_loesung_{api_name}_{temp_str}_{timestamp}.py"
+    # Finale Python-Lösung speichern - Code-Hash verhindert Kollisionen paralleler Läufe
+    code_hash = hashlib.sha256(erfolgreicher_code.encode('utf-8')).hexdigest()[:8]
+    finale_datei = f"finale_loesung_{api_name}_{temp_str}_{timestamp}_{code_hash}.py"
     with open(finale_datei, 'w', encoding='utf-8', errors='replace') as f:
         f.write("# Finale Lösung - Universelles Optimierungssystem\n")
         f.write("# Erstellt durch KI-basierte Modellgenerierung\n")
-        f.write(f"# Temperature: {TEMPERATURE}\n\n")
+        f.write(f"# Temperature: {temperatur}\n\n")
         if erfolgreicher_code:
             f.write(erfolgreicher_code)
         else:
@@ -584,63 +717,178 @@ def speichere_finale_dateien(erfolgreicher_code=""):
     
     print(f"📁 Finale Lösung: {finale_datei}")
     
-    return timestamp
+    return finale_datei
+
+_client = None  # Provider-Client: beim ersten Aufruf erzeugt und danach wiederverwendet
+
+def hole_client():
+    """
+    Erzeugt den Claude-Client beim ersten Aufruf (SDK-Import erst hier)
+    """
+    global _client
+    if _client is None:
+        import anthropic
+        # Wiederholungen übernimmt der gemeinsame Scheduler, nicht das SDK
+        _client = anthropic.Anthropic(api_key=API_KEY, max_retries=0)
+    return _client
 
-def gpt_anfrage(prompt, temperature=None):
+def gpt_anfrage(prompt, temperature=None, modell=None):
     """
     Sendet Anfrage an Claude Sonnet und gibt Antwort zurück
     """
     if temperature is None:
         temperature = TEMPERATURE
+    if modell is None:
+        modell = MODELL
     
-    client = anthropic.Anthropic(api_key=API_KEY)
+    client = hole_client()
     
-    try:
-        start_time = time.time()
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
+    def anfrage():
+        return client.messages.create(
+            model=modell,
             max_tokens=4000,
             temperature=temperature,
-            messages=[{"role": "user", "content": prompt}]
+            **anthropic_inhalt(prompt)
         )
-        end_time = time.time()
-        
+    
+    ergebnis = hole_scheduler().sende(
+        anfrage,
+        schaetze_tokens(prompt),
+        lambda response: verbrauchte_tokens(token_metriken_anthropic(response.usage))
+    )
+    
+    if ergebnis['erfolg']:
         return {
             'erfolg': True,
-            'antwort': response.content[0].text,
-            'zeit': end_time - start_time
-        }
-    except Exception as e:
-        return {
-            'erfolg': False,
-            'antwort': None,
-            'fehler': str(e),
-            'zeit': 0
+            'antwort': ergebnis['antwort'].content[0].text,
+            'zeit': ergebnis['zeit'],
+            'wiederholungen': ergebnis['wiederholungen'],
+            'wartezeit': ergebnis['wartezeit'],
+            'tokens': token_metriken_anthropic(ergebnis['antwort'].usage)
         }
+    return {
+        'erfolg': False,
+        'antwort': None,
+        'fehler': ergebnis['fehler'],
+        'status_code': ergebnis['status_code'],
+        'wiederholungen': ergebnis['wiederholungen'],
+        'wartezeit': ergebnis['wartezeit'],
+        'zeit': 0
+    }
 
-def main():
+def loese_mit_vorlage(problem, lauf_id):
     """
-    Hauptfunktion - Universelles Optimierungssystem
+    Bekannte Problemstruktur: verifiziertes Modell mit den Daten der neuen Aufgabe lösen (Versuch 0)
+    
+    Rückgabe: (versuch_info oder None, Vorlagen-Info für die Statistik oder None)
     """
-    print("✅ AMPL Module installiert")
-    print("=" * 70)
-    print(" MASTERARBEIT - UNIVERSELLES OPTIMIERUNGSSYSTEM")
-    print("=" * 70)
+    vorlage = finde_vorlage(problem)
+    if vorlage is None:
+        return None, None
+    print(f"🧬 Bekannte Problemstruktur - Modellvorlage vom {vorlage['erstellt'][:10]} ({vorlage['erstellt_mit']})")
+    
+    info = {'model_hash': vorlage['model_hash'], 'quelle': 'parser', 'erfolg': False, 'zeit': 0.0}
+    start = time.time()
+    gpt_result = {'zeit': 0, 'wiederholungen': 0, 'wartezeit': 0.0,
+                  'tokens': {'eingabe_tokens': 0, 'ausgabe_tokens': 0, 'cache_gelesen': 0, 'cache_geschrieben': 0}}
+    
+    # Zahlen direkt übertragen; nur wenn das nicht eindeutig ist, kurze Extraktions-Anfrage
+    daten = uebertrage_daten(vorlage, problem)
+    if daten is None:
+        info['quelle'] = 'extraktion'
+        print("🤖 Zahlen nicht eindeutig zuordenbar - extrahiere nur die Daten per Anfrage...")
+        gpt_result = gpt_anfrage(extraktions_prompt(vorlage, problem), EXTRAKTION_TEMPERATUR)
+        if not gpt_result['erfolg']:
+            info['fehler'] = gpt_result['fehler']
+            print(f"⚠️  Extraktion fehlgeschlagen - normale Modellgenerierung")
+            return None, info
+        daten = daten_aus_antwort(gpt_result['antwort'])
+        if daten is None:
+            info['fehler'] = 'Keine data.dat in der Antwort der Extraktion'
+            print(f"⚠️  Keine Daten extrahiert - normale Modellgenerierung")
+            return None, info
+    else:
+        print("📥 Zahlen der neuen Aufgabe direkt in data.dat übertragen")
+    
+    # solve_result 'solved' allein belegt nicht, dass die neuen Zahlen in den Daten stehen
+    fehlend = pruefe_daten(vorlage, problem, daten)
+    if fehlend:
+        info['fehler'] = f"Zahlen der Aufgabe fehlen in data.dat: {', '.join(fehlend)}"
+        print(f"⚠️  {info['fehler']} - normale Modellgenerierung")
+        return None, info
+    
+    code = vorlagen_code(vorlage['modell'], daten)
+    versuchsverzeichnis = erstelle_versuchsverzeichnis(lauf_id, 0)
+    # Keine Modellkorrektur für Vorlagen - bei einem Fehler folgt die normale Generierung
+    exec_result = fuehre_code_aus(code, versuchsverzeichnis, reparierbar=False)
+    info['zeit'] = time.time() - start
+    raeume_auf(versuchsverzeichnis, exec_result['erfolg'])
+    if not exec_result['erfolg']:
+        info['fehler'] = exec_result['fehler']
+        print(f"⚠️  Vorlage mit neuen Daten nicht lösbar - normale Modellgenerierung")
+        return None, info
+    
+    info['erfolg'] = True
+    print(f"⚡ Mit Vorlage gelöst in {info['zeit']:.1f}s")
+    versuch_info = {
+        'versuch_nr': 0,
+        'gpt_zeit': gpt_result['zeit'],
+        'temperatur': EXTRAKTION_TEMPERATUR if info['quelle'] == 'extraktion' else None,
+        'api_wiederholungen': gpt_result['wiederholungen'],
+        'api_wartezeit': gpt_result['wartezeit'],
+        'tokens': gpt_result['tokens'],
+        'code': code,
+        'reparaturen': [],
+        'erfolg': True,
+        'ausgabe': exec_result['ausgabe'],
+        'fehler': None,
+        'fehler_analyse': None,
+        'solves': exec_result['sonde']['solves'],
+        'artefakte': exec_result['artefakte'],
+        'ressourcen': exec_result['ressourcen'],
+        'fingerabdruck': kandidaten_fingerabdruck(code),
+        'duplikat_von': None,
+        'gleiches_modell_wie': None,
+        'arbeitsverzeichnis': None,
+        'vorlage': info
+    }
+    return versuch_info, info
+
+def loese_problem(problem, temperatur=None, max_versuche=None, ereignis=None, abbruch=None, erste_antwort=None):
+    """
+    Versuchsschleife für eine Optimierungsaufgabe - genutzt von main(), Dienst und Auswertungen
+    
+    ereignis(typ, daten) erhält Statusmeldungen, abbruch (threading.Event) beendet vor dem nächsten Versuch
+    erste_antwort: bereits vorliegende Antwort für Versuch 1 (z.B. aus der Batch-API), Format wie gpt_anfrage
+    """
+    if temperatur is None:
+        temperatur = TEMPERATURE
+    if max_versuche is None:
+        max_versuche = MAX_VERSUCHE
+    
+    def melde(typ, **daten):
+        if ereignis is not None:
+            ereignis(typ, daten)
     
     # Problem anzeigen
-    print(f"Aufgabe:\n{user_problem[:100]}...")
+    print(f"Aufgabe:\n{problem[:100]}...")
     
     timestamp = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S.%f")
     print(f"Timestamp: {timestamp}")
     print("=" * 70)
     
+    # Eindeutige Lauf-Kennung für Arbeitsverzeichnisse und Berichtsnamen
+    lauf_id = erstelle_lauf_id()
+    
     statistiken = {
         'timestamp': timestamp,
-        'problem': user_problem,
-        'temperature': TEMPERATURE,  # Temperature-Parameter für Nachvollziehbarkeit
-        'model': 'claude-sonnet-4-20250514',
+        'lauf_id': lauf_id,
+        'problem': problem,
+        'temperature': temperatur,  # Temperature-Parameter für Nachvollziehbarkeit
+        'model': MODELL,
         'erfolg': False,
         'versuche': [],
+        'api_fehler': [],  # API-Fehler getrennt von Modellfehlern
         'statistiken': {}
     }
     
@@ -648,14 +896,43 @@ def main():
     reprompts = 0
     letzter_fehler = ""
     letzter_code = ""
+    letzte_iis = None  # IIS-Diagnose des letzten Versuchs
+    letztes_profil = None  # Laufzeitprofil des letzten Versuchs, falls er am Zeitlimit scheiterte
+    bekannte_kandidaten = {}  # Code-Fingerabdruck -> (Versuch, Ausführungsergebnis)
+    bekannte_modelle = {}  # Modell-Fingerabdruck -> Versuch
+    letztes_duplikat = None
+    offene_sitzung = None  # Reparatursitzung des letzten Versuchs, falls nur das Modell fehlerhaft war
+    anfrage_temperatur = temperatur  # wird nach Duplikaten erhöht
     erfolgreicher_code = ""  # Speichert den erfolgreichen Code
     
-    for versuch_nr in range(1, MAX_VERSUCHE + 1):
+    # Bekannte Problemstruktur: Versuch 0 mit Modellvorlage, Generierung nur falls nötig
+    if VORLAGEN_NUTZEN and erste_antwort is None:
+        vorlage_versuch, statistiken['vorlage'] = loese_mit_vorlage(problem, lauf_id)
+        if vorlage_versuch is not None:
+            statistiken['versuche'].append(vorlage_versuch)
+            statistiken['erfolg'] = True
+            gesamt_gpt_zeit += vorlage_versuch['gpt_zeit']
+            erfolgreicher_code = vorlage_versuch['code']
+            print("✅ ERFOLGREICH (Modellvorlage)!")
+            print(f"\n📊 ERGEBNIS:")
+            print(vorlage_versuch['ausgabe'])
+            melde('ergebnis', versuch_nr=0, erfolg=True, fehler_kategorie=None)
+    
+    for versuch_nr in range(1, max_versuche + 1):
+        if statistiken['erfolg']:
+            break  # bereits mit Modellvorlage gelöst
+        if abbruch is not None and abbruch.is_set():
+            print(f"⏹️  Lauf abgebrochen")
+            statistiken['abgebrochen'] = True
+            break
+        
         print(f"\n--- VERSUCH {versuch_nr} ---")
+        melde('versuch', versuch_nr=versuch_nr)
         
         # Intelligente Reprompting-Entscheidung
         if versuch_nr > 1:
-            soll_reprompt, grund = soll_reprompting_erfolgen(letzter_fehler, versuch_nr, MAX_VERSUCHE)
+            soll_reprompt, grund = soll_reprompting_erfolgen(letzter_fehler, versuch_nr, max_versuche, temperatur, fehlversuch_nr=versuch_nr - 1,
+                                                             modell=statistiken['versuche'][-1].get('modell') if statistiken['versuche'] else None)
             if not soll_reprompt:
                 print(f"🚫 KI-Entscheidung: {grund}")
                 print(f"⏹️  Stoppe weitere Versuche - Reprompting nicht erfolgversprechend")
@@ -663,38 +940,103 @@ def main():
 
         # GPT-Prompt erstellen
         if versuch_nr == 1:
-            prompt = erstelle_gpt_prompt(user_problem)
+            prompt = erstelle_gpt_prompt(problem)
             print(f"🤖 Erstelle Standard-Prompt für ersten Versuch")
+        elif offene_sitzung is not None:
+            prompt = modell_reparatur_prompt(letzter_fehler, problem, letzter_code)
+            reprompts += 1
+            print(f"🩹 Nur das AMPL-Modell ist fehlerhaft - fordere korrigiertes Modell an (Sitzung von Versuch {versuch_nr-1} bleibt offen)")
         else:
-            prompt = erstelle_intelligenten_reprompt(letzter_fehler, user_problem, letzter_code, versuch_nr)
+            prompt = erstelle_intelligenten_reprompt(letzter_fehler, problem, letzter_code, versuch_nr, letzte_iis, letztes_duplikat, letztes_profil)
             reprompts += 1
             print(f"🧠 KI erstellt intelligenten Reprompt basierend auf Fehleranalyse von Versuch {versuch_nr-1}")
             print(f"🔄 Automatisches Reprompting aktiviert - Versuch {versuch_nr}")
         
-        # GPT anfragen
-        print("🤖 Frage GPT...")
-        gpt_result = gpt_anfrage(prompt)
+        # GPT anfragen - erster Versuch ggf. bereits per Batch beantwortet
+        anfrage_modell = MODELL
+        modell_wahl = None
+        if versuch_nr == 1 and erste_antwort is not None:
+            print("📦 Antwort aus Batch übernommen")
+            gpt_result = erste_antwort
+        else:
+            # Kaskade: einfache Aufgaben beginnen mit dem günstigen Modell, Fehlversuche eskalieren
+            if KASKADE:
+                anfrage_modell, routing, modell_wahl = waehle_modell(problem, versuch_nr, MODELL, GUENSTIGES_MODELL)
+                print(f"🪜 Kaskade: {anfrage_modell} - {routing}")
+            print("🤖 Frage GPT...")
+            gpt_result = gpt_anfrage(prompt, anfrage_temperatur, anfrage_modell)
+        
+        if gpt_result['wiederholungen']:
+            print(f"⏳ API-Wiederholungen: {gpt_result['wiederholungen']} (Wartezeit {gpt_result['wartezeit']:.1f}s)")
         
         if not gpt_result['erfolg']:
+            # Kein Modellfehler: Versuch nicht verbrauchen, sondern Lauf mit API-Fehler beenden
             print(f"❌ GPT-Fehler: {gpt_result['fehler']}")
-            continue
+            statistiken['api_fehler'].append({
+                'versuch_nr': versuch_nr,
+                'fehler': gpt_result['fehler'],
+                'status_code': gpt_result['status_code'],
+                'wiederholungen': gpt_result['wiederholungen'],
+                'wartezeit': gpt_result['wartezeit']
+            })
+            print(f"⏹️  Stoppe Lauf - API nach {gpt_result['wiederholungen']} Wiederholungen nicht erreichbar")
+            break
         
         gpt_zeit = gpt_result['zeit']
         gesamt_gpt_zeit += gpt_zeit
         print(f"⏱️ GPT-Zeit: {gpt_zeit:.1f}s")
+        melde('antwort', versuch_nr=versuch_nr, gpt_zeit=gpt_zeit)
+        print(f"🗄️  Tokens: {gpt_result['tokens']['eingabe_tokens']} ein ({gpt_result['tokens']['cache_gelesen']} aus Cache), {gpt_result['tokens']['ausgabe_tokens']} aus")
         
         # Code reparieren
         code = gpt_result['antwort']
+        reparatur_modell = None
+        if offene_sitzung is not None:
+            # Korrigiertes Modell in den bisherigen Code einsetzen - der Code bleibt als Nachweis vollständig
+            reparatur_modell = modell_aus_antwort(code)
+            neuer_code = setze_modell_ein(letzter_code, reparatur_modell) if reparatur_modell else None
+            if neuer_code is not None:
+                code = neuer_code
+            else:
+                print("⚠️  Kein einsetzbares Modell in der Antwort - Sitzung beendet, Antwort wird als Code ausgeführt")
+                offene_sitzung.beende()
+                offene_sitzung = None
+                reparatur_modell = None
         code, reparaturen = repariere_code(code)
         
         if reparaturen:
             print(f"🔧 Reparaturen: {', '.join(reparaturen)}")
         
-        # Code ausführen
-        temp_file = f"temp_versuch_{versuch_nr}.py"
-        print(f"🔄 Führe Code aus: {temp_file}")
-        
-        exec_result = fuehre_code_aus(code)
+        # Duplikat eines früheren Kandidaten? Dann Ergebnis übernehmen statt erneut ausführen
+        fingerabdruck = kandidaten_fingerabdruck(code)
+        duplikat_von = None
+        gleiches_modell_wie = None
+        sitzung = None
+        if fingerabdruck['code'] in bekannte_kandidaten:
+            duplikat_von, exec_result = bekannte_kandidaten[fingerabdruck['code']]
+            versuchsverzeichnis = None
+            print(f"♻️  Code identisch mit Versuch {duplikat_von} - Ausführung übersprungen, Ergebnis übernommen")
+            if offene_sitzung is not None:
+                offene_sitzung.beende()
+        else:
+            gleiches_modell_wie = bekannte_modelle.get(fingerabdruck['modell'])
+            if gleiches_modell_wie:
+                print(f"♻️  AMPL-Modell unverändert gegenüber Versuch {gleiches_modell_wie}")
+            
+            # Code ausführen - jeder Versuch in eigenem Arbeitsverzeichnis
+            versuchsverzeichnis = erstelle_versuchsverzeichnis(lauf_id, versuch_nr)
+            print(f"🔄 Führe Code aus: {versuchsverzeichnis}")
+            
+            if reparatur_modell is not None:
+                print(f"🩹 Löse korrigiertes Modell in der offenen AMPL-Sitzung")
+                exec_result = fuehre_code_aus(code, versuchsverzeichnis, offene_sitzung, reparatur_modell)
+            else:
+                exec_result = fuehre_code_aus(code, versuchsverzeichnis)
+            sitzung = exec_result.pop('sitzung', None)
+            bekannte_kandidaten[fingerabdruck['code']] = (versuch_nr, exec_result)
+            if fingerabdruck['modell']:
+                bekannte_modelle.setdefault(fingerabdruck['modell'], versuch_nr)
+        offene_sitzung = None
         
         # Detaillierte Fehleranalyse für Dokumentation
         fehler_analyse = None
@@ -709,15 +1051,116 @@ def main():
         # Versuch dokumentieren
         versuch_info = {
             'versuch_nr': versuch_nr,
+            'modell': anfrage_modell,
+            'modell_wahl': modell_wahl,
             'gpt_zeit': gpt_zeit,
+            'temperatur': anfrage_temperatur,
+            'api_wiederholungen': gpt_result['wiederholungen'],
+            'api_wartezeit': gpt_result['wartezeit'],
+            'tokens': gpt_result['tokens'],
+            'cache_praefix_tokens': cache_praefix_tokens(prompt),
             'code': code,
             'reparaturen': reparaturen,
             'erfolg': exec_result['erfolg'],
             'ausgabe': exec_result['ausgabe'],
             'fehler': exec_result['fehler'],
-            'fehler_analyse': fehler_analyse
+            'fehler_auszug': verdichte_fehler(exec_result['fehler']) if not exec_result['erfolg'] else None,
+            'fehler_analyse': fehler_analyse,
+            'solves': exec_result['sonde']['solves'],
+            'artefakte': exec_result['artefakte'],
+            'ressourcen': exec_result['ressourcen'],
+            'fingerabdruck': fingerabdruck,
+            'duplikat_von': duplikat_von,
+            'gleiches_modell_wie': gleiches_modell_wie,
+            'profil': exec_result['sonde'].get('profil'),
+            'modell_reparatur': reparatur_modell is not None
         }
         statistiken['versuche'].append(versuch_info)
+        melde('ergebnis', versuch_nr=versuch_nr, erfolg=exec_result['erfolg'],
+              fehler_kategorie=fehler_analyse['fehler_kategorie'] if fehler_analyse else None)
+        
+        # Arbeitsverzeichnis gemäß Aufbewahrungsregel entfernen (Artefakte sind bereits gesichert)
+        if versuchsverzeichnis is not None and not raeume_auf(versuchsverzeichnis, exec_result['erfolg']):
+            versuch_info['arbeitsverzeichnis'] = versuchsverzeichnis
+        else:
+            versuch_info['arbeitsverzeichnis'] = None
+        
+        # Wiederholung: nächste Anfrage mit höherer Temperatur und anderer Prompt-Variante
+        letztes_duplikat = (duplikat_von or gleiches_modell_wie) if not exec_result['erfolg'] else None
+        if letztes_duplikat:
+            anfrage_temperatur = diversifizierte_temperatur(anfrage_temperatur)
+            print(f"🎲 Diversifizierung: nächste Anfrage mit Temperatur {anfrage_temperatur}")
+        
+        # Online-Update der Reprompt-Statistik: konnte der Fehler des Vorversuchs behoben werden?
+        if len(statistiken['versuche']) > 1 and statistiken['versuche'][-2]['fehler_analyse']:
+            vorversuch = statistiken['versuche'][-2]
+            historie_aktualisieren(
+                vorversuch['fehler_analyse']['fehler_kategorie'],
+                vorversuch.get('modell') or MODELL,
+                temperatur,
+                vorversuch['versuch_nr'],
+                exec_result['erfolg']
+            )
+        
+        ressourcen = exec_result['ressourcen']
+        if reparatur_modell is not None and 'sitzung_zeit' in ressourcen:
+            modus = 'auf Sitzungsdaten geprüft, dann Code in der Sitzung' if ressourcen['sitzung_modus'] == 'daten_behalten' else 'Code erneut in der Sitzung'
+            print(f"⚡ Modellkorrektur in der Sitzung: {ressourcen['sitzung_zeit'] * 1000:.0f} ms ({modus})")
+        if 'max_rss_mb' in ressourcen:
+            print(f"🧮 Ressourcen: max. {ressourcen['max_rss_mb']:.0f} MB, CPU {ressourcen['cpu_user'] + ressourcen['cpu_system']:.1f}s")
+        for strom, info in ressourcen.get('ausgabe', {}).items():
+            if info['gekuerzt']:
+                print(f"✂️  {strom} gekürzt ({info['zeichen']} Zeichen) - vollständig: {exec_result['artefakte'][info['datei']]['pfad']}")
+        
+        # Modellgröße und Warnungen vor Aufblähung
+        for solve in exec_result['sonde']['solves']:
+            analyse = solve.get('modellanalyse')
+            if analyse and 'fehler' not in analyse:
+                print(f"📐 Modell: {analyse['variablen']} Variablen ({analyse['ganzzahlig']} ganzzahlig, {analyse['binaer']} binär), "
+                      f"{analyse['nebenbedingungen']} Nebenbedingungen, {analyse['nichtnullen']} Nichtnullen ({analyse['modelltyp']})")
+                for warnung in analyse['warnungen']:
+                    print(f"⚠️  Aufblähung: {warnung}")
+        
+        # IIS-Diagnose für den nächsten Reprompt merken
+        letzte_iis = letzte_diagnose(exec_result['sonde']['solves'])
+        if letzte_iis:
+            print(f"🧩 Unzulässigkeit verursacht durch: {', '.join(letzte_iis['nebenbedingungen']) or 'Variablenschranken'} "
+                  f"({len(letzte_iis['instanzen'])} Instanzen, {letzte_iis['zeit']:.1f}s)")
+        
+        # Laufzeitprofil: wo der generierte Code seine Zeit verbringt
+        profil = exec_result['sonde'].get('profil')
+        zeitlimit_erreicht = exec_result.get('timeout') or exec_result['ressourcen'].get('signal') == 'SIGXCPU'
+        letztes_profil = profil if PROFIL_IM_REPROMPT and zeitlimit_erreicht else None
+        if profil and profil['proben']:
+            print(f"⏱️  Profil ({profil['gesamt_zeit']:.1f}s): " + ", ".join(
+                f"{PHASEN_NAMEN[phase]} {werte['anteil'] * 100:.0f}%" for phase, werte in profil['phasen'].items()))
+            for zeile in profil['langsamste_zeilen'][:3]:
+                print(f"   Zeile {zeile['zeile']} ({zeile['anteil'] * 100:.0f}%): {zeile['code'][:80]}")
+        
+        # Solver-Kennzahlen: langsames Modellieren vs. langsames Lösen
+        for solve in exec_result['sonde']['solves']:
+            metriken = solve.get('solver_metriken')
+            if metriken and metriken['zeit_gesamt'] is not None:
+                print(f"🔎 {metriken['solver']}: {metriken['status']}, {metriken['lp_iterationen']} LP-Iterationen, "
+                      f"{metriken['knoten']} Knoten, Gap {metriken['gap']}% - Solver {metriken['zeit_gesamt']:.2f}s, "
+                      f"Modellaufbau {solve['modellierung_zeit']:.2f}s")
+        
+        # Solver-Portfolio: Wettlauf je Solve, die Lösung des Gewinners ist die des Versuchs
+        for solve in exec_result['sonde']['solves']:
+            portfolio = solve.get('portfolio')
+            if portfolio and portfolio.get('ergebnisse'):
+                zeiten = ", ".join(f"{e['name']} {e['solve_result']} {e['zeit_bis_ergebnis']:.2f}s" for e in portfolio['ergebnisse'])
+                abgebrochen = f" - abgebrochen: {', '.join(portfolio['abgebrochen'])}" if portfolio['abgebrochen'] else ""
+                rueckfall = 'ohne Ergebnis, keine Zeit mehr für einen Solve' if portfolio.get('rueckfall') == 'uebersprungen' \
+                    else 'ohne Ergebnis, normaler Solve mit Restzeit'
+                print(f"🏁 Portfolio: {portfolio['uebernommen'] or rueckfall} ({zeiten}){abgebrochen}")
+            elif portfolio:
+                print(f"⚠️  Portfolio nicht möglich ({portfolio.get('fehler')}) - normaler Solve")
+        
+        # Warmstart-Ersparnis gegenüber dem letzten Kaltstart desselben Modells
+        for solve in exec_result['sonde']['solves']:
+            if solve['warmstart'].get('ersparnis') is not None:
+                print(f"🔥 Warmstart: {solve['solver_zeit']:.2f}s statt {solve['warmstart']['kalt_zeit']:.2f}s (Ersparnis {solve['warmstart']['ersparnis']:.2f}s)")
         
         if exec_result['erfolg']:
             print("✅ ERFOLGREICH!")
@@ -743,14 +1186,21 @@ def main():
             print(f"📋 Ursache: {fehler_bericht['ursache_analyse']}")
             print(f"🔧 Lösungsstrategie: {fehler_bericht['loesungsstrategie']}")
             
+            # Nur das Modell fehlerhaft: Sitzung für die Korrektur im nächsten Versuch offen halten
+            if sitzung is not None and versuch_nr < max_versuche and ist_modellfehler(fehler_bericht['fehler_kategorie'], code):
+                offene_sitzung = sitzung
+            elif sitzung is not None:
+                sitzung.beende()
+            
             # Detaillierte Fehleranalyse in versuch_info ist bereits gespeichert
             
             letzter_fehler = exec_result['fehler']
             letzter_code = code
             
             # Intelligente Reprompting-Entscheidung
-            if versuch_nr < MAX_VERSUCHE:
-                soll_reprompt, grund = soll_reprompting_erfolgen(exec_result['fehler'], versuch_nr, MAX_VERSUCHE)
+            if versuch_nr < max_versuche:
+                soll_reprompt, grund = soll_reprompting_erfolgen(exec_result['fehler'], versuch_nr, max_versuche, temperatur, modell=anfrage_modell)
+                versuch_info['reprompt_entscheidung'] = grund
                 if soll_reprompt:
                     print(f"🧠 Intelligente Analyse: {grund}")
                     print(f"🔄 KI bereitet automatischen Reprompt für Versuch {versuch_nr + 1} vor...")
@@ -758,6 +1208,15 @@ def main():
                     print(f"⚠️  Analyse: {grund}")
                     print(f"⏭️  Überspringe verbleibende Versuche - Reprompting nicht sinnvoll")
     
+    # Nicht mehr benötigte Reparatursitzung (Abbruch, API-Fehler, kein Reprompt)
+    if offene_sitzung is not None:
+        offene_sitzung.beende()
+    
+    # Modell des letzten beantworteten Versuchs (mit Kaskade nicht immer MODELL); alle Modelle unter 'modelle'
+    modell_versuche = [v for v in statistiken['versuche'] if v.get('modell')]
+    if modell_versuche:
+        statistiken['model'] = modell_versuche[-1]['modell']
+    
     # Finale Statistiken
     print("\n" + "=" * 70)
     print("📈 FINALE STATISTIKEN")
@@ -765,40 +1224,55 @@ def main():
     print(f"Gesamte Versuche: {len(statistiken['versuche'])}")
     print(f"Reprompts: {reprompts}")
     print(f"Gesamte GPT-Zeit: {gesamt_gpt_zeit:.1f}s")
+    token_summe = summiere_token_metriken(statistiken['versuche'])
+    print(f"Prompt-Cache-Trefferquote: {token_summe['cache_trefferquote'] * 100:.1f}% ({token_summe['cache_gelesen']} von {token_summe['eingabe_tokens']} Eingabe-Tokens)")
+    praefix = max((v.get('cache_praefix_tokens', 0) for v in statistiken['versuche']), default=0)
+    if len(statistiken['versuche']) > 1 and not token_summe['cache_gelesen'] and praefix < CACHE_MIN_TOKENS:
+        print(f"ℹ️  Kein Cache-Treffer: gemeinsamer Präfix ca. {praefix} Tokens, Provider cachen erst ab {CACHE_MIN_TOKENS}")
     
     if statistiken['erfolg']:
         print("Status: ✅ PROBLEM GELÖST")
         
         # Dateien speichern
         print(f"\n📁 Speichere Nachweis-Dateien...")
-        timestamp_save = speichere_finale_dateien(erfolgreicher_code)
+        finale_datei = speichere_finale_dateien(erfolgreicher_code, temperatur)
+        artefakte = statistiken['versuche'][-1]['artefakte']
+        
+        # Verifiziertes Modell als Vorlage für gleich aufgebaute Aufgaben ablegen
+        if VORLAGEN_NUTZEN:
+            if (statistiken.get('vorlage') or {}).get('erfolg'):
+                vermerke_wiederverwendung(problem)
+            elif speichere_vorlage(problem, artefakte, MODELL):
+                print(f"🧬 Modellvorlage für diese Problemstruktur verfügbar ({VORLAGEN_DATEI})")
         
         # Temperature-String für Dateinamen (z.B. "T06" für 0.6)
-        temp_str = f"T{str(TEMPERATURE).replace('.', '')}"
+        temp_str = f"T{str(temperatur).replace('.', '')}"
         api_name = "CLAUDE"  # API-Bezeichner für Claude
         
-        # Modell und Daten-Dateien suchen und umbenennen
-        if os.path.exists('model.mod'):
-            new_model = f"model_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.mod"
-            os.rename('model.mod', new_model)
-            print(f"📁 Datei gespeichert: {new_model}")
-        
-        if os.path.exists('data.dat'):
-            new_data = f"data_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.dat"
-            os.rename('data.dat', new_data)
-            print(f"📁 Datei gespeichert: {new_data}")
+        # Modell und Daten des erfolgreichen Versuchs übernehmen (Name enthält den Inhalts-Hash)
+        nachweis_dateien = {}
+        for name, praefix in [('model.mod', 'model'), ('data.dat', 'data')]:
+            if name in artefakte:
+                ziel = f"{praefix}_{api_name}_{temp_str}_{artefakte[name]['hash'][:12]}{os.path.splitext(name)[1]}"
+                shutil.copyfile(artefakte[name]['pfad'], ziel)
+                nachweis_dateien[name] = ziel
+                print(f"📁 Datei gespeichert: {ziel}")
+        statistiken['nachweis_dateien'] = dict(nachweis_dateien, code=finale_datei)
         
         print(f"\n🎓 NACHWEIS FÜR PROFESSOR:")
-        print(f"- Python-Code: finale_loesung_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.py")
-        if os.path.exists(f"model_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.mod"):
-            print(f"- model_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.mod")
-        if os.path.exists(f"data_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.dat"):
-            print(f"- data_{api_name}_{temp_str}_{timestamp_save.replace(':', '').replace('-', '').replace('.', '')[:14]}.dat")
+        print(f"- Python-Code: {finale_datei}")
+        for datei in nachweis_dateien.values():
+            print(f"- {datei}")
+        if len(nachweis_dateien) == 2:
+            print(f"\n🧪 What-if-Szenarien ohne neue KI-Anfrage:")
+            print(f"   python MA_Jensen_Szenarien.py {nachweis_dateien['model.mod']} {nachweis_dateien['data.dat']} szenarien.json")
     else:
         print("Status: ❌ PROBLEM NICHT GELÖST")
         if statistiken['versuche']:
             letzter_versuch = statistiken['versuche'][-1]
             print(f"Letzter Fehler: {letzter_versuch['fehler']}")
+        if statistiken['api_fehler']:
+            print(f"Abbruch durch API-Fehler: {statistiken['api_fehler'][-1]['fehler']}")
     
     # Erweiterte Statistiken mit Fehleranalyse
     fehler_typen = {}
@@ -812,15 +1286,31 @@ def main():
         'reprompts': reprompts,
         'gesamt_gpt_zeit': gesamt_gpt_zeit,
         'fehler_typen': fehler_typen,
+        'api_fehler': len(statistiken['api_fehler']),
+        'api_wiederholungen': sum(v['api_wiederholungen'] for v in statistiken['versuche']),
+        'api_wartezeit': sum(v['api_wartezeit'] for v in statistiken['versuche']),
+        'tokens': summiere_token_metriken(statistiken['versuche']),
+        'warmstart_solves': sum(1 for v in statistiken['versuche'] for s in v['solves'] if s['warmstart'].get('warmstart')),
+        'warmstart_ersparnis': sum(s['warmstart'].get('ersparnis') or 0 for v in statistiken['versuche'] for s in v['solves']),
+        'solver_kennzahlen': summiere_solver_metriken(statistiken['versuche']),
+        'duplikate': sum(1 for v in statistiken['versuche'] if v['duplikat_von']),
+        'modell_reparaturen': sum(1 for v in statistiken['versuche'] if v.get('modell_reparatur')),
+        'modelle': zaehle_modelle(statistiken['versuche']),
+        'vorlage_genutzt': bool((statistiken.get('vorlage') or {}).get('erfolg')),
+        'modellanalyse': letzte_modellanalyse(statistiken['versuche']),
+        'ressourcen_limits': RESSOURCEN_LIMITS,
+        'max_rss_mb': max((v['ressourcen'].get('max_rss_mb', 0) for v in statistiken['versuche']), default=0),
+        'cpu_zeit': sum(v['ressourcen'].get('cpu_user', 0) + v['ressourcen'].get('cpu_system', 0) for v in statistiken['versuche']),
         'lerneffekt': 'Intelligentes Reprompting aktiviert' if reprompts > 0 else 'Erfolg beim ersten Versuch'
     }
     
     api_name = "CLAUDE"  # API-Bezeichner für Claude
-    bericht_datei = f"bericht_{api_name}_T{str(TEMPERATURE).replace('.', '')}_{timestamp.replace(':', '').replace('-', '').replace('.', '')[:14]}.json"
+    bericht_datei = f"bericht_{api_name}_T{str(temperatur).replace('.', '')}_{lauf_id}.json"
     with open(bericht_datei, 'w', encoding='utf-8') as f:
         json.dump(statistiken, f, indent=2, ensure_ascii=False)
     
     print(f"📊 Detaillierter Bericht: {bericht_datei}")
+    statistiken['bericht_datei'] = bericht_datei
     
     # Umfassende Fehlerberichterstattung
     if len([v for v in statistiken['versuche'] if not v['erfolg']]) > 0:
@@ -837,6 +1327,27 @@ def main():
         print(f"   - Lerneffekt: Fehler-spezifische Korrekturen implementiert")
     
     print("=" * 70)
+    
+    melde('fertig', erfolg=statistiken['erfolg'], bericht_datei=bericht_datei)
+    return statistiken
+
+def main():
+    """
+    Hauptfunktion - Universelles Optimierungssystem
+    """
+    # AMPL-Module einmal pro Umgebung installieren, danach nur laden
+    try:
+        if installiere_module_einmalig() == 'installiert':
+            print("✅ AMPL Module installiert")
+        else:
+            print("✅ AMPL Module geladen (bereits installiert)")
+    except Exception:
+        print("⚠️ AMPL Module bereits vorhanden")
+    print("=" * 70)
+    print(" MASTERARBEIT - UNIVERSELLES OPTIMIERUNGSSYSTEM")
+    print("=" * 70)
+    
+    loese_problem(user_problem)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - UNZULÄSSIGKEITSDIAGNOSE
+Irreduzible unzulässige Teilmenge (IIS) per Deletion-Filter auf dem geladenen AMPL-Modell,
+damit der Reprompt die konkreten widersprüchlichen Nebenbedingungen samt Daten nennt
+"""
+
+import time
+
+# ===== KONFIGURATION =====
+IIS_ZEITLIMIT = 30          # Sekunden für alle Diagnose-Solves zusammen (jeder Solve erhält die Restzeit als Solver-Limit)
+IIS_MAX_INSTANZEN = 200     # Instanz-Filter nur bis zu dieser Zahl verbleibender Instanzen
+IIS_MAX_AUSGABE = 15        # höchstens so viele expandierte Nebenbedingungen im Prompt
+IIS_MAX_ZEICHEN = 400       # je expandierter Nebenbedingung
+
+
+def _ist_unzulaessig(ampl, frist=None):
+    """
+    Diagnose-Solve, mit frist als Solver-Zeitlimit; Rückgabe: None, wenn der Solve nichts entschied
+    """
+    from MA_Jensen_Solver import setze_zeitlimit
+
+    zuruecksetzen = setze_zeitlimit(ampl, None, frist - time.time()) if frist is not None else None
+    try:
+        # getOutput statt ampl.solve(): keine Ausgabe im generierten Programm, keine Sonden-Messung
+        ampl.getOutput('solve;')
+    finally:
+        if zuruecksetzen is not None:
+            ampl.setOption(*zuruecksetzen)
+    solve_result = ampl.getValue('solve_result')
+    if solve_result == 'infeasible':
+        return True
+    return False if solve_result == 'solved' else None
+
+
+def _filtere(ampl, kandidaten, frist):
+    """
+    Deletion-Filter: jeden Kandidaten entfernen; bleibt das Modell unzulässig, ist er verzichtbar
+    """
+    noetig = []
+    for position, name in enumerate(kandidaten):
+        if time.time() > frist:
+            # Rest ungeprüft behalten - Ergebnis ist dann nicht minimal
+            return noetig + kandidaten[position:], False
+        ampl.eval(f"drop {name};")
+        unzulaessig = _ist_unzulaessig(ampl, frist)
+        if unzulaessig:
+            continue
+        ampl.eval(f"restore {name};")
+        noetig.append(name)
+        if unzulaessig is None:
+            # Solver-Zeitlimit erreicht: Kandidat und Rest ungeprüft behalten
+            return noetig + kandidaten[position + 1:], False
+    return noetig, True
+
+
+def diagnostiziere_unzulaessigkeit(ampl, zeitlimit=None):
+    """
+    Sucht die Nebenbedingungen, die gemeinsam die Unzulässigkeit verursachen
+
+    Erst auf Ebene der Deklarationen, danach - falls wenige - auf Ebene einzelner Instanzen.
+    Danach ist der ursprüngliche Zustand wiederhergestellt (alle Nebenbedingungen aktiv,
+    solve_result wieder 'infeasible'). zeitlimit begrenzt die Diagnose-Solves; der abschließende
+    Solve des vollständigen Modells läuft ohne Limit und ist darin nicht enthalten.
+    """
+    frist = time.time() + (zeitlimit or IIS_ZEITLIMIT)
+    start = time.time()
+    entitaeten = [name for name, _ in ampl.getConstraints()]
+    diagnose = {
+        'nebenbedingungen': [],
+        'instanzen': [],
+        'instanzen_gesamt': 0,
+        'instanzen_eingegrenzt': False,   # Instanz-Filter gelaufen: instanzen sind IIS-Mitglieder
+        'expandiert': [],
+        'minimal': False,
+        'nur_schranken': False,
+        'zeit': 0.0
+    }
+    try:
+        noetig, minimal = _filtere(ampl, entitaeten, frist)
+        diagnose['nebenbedingungen'] = noetig
+        diagnose['minimal'] = minimal
+        # Unzulässig ohne jede Nebenbedingung: Variablenschranken oder Ganzzahligkeit widersprechen sich
+        diagnose['nur_schranken'] = minimal and not noetig
+
+        instanzen = []
+        for name in noetig:
+            instanzen.extend(instanz.name() for _, instanz in ampl.getConstraint(name).instances())
+        if minimal and instanzen and len(instanzen) <= IIS_MAX_INSTANZEN:
+            instanzen, minimal = _filtere(ampl, instanzen, frist)
+            diagnose['minimal'] = minimal
+            diagnose['instanzen_eingegrenzt'] = True
+        diagnose['instanzen_gesamt'] = len(instanzen)
+        diagnose['instanzen'] = instanzen[:IIS_MAX_INSTANZEN]
+
+        # Nur eingegrenzte Instanzen mit eingesetzten Daten - sonst wären es beliebige erste Instanzen
+        for name in (instanzen if diagnose['instanzen_eingegrenzt'] else [])[:IIS_MAX_AUSGABE]:
+            try:
+                text = ampl.getOutput(f"expand {name};").strip()
+            except Exception:
+                continue
+            diagnose['expandiert'].append(text[:IIS_MAX_ZEICHEN])
+    finally:
+        for name in entitaeten:
+            ampl.eval(f"restore {name};")
+        _ist_unzulaessig(ampl)
+        diagnose['zeit'] = time.time() - start
+    return diagnose
+
+
+def formatiere_diagnose(diagnose):
+    """
+    Diagnose als Prompt-Block
+    """
+    if diagnose.get('nur_schranken'):
+        return """
+UNZULÄSSIGKEITS-DIAGNOSE (vom System berechnet):
+Das Modell ist bereits ohne jede Nebenbedingung unzulässig.
+Ursache sind widersprüchliche Variablenschranken (z.B. >= größer als <=) oder Ganzzahligkeit.
+"""
+    if not diagnose.get('nebenbedingungen'):
+        return ""
+
+    umfang = "irreduzible Menge" if diagnose['minimal'] else "nicht minimal, Zeitlimit erreicht"
+    block = f"""
+UNZULÄSSIGKEITS-DIAGNOSE (vom System berechnet, {umfang}):
+Diese Nebenbedingungen sind gemeinsam nicht erfüllbar: {', '.join(diagnose['nebenbedingungen'])}
+"""
+    gesamt = diagnose.get('instanzen_gesamt', len(diagnose['instanzen']))
+    if diagnose['expandiert']:
+        block += "Konkrete Instanzen mit eingesetzten Daten:\n"
+        block += "\n".join(diagnose['expandiert']) + "\n"
+        if gesamt > len(diagnose['expandiert']):
+            block += f"... Liste abgeschnitten, {gesamt - len(diagnose['expandiert'])} weitere Instanzen\n"
+    elif gesamt:
+        # Zu viele Instanzen für den Instanz-Filter: welche davon widersprüchlich sind, ist offen
+        block += f"Die {gesamt} Instanzen dieser Nebenbedingungen wurden nicht weiter eingegrenzt.\n"
+    block += "Korrigiere genau diese Nebenbedingungen oder die zugehörigen Daten - nicht das übrige Modell.\n"
+    return block
+
+
+def letzte_diagnose(solves):
+    """
+    Diagnose des letzten unzulässigen Solves eines Versuchs
+    """
+    for solve in reversed(solves):
+        if solve.get('iis') and 'fehler' not in solve['iis']:
+            return solve['iis']
+    return None
@@ -0,0 +1,326 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - OPTIMIERUNGSDIENST
+Lokaler HTTP-Dienst: nimmt Aufgaben entgegen, priorisiert sie und führt die Versuchsschleife
+mit warmen API-Clients und vorgestarteten AMPL-Sonden aus
+
+Aufruf:
+    python MA_Jensen_Dienst.py [port]
+
+Schnittstelle (JSON):
+    POST   /jobs                  {"problem": "...", "provider": "claude"|"gpt", "temperatur": 0.1,
+                                   "prioritaet": 0, "max_versuche": 3}  -> 202 {"job_id": ...}
+                                  volle Warteschlange -> 503 mit Retry-After
+    GET    /jobs                  Übersicht aller Jobs
+    GET    /jobs/<id>             Status, Ereignisse und Ergebnis
+    GET    /jobs/<id>/ereignisse  Ereignisse als JSON-Zeilen (Stream bis zum Ende des Jobs)
+    DELETE /jobs/<id>             Abbruch (wartend: sofort, laufend: vor dem nächsten Versuch -
+                                  der laufende Versuch wird zu Ende geführt)
+Beendete Jobs bleiben JOBS_AUFBEWAHRUNG Sekunden abrufbar (höchstens JOBS_BEENDET_MAX).
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import importlib
+import threading
+import queue
+import time
+import uuid
+import json
+import sys
+
+from MA_Jensen_Ausfuehrung import beende_warme_prozesse
+from MA_Jensen_Start import installiere_module_einmalig
+
+# ===== KONFIGURATION =====
+HOST = '127.0.0.1'
+PORT = 8765
+WORKER = 2                  # parallel bearbeitete Jobs
+WARTESCHLANGE_MAX = 50      # darüber werden neue Jobs mit 503 abgelehnt
+RETRY_AFTER = 30            # Sekunden, Hinweis an Clients bei voller Warteschlange
+STANDARD_PRIORITAET = 5     # kleinere Zahl = früher bearbeitet
+PROVIDER_MODULE = {
+    'claude': 'MA_Jensen_Claude',
+    'gpt': 'MA_Jensen_GPT'
+}
+ENDZUSTAENDE = {'fertig', 'fehler', 'abgebrochen'}
+JOBS_AUFBEWAHRUNG = 3600    # Sekunden, die ein beendeter Job abrufbar bleibt
+JOBS_BEENDET_MAX = 500      # darüber werden die ältesten beendeten Jobs vergessen
+
+_jobs = {}
+_bedingung = threading.Condition()
+_warteschlange = queue.PriorityQueue(maxsize=WARTESCHLANGE_MAX)
+_reihenfolge = iter(range(sys.maxsize))
+
+
+def lade_provider(provider):
+    """
+    Importiert das Provider-Skript einmal; dessen Client bleibt danach für alle Jobs warm
+    """
+    modul = importlib.import_module(PROVIDER_MODULE[provider])
+    modul.WARME_AUSFUEHRUNG = True
+    return modul
+
+
+def _ereignis(job, typ, daten):
+    with _bedingung:
+        job['ereignisse'].append({'typ': typ, 'zeit': time.time(), **daten})
+        _bedingung.notify_all()
+
+
+def _setze_status(job, status, **felder):
+    with _bedingung:
+        job['status'] = status
+        job.update(felder)
+        job['ereignisse'].append({'typ': 'status', 'zeit': time.time(), 'status': status})
+        _bedingung.notify_all()
+
+
+def _zusammenfassung(statistiken):
+    """
+    Kurzfassung der Statistiken eines Laufs für die Job-Antwort
+    """
+    return {
+        'erfolg': statistiken['erfolg'],
+        'lauf_id': statistiken['lauf_id'],
+        'anzahl_versuche': len(statistiken['versuche']),
+        'fehler_typen': statistiken.get('statistiken', {}).get('fehler_typen', {}),
+        'bericht_datei': statistiken.get('bericht_datei'),
+        'nachweis_dateien': statistiken.get('nachweis_dateien'),
+        'api_fehler': statistiken.get('api_fehler', [])
+    }
+
+
+def _worker():
+    """
+    Bearbeitet Jobs aus der Warteschlange nacheinander
+    """
+    while True:
+        _, _, job_id = _warteschlange.get()
+        job = _jobs.get(job_id)
+        try:
+            if job is None or job['status'] != 'wartend':
+                # Abgebrochen, während der Job noch wartete
+                continue
+            _setze_status(job, 'laeuft', gestartet=time.time())
+            try:
+                modul = lade_provider(job['provider'])
+                statistiken = modul.loese_problem(
+                    job['problem'],
+                    temperatur=job['temperatur'],
+                    max_versuche=job['max_versuche'],
+                    ereignis=lambda typ, daten: _ereignis(job, typ, daten),
+                    abbruch=job['abbruch']
+                )
+                _setze_status(job, 'abgebrochen' if statistiken.get('abgebrochen') else 'fertig',
+                              ergebnis=_zusammenfassung(statistiken), beendet=time.time())
+            except Exception as e:
+                _setze_status(job, 'fehler', fehler=str(e), beendet=time.time())
+        finally:
+            _warteschlange.task_done()
+
+
+def reiche_ein(anfrage):
+    """
+    Legt einen Job an und reiht ihn ein - Rückgabe: Job oder None bei voller Warteschlange
+    """
+    if not isinstance(anfrage, dict):
+        raise ValueError("Anfrage muss ein JSON-Objekt sein")
+    provider = anfrage.get('provider', 'claude')
+    if provider not in PROVIDER_MODULE:
+        raise ValueError(f"Unbekannter Provider: {provider}")
+    if not anfrage.get('problem'):
+        raise ValueError("Feld 'problem' fehlt")
+
+    job = {
+        'job_id': uuid.uuid4().hex[:12],
+        'status': 'wartend',
+        'provider': provider,
+        'problem': anfrage['problem'],
+        'temperatur': anfrage.get('temperatur'),
+        'max_versuche': anfrage.get('max_versuche'),
+        'prioritaet': int(anfrage.get('prioritaet', STANDARD_PRIORITAET)),
+        'erstellt': time.time(),
+        'ereignisse': [],
+        'ergebnis': None,
+        'abbruch': threading.Event()
+    }
+    with _bedingung:
+        _raeume_jobs_auf()
+        try:
+            _warteschlange.put_nowait((job['prioritaet'], next(_reihenfolge), job['job_id']))
+        except queue.Full:
+            return None
+        _jobs[job['job_id']] = job
+    return job
+
+
+def _raeume_jobs_auf(jetzt=None):
+    """
+    Vergisst beendete Jobs nach JOBS_AUFBEWAHRUNG bzw. über JOBS_BEENDET_MAX (Aufrufer hält _bedingung)
+    """
+    jetzt = jetzt or time.time()
+    beendet = sorted((job.get('beendet') or job['erstellt'], job_id)
+                     for job_id, job in _jobs.items() if job['status'] in ENDZUSTAENDE)
+    ueberzaehlig = len(beendet) - JOBS_BEENDET_MAX
+    for position, (zeitpunkt, job_id) in enumerate(beendet):
+        if position < ueberzaehlig or jetzt - zeitpunkt > JOBS_AUFBEWAHRUNG:
+            del _jobs[job_id]
+
+
+def brich_ab(job):
+    """
+    Wartende Jobs enden sofort, laufende vor ihrem nächsten Versuch
+    """
+    job['abbruch'].set()
+    with _bedingung:
+        if job['status'] == 'wartend':
+            job['status'] = 'abgebrochen'
+            job['beendet'] = time.time()
+            job['ereignisse'].append({'typ': 'status', 'zeit': time.time(), 'status': 'abgebrochen'})
+            _bedingung.notify_all()
+
+
+def _job_ansicht(job, mit_details=True):
+    ansicht = {k: v for k, v in job.items() if k not in ('abbruch', 'ereignisse', 'problem')}
+    if mit_details:
+        ansicht['problem'] = job['problem']
+        ansicht['ereignisse'] = list(job['ereignisse'])
+    return ansicht
+
+
+class DienstHandler(BaseHTTPRequestHandler):
+    """
+    HTTP-Endpunkte des Dienstes
+    """
+
+    def _antwort(self, status, daten, header=None):
+        inhalt = json.dumps(daten, ensure_ascii=False, default=str).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(inhalt)))
+        for name, wert in (header or {}).items():
+            self.send_header(name, wert)
+        self.end_headers()
+        self.wfile.write(inhalt)
+
+    def _pfad_teile(self):
+        return [teil for teil in self.path.split('?')[0].split('/') if teil]
+
+    def _hole_job(self, job_id):
+        job = _jobs.get(job_id)
+        if job is None:
+            self._antwort(404, {'fehler': f"Job {job_id} unbekannt"})
+        return job
+
+    def do_POST(self):
+        if self._pfad_teile() != ['jobs']:
+            return self._antwort(404, {'fehler': 'Unbekannter Pfad'})
+        try:
+            laenge = int(self.headers.get('Content-Length', 0))
+            anfrage = json.loads(self.rfile.read(laenge) or b'{}')
+            job = reiche_ein(anfrage)
+        except (ValueError, TypeError) as e:
+            return self._antwort(400, {'fehler': str(e)})
+        if job is None:
+            return self._antwort(503, {'fehler': 'Warteschlange voll', 'retry_after': RETRY_AFTER},
+                                 {'Retry-After': str(RETRY_AFTER)})
+        self._antwort(202, {'job_id': job['job_id'], 'status': job['status'],
+                            'warteschlange': _warteschlange.qsize()})
+
+    def do_GET(self):
+        teile = self._pfad_teile()
+        if teile == ['jobs']:
+            with _bedingung:
+                jobs = [_job_ansicht(job, mit_details=False) for job in _jobs.values()]
+            return self._antwort(200, {'jobs': jobs, 'warteschlange': _warteschlange.qsize()})
+        if len(teile) == 2 and teile[0] == 'jobs':
+            job = self._hole_job(teile[1])
+            if job:
+                with _bedingung:
+                    ansicht = _job_ansicht(job)
+                self._antwort(200, ansicht)
+            return
+        if len(teile) == 3 and teile[0] == 'jobs' and teile[2] == 'ereignisse':
+            job = self._hole_job(teile[1])
+            if job:
+                self._streame_ereignisse(job)
+            return
+        self._antwort(404, {'fehler': 'Unbekannter Pfad'})
+
+    def _streame_ereignisse(self, job):
+        """
+        Sendet jedes Ereignis als JSON-Zeile, bis der Job einen Endzustand erreicht
+        """
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        gesendet = 0
+        try:
+            while True:
+                with _bedingung:
+                    while gesendet == len(job['ereignisse']) and job['status'] not in ENDZUSTAENDE:
+                        _bedingung.wait(timeout=15)
+                    neue = job['ereignisse'][gesendet:]
+                    fertig = job['status'] in ENDZUSTAENDE
+                for eintrag in neue:
+                    self.wfile.write((json.dumps(eintrag, ensure_ascii=False, default=str) + "\n").encode('utf-8'))
+                self.wfile.flush()
+                gesendet += len(neue)
+                if fertig:
+                    return
+        except (BrokenPipeError, ConnectionResetError):
+            # Client hat den Stream geschlossen
+            return
+
+    def do_DELETE(self):
+        teile = self._pfad_teile()
+        if len(teile) != 2 or teile[0] != 'jobs':
+            return self._antwort(404, {'fehler': 'Unbekannter Pfad'})
+        job = self._hole_job(teile[1])
+        if job:
+            brich_ab(job)
+            antwort = {'job_id': job['job_id'], 'status': job['status']}
+            if job['status'] == 'laeuft':
+                antwort['hinweis'] = "Der laufende Versuch wird zu Ende geführt, danach startet kein weiterer"
+            self._antwort(202, antwort)
+
+    def log_message(self, format, *args):
+        # Die Versuchsschleife schreibt bereits ausführlich auf stdout
+        pass
+
+
+def main():
+    """
+    Dienst starten: Module laden, Worker starten, HTTP-Server bis Strg+C betreiben
+    """
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+    try:
+        installiere_module_einmalig()
+        print("✅ AMPL Module geladen")
+    except Exception:
+        print("⚠️ AMPL Module nicht verfügbar")
+
+    for name in PROVIDER_MODULE:
+        try:
+            lade_provider(name)
+        except Exception as e:
+            print(f"⚠️ Provider {name} nicht geladen: {e}")
+
+    for _ in range(WORKER):
+        threading.Thread(target=_worker, daemon=True).start()
+
+    server = ThreadingHTTPServer((HOST, port), DienstHandler)
+    server.daemon_threads = True
+    print(f"🚀 Optimierungsdienst auf http://{HOST}:{port} ({WORKER} Worker, max. {WARTESCHLANGE_MAX} wartende Jobs)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️  Dienst wird beendet")
+    finally:
+        server.server_close()
+        beende_warme_prozesse()
+
+
+if __name__ == "__main__":
+    main()
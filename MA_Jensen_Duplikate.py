@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - DUPLIKATERKENNUNG
+Normalisierte Fingerabdrücke generierter Kandidaten (Python-Code und AMPL-Modell), damit
+identische Wiederholungen nicht erneut ausgeführt werden
+"""
+
+import hashlib
+import ast
+import re
+
+from MA_Jensen_Solver import modell_fingerabdruck
+
+# ===== KONFIGURATION =====
+DIVERSIFIKATION_SCHRITT = 0.3   # Temperatur-Erhöhung nach einem Duplikat
+DIVERSIFIKATION_MAX = 1.0
+# Schlüsselwörter, an denen AMPL-Modelltext in String-Konstanten erkannt wird
+MODELL_SCHLUESSELWOERTER = re.compile(r'\b(var|subject to|s\.t\.|minimize|maximize)\b')
+
+
+class _Normalisierer(ast.NodeTransformer):
+    """
+    Entfernt Docstrings und vereinheitlicht Leerraum/Kommentare in AMPL-Strings
+    """
+
+    def _ohne_docstring(self, node):
+        self.generic_visit(node)
+        if node.body and isinstance(node.body[0], ast.Expr) and isinstance(getattr(node.body[0], 'value', None), ast.Constant) \
+                and isinstance(node.body[0].value.value, str) and len(node.body) > 1:
+            node.body = node.body[1:]
+        return node
+
+    visit_Module = visit_FunctionDef = visit_AsyncFunctionDef = visit_ClassDef = _ohne_docstring
+
+    def visit_Constant(self, node):
+        if isinstance(node.value, str):
+            text = re.sub(r'#[^\n]*', '', node.value)
+            return ast.copy_location(ast.Constant(re.sub(r'\s+', ' ', text).strip()), node)
+        return node
+
+
+def code_fingerabdruck(code):
+    """
+    Hash des Codes ohne Kommentare, Formatierung und Docstrings (über den Syntaxbaum)
+    """
+    try:
+        baum = _Normalisierer().visit(ast.parse(code))
+        normalisiert = ast.dump(baum, annotate_fields=False)
+    except (SyntaxError, ValueError):
+        # Nicht parsbarer Code: nur Leerraum vereinheitlichen
+        normalisiert = re.sub(r'\s+', ' ', re.sub(r'#[^\n]*', '', code)).strip()
+    return hashlib.sha256(normalisiert.encode('utf-8')).hexdigest()[:16]
+
+
+def modelltext_aus_code(code):
+    """
+    AMPL-Modelltext aus den String-Konstanten des Codes (z.B. model_str für ampl.eval)
+    """
+    try:
+        konstanten = [node.value for node in ast.walk(ast.parse(code))
+                      if isinstance(node, ast.Constant) and isinstance(node.value, str)]
+    except (SyntaxError, ValueError):
+        return None
+    teile = [text for text in konstanten if MODELL_SCHLUESSELWOERTER.search(text)]
+    return "\n".join(teile) or None
+
+
+def kandidaten_fingerabdruck(code):
+    """
+    Fingerabdrücke eines Kandidaten: {'code': ..., 'modell': ... oder None}
+    """
+    modelltext = modelltext_aus_code(code)
+    return {
+        'code': code_fingerabdruck(code),
+        'modell': modell_fingerabdruck(modelltext) if modelltext else None
+    }
+
+
+def diversifizierte_temperatur(temperatur):
+    """
+    Höhere Temperatur für die nächste Anfrage nach einem Duplikat
+    """
+    return min(DIVERSIFIKATION_MAX, round(temperatur + DIVERSIFIKATION_SCHRITT, 2))
@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - FEHLERAUSZUG FÜR DEN REPROMPT
+Verdichtet stdout/stderr eines gescheiterten Versuchs auf das Wesentliche: Fehlermeldung,
+letzte Stelle im generierten Code, AMPL-Meldung mit Zeile und Kontext, betroffene
+Bezeichner und wiederholte Meldungen - innerhalb eines festen Token-Budgets
+"""
+
+import collections
+import re
+
+# ===== KONFIGURATION =====
+FEHLER_TOKEN_BUDGET = 400       # ca. 4 Zeichen pro Token (wie schaetze_tokens)
+SKRIPT_NAME = 'versuch.py'      # generierter Code im Versuchsverzeichnis
+MAX_AMPL_ZEILEN = 8
+MAX_BEZEICHNER = 10
+MAX_WIEDERHOLUNGEN = 5
+
+TRACEBACK_RAHMEN = re.compile(r'^\s*File "([^"]+)", line (\d+), in (\S+)')
+AUSNAHME_ZEILE = re.compile(r'^[\w.]*(Error|Exception|Exit|Interrupt)\b:?')
+AMPL_MELDUNG = re.compile(r'line \d+ offset \d+|context:|syntax error|already defined|not defined|invalid subscript|'
+                          r'no value for|Error executing|error processing|infeasible|unbounded', re.IGNORECASE)
+BEZEICHNER_MUSTER = [
+    re.compile(r"(\w+(?:\[[^\]]*\])?) is (?:already|not) defined"),
+    re.compile(r"invalid subscript (?:discarded: )?(\w+\[[^\]]*\])"),
+    re.compile(r"no value for (\w+(?:\[[^\]]*\])?)"),
+    re.compile(r"error processing (?:param|set|var|constraint|objective) (\w+)"),
+    re.compile(r"name '(\w+)' is not defined"),
+    re.compile(r">>>\s*(.*?)\s*<<<")
+]
+
+
+def _letzter_rahmen(zeilen):
+    """
+    Letzter Traceback-Rahmen im generierten Code (sonst der letzte überhaupt) mit Codezeile
+    """
+    rahmen = []
+    for i, zeile in enumerate(zeilen):
+        treffer = TRACEBACK_RAHMEN.match(zeile)
+        if treffer:
+            code = zeilen[i + 1].strip() if i + 1 < len(zeilen) and not TRACEBACK_RAHMEN.match(zeilen[i + 1]) else ''
+            rahmen.append((treffer.group(1), treffer.group(2), treffer.group(3), code))
+    if not rahmen:
+        return None
+    eigene = [r for r in rahmen if r[0].endswith(SKRIPT_NAME)]
+    datei, zeile, funktion, code = (eigene or rahmen)[-1]
+    ort = SKRIPT_NAME if datei.endswith(SKRIPT_NAME) else datei.rsplit('/', 1)[-1]
+    return f"{ort}, Zeile {zeile} ({funktion}): {code}"
+
+
+def _ausnahme(zeilen):
+    # Letzte Ausnahme-Zeile; mehrzeilige AMPL-Meldungen folgen als AMPL-Zeilen
+    for zeile in reversed(zeilen):
+        if AUSNAHME_ZEILE.match(zeile.strip()):
+            return zeile.strip()
+    return None
+
+
+def _normalisiert(zeile):
+    return re.sub(r'\d+(\.\d+)?', '#', zeile.strip())
+
+
+def betroffene_bezeichner(fehler):
+    """
+    Bezeichner aus den Fehlermeldungen (z.B. cost['a'], x, Kontext zwischen >>> und <<<)
+    """
+    gefunden = []
+    for muster in BEZEICHNER_MUSTER:
+        for treffer in muster.findall(fehler):
+            if treffer and treffer not in gefunden:
+                gefunden.append(treffer)
+    return gefunden[:MAX_BEZEICHNER]
+
+
+def verdichte_fehler(fehler, token_budget=None):
+    """
+    Fehlerauszug für den Reprompt (höchstens token_budget Tokens, geschätzt)
+
+    Reihenfolge nach Nutzen; was nicht mehr ins Budget passt, entfällt.
+    Ohne erkennbare Struktur bleibt das Ende der Meldung.
+    """
+    if not fehler:
+        return ""
+    budget = (token_budget or FEHLER_TOKEN_BUDGET) * 4
+    zeilen = [zeile for zeile in fehler.splitlines() if zeile.strip()]
+
+    teile = []
+    # Hinweise der Ausführung (Zeitlimit, Ressourcenlimit) stehen in der ersten Zeile
+    if zeilen and re.match(r'(Ressourcenlimit|Timeout)', zeilen[0]):
+        teile.append(f"HINWEIS: {zeilen[0].strip()}")
+    ausnahme = _ausnahme(zeilen)
+    if ausnahme:
+        teile.append(f"FEHLERMELDUNG: {ausnahme}")
+    rahmen = _letzter_rahmen(zeilen)
+    if rahmen:
+        teile.append(f"STELLE IM CODE: {rahmen}")
+
+    haeufigkeit = collections.Counter(_normalisiert(zeile) for zeile in zeilen)
+    ampl_zeilen = []
+    for zeile in zeilen:
+        if AMPL_MELDUNG.search(zeile) and zeile.strip() not in ampl_zeilen and zeile.strip() != ausnahme:
+            ampl_zeilen.append(zeile.strip())
+    if ampl_zeilen:
+        teile.append("AMPL:\n" + "\n".join(f"  {zeile}" for zeile in ampl_zeilen[:MAX_AMPL_ZEILEN]))
+
+    bezeichner = betroffene_bezeichner(fehler)
+    if bezeichner:
+        teile.append(f"BETROFFEN: {', '.join(bezeichner)}")
+
+    wiederholt = [(anzahl, zeile) for zeile, anzahl in haeufigkeit.most_common(MAX_WIEDERHOLUNGEN) if anzahl > 1]
+    if wiederholt:
+        teile.append("WIEDERHOLT:\n" + "\n".join(f"  {anzahl}x {zeile[:200]}" for anzahl, zeile in wiederholt))
+
+    rest_zeilen = zeilen[1:] if teile and teile[0].startswith('HINWEIS') else zeilen
+    if rest_zeilen and (not teile or (len(teile) == 1 and teile[0].startswith('HINWEIS'))):
+        teile.append("ENDE DER MELDUNG:\n" + "\n".join(zeile[:200] for zeile in rest_zeilen[-10:]))
+
+    auszug = ""
+    for teil in teile:
+        if len(auszug) + len(teil) + 1 > budget:
+            rest = budget - len(auszug) - 1
+            if rest > 80:
+                auszug += teil[:rest - 4] + " ...\n"
+            break
+        auszug += teil + "\n"
+    return auszug
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - LERNEN AUS FRÜHEREN LÄUFEN
+Erfolgswahrscheinlichkeit eines weiteren Versuchs aus den JSON-Berichten (bericht_*.json)
+"""
+
+import threading
+import glob
+import json
+
+# ===== KONFIGURATION =====
+HISTORIE_MUSTER = 'bericht_*.json'
+NUTZEN_ERFOLG = 1.0      # Wert eines gelösten Problems
+KOSTEN_VERSUCH = 0.15    # Kosten eines weiteren Versuchs (API, Laufzeit, Worker-Slot) relativ zum Nutzen
+REPROMPT_SCHWELLE = 0.0  # Mindest-Erwartungswert P(Erfolg) * Nutzen - Kosten für einen Reprompt
+GLAETTUNG = 4.0          # Gewicht der übergeordneten Schätzung (Pseudo-Beobachtungen)
+MIN_BEOBACHTUNGEN = 3    # ab so vielen Beobachtungen wird eine feinere Stufe verwendet
+
+# Vorwissen ohne Historie - entspricht der bisherigen festen Kategorienliste
+PRIOR_ERFOLG = {
+    'SET_PARAMETER_INCONSISTENZ': 0.5,
+    'DOPPELDEFINITION': 0.5,
+    'AMPL_SYNTAX': 0.5,
+    'ALLGEMEIN': 0.4,
+    'UNLÖSBAR': 0.3,
+    'UNBESCHRÄNKT': 0.3,
+    'PERFORMANCE': 0.05
+}
+PRIOR_STANDARD = 0.3
+
+# Zähler {schluessel: [erfolge, gesamt]} - einmal pro Prozess geladen, danach online aktualisiert
+_zaehler = None
+_lock = threading.Lock()
+
+
+def _temperatur_stufe(temperatur):
+    return None if temperatur is None else f"{float(temperatur):.1f}"
+
+
+def _schluessel(kategorie, provider, temperatur, versuch_nr):
+    """
+    Schlüssel von grob nach fein: Kategorie -> Provider -> Temperatur -> Versuchsnummer
+    """
+    return [
+        (kategorie,),
+        (kategorie, provider),
+        (kategorie, provider, _temperatur_stufe(temperatur)),
+        (kategorie, provider, _temperatur_stufe(temperatur), versuch_nr)
+    ]
+
+
+def _zaehle(zaehler, kategorie, provider, temperatur, versuch_nr, erfolg):
+    for schluessel in _schluessel(kategorie, provider, temperatur, versuch_nr):
+        eintrag = zaehler.setdefault(schluessel, [0, 0])
+        eintrag[0] += 1 if erfolg else 0
+        eintrag[1] += 1
+
+
+def lerne_aus_berichten(muster=None):
+    """
+    Zählt für jeden fehlgeschlagenen Versuch n, ob Versuch n+1 erfolgreich war
+    """
+    zaehler = {}
+    for pfad in glob.glob(muster or HISTORIE_MUSTER):
+        try:
+            with open(pfad, 'r', encoding='utf-8') as f:
+                bericht = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        versuche = bericht.get('versuche', [])
+        for versuch, naechster in zip(versuche, versuche[1:]):
+            analyse = versuch.get('fehler_analyse')
+            if versuch.get('erfolg') or not analyse:
+                continue
+            # Modell des fehlgeschlagenen Versuchs (Kaskade: kann vom Hauptmodell abweichen)
+            _zaehle(zaehler, analyse['fehler_kategorie'], versuch.get('modell') or bericht.get('model'),
+                    bericht.get('temperature'), versuch['versuch_nr'], naechster.get('erfolg', False))
+    return zaehler
+
+
+def _hole_zaehler():
+    global _zaehler
+    with _lock:
+        if _zaehler is None:
+            _zaehler = lerne_aus_berichten()
+        return _zaehler
+
+
+def historie_aktualisieren(kategorie, provider, temperatur, versuch_nr, erfolg):
+    """
+    Online-Update: Ergebnis des Versuchs nach einem Fehlschlag in Versuch versuch_nr
+    """
+    zaehler = _hole_zaehler()
+    with _lock:
+        _zaehle(zaehler, kategorie, provider, temperatur, versuch_nr, erfolg)
+
+
+def erfolgswahrscheinlichkeit(kategorie, provider=None, temperatur=None, versuch_nr=None):
+    """
+    Geglättete Schätzung P(Versuch n+1 erfolgreich | Kategorie, Provider, Temperatur, n)
+
+    Die feinste Stufe mit genug Beobachtungen wird zur Kategorie-Schätzung aus den
+    übrigen Läufen hin geglättet (Beta-Prior, keine Daten doppelt gezählt).
+    """
+    zaehler = _hole_zaehler()
+    prior = PRIOR_ERFOLG.get(kategorie, PRIOR_STANDARD)
+    stufen = _schluessel(kategorie, provider, temperatur, versuch_nr)
+    with _lock:
+        erfolge_kategorie, gesamt_kategorie = zaehler.get(stufen[0], (0, 0))
+        for schluessel in reversed(stufen[1:]):
+            erfolge, gesamt = zaehler.get(schluessel, (0, 0))
+            if gesamt >= MIN_BEOBACHTUNGEN:
+                break
+        else:
+            erfolge, gesamt = erfolge_kategorie, gesamt_kategorie
+            erfolge_kategorie, gesamt_kategorie = 0, 0
+
+    # Kategorie-Schätzung ohne die Beobachtungen der gewählten Stufe
+    p_rest = (erfolge_kategorie - erfolge + GLAETTUNG * prior) / (gesamt_kategorie - gesamt + GLAETTUNG) \
+        if gesamt_kategorie else prior
+    p = (erfolge + GLAETTUNG * p_rest) / (gesamt + GLAETTUNG)
+    return p, gesamt
+
+
+def bewerte_reprompt(kategorie, provider=None, temperatur=None, versuch_nr=None):
+    """
+    Erwartungswert eines weiteren Versuchs und Entscheidung gegen REPROMPT_SCHWELLE
+    """
+    p, beobachtungen = erfolgswahrscheinlichkeit(kategorie, provider, temperatur, versuch_nr)
+    erwartungswert = p * NUTZEN_ERFOLG - KOSTEN_VERSUCH
+    return {
+        'kategorie': kategorie,
+        'p_erfolg': p,
+        'beobachtungen': beobachtungen,
+        'erwartungswert': erwartungswert,
+        'reprompt': erwartungswert >= REPROMPT_SCHWELLE
+    }
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - MODELL-KASKADE
+Erster Versuch einfacher Aufgaben mit dem schnellen, günstigen Modell; spätere Versuche und
+schwierige Aufgaben mit dem starken Modell. Die Schwierigkeitsschwelle wird aus den
+JSON-Berichten (bericht_*.json) gelernt - nur aus ersten Versuchen, deren Modell nicht vom
+Routing abhing (Erkundung oder Läufe ohne Kaskade), sonst bestätigt die Schwelle nur sich selbst.
+"""
+
+import threading
+import random
+import glob
+import json
+import re
+
+from MA_Jensen_Vorlagen import ZAHL
+
+# ===== KONFIGURATION =====
+KASKADE_MUSTER = 'bericht_*.json'
+STANDARD_SCHWELLE = 12        # Schwierigkeit, bis zu der ohne Historie das günstige Modell beginnt
+TOLERANZ = 0.05               # erlaubter Rückstand der Erfolgsquote im ersten Versuch gegenüber dem starken Modell
+GLAETTUNG = 4.0               # Pseudo-Beobachtungen zum Vorwissen
+PRIOR_ERFOLG = 0.5
+MIN_BEOBACHTUNGEN = 5         # je Modell, bevor eine gelernte Schwelle gilt
+ERKUNDUNG = 0.1               # Anteil erster Versuche mit zufällig gewähltem Modell (Lerndaten für die Schwelle)
+SCHWER_GEWICHT = 5            # Zuschlag je Merkmal schwieriger Aufgaben
+SCHWERE_MERKMALE = re.compile(
+    r'ganzzahlig|binär|integer|binary|ja/nein|periode|monat|woche|mehrstufig|nichtlinear|'
+    r'fixkosten|rüstkosten|mindestmenge|entweder|standort', re.IGNORECASE)
+
+_schwellen = {}
+_lock = threading.Lock()
+
+
+def schwierigkeit(problem):
+    """
+    Grobe Schwierigkeit der Aufgabe: Anzahl der Zahlen (Datenumfang) plus Zuschlag für
+    Merkmale wie Ganzzahligkeit, mehrere Perioden oder Fixkosten
+    """
+    merkmale = {treffer.lower() for treffer in SCHWERE_MERKMALE.findall(problem)}
+    return len(ZAHL.findall(problem)) + SCHWER_GEWICHT * len(merkmale)
+
+
+def _beobachtungen(muster=None):
+    """
+    (Schwierigkeit, Modell, Erfolg im ersten Versuch, Modellwahl) aus allen Berichten
+
+    Modellwahl wie in waehle_modell; None bei Läufen ohne Kaskade.
+    """
+    beobachtungen = []
+    for pfad in glob.glob(muster or KASKADE_MUSTER):
+        try:
+            with open(pfad, 'r', encoding='utf-8') as f:
+                bericht = json.load(f)
+        except (OSError, ValueError):
+            continue
+        erste = [v for v in bericht.get('versuche', []) if v.get('versuch_nr') == 1]
+        if not erste or not bericht.get('problem'):
+            continue  # mit Modellvorlage gelöst oder API-Fehler vor dem ersten Versuch
+        beobachtungen.append((schwierigkeit(bericht['problem']), erste[0].get('modell', bericht.get('model')),
+                              bool(erste[0].get('erfolg')), erste[0].get('modell_wahl')))
+    return beobachtungen
+
+
+def _quote(erfolge, gesamt):
+    return (erfolge + GLAETTUNG * PRIOR_ERFOLG) / (gesamt + GLAETTUNG)
+
+
+def lerne_schwelle(guenstig, stark, muster=None):
+    """
+    Größte Schwierigkeit, bis zu der das günstige Modell im ersten Versuch höchstens TOLERANZ
+    schlechter abschneidet als das starke (geglättete Quoten aller Aufgaben bis zu dieser Schwelle)
+
+    Vom Routing gewählte Versuche ('einfach'/'schwierig') zählen nicht: das günstige Modell sähe
+    nur leichte, das starke nur schwere Aufgaben.
+
+    Rückgabe: (Schwelle, Beobachtungen günstig, Beobachtungen stark)
+    """
+    beobachtungen = [b for b in _beobachtungen(muster)
+                     if b[1] in (guenstig, stark) and b[3] in (None, 'erkundung')]
+    anzahl = {modell: sum(1 for b in beobachtungen if b[1] == modell) for modell in (guenstig, stark)}
+    if min(anzahl.values()) < MIN_BEOBACHTUNGEN:
+        return STANDARD_SCHWELLE, anzahl[guenstig], anzahl[stark]
+
+    schwelle = None
+    for kandidat in sorted({b[0] for b in beobachtungen}):
+        bis = [b for b in beobachtungen if b[0] <= kandidat]
+        g = [b[2] for b in bis if b[1] == guenstig]
+        s = [b[2] for b in bis if b[1] == stark]
+        if len(g) < MIN_BEOBACHTUNGEN:
+            continue
+        if _quote(sum(g), len(g)) >= _quote(sum(s), len(s)) - TOLERANZ:
+            schwelle = kandidat
+        else:
+            break
+    # Keine Schwierigkeit, bei der das günstige Modell mithält: immer mit dem starken beginnen
+    return (-1 if schwelle is None else schwelle), anzahl[guenstig], anzahl[stark]
+
+
+def hole_schwelle(guenstig, stark):
+    """
+    Gelernte Schwelle je Modellpaar - einmal pro Prozess aus den Berichten bestimmt
+    """
+    with _lock:
+        if (guenstig, stark) not in _schwellen:
+            _schwellen[(guenstig, stark)] = lerne_schwelle(guenstig, stark)
+        return _schwellen[(guenstig, stark)]
+
+
+def waehle_modell(problem, versuch_nr, stark, guenstig):
+    """
+    Routing: (Modell, Begründung, Modellwahl) für einen Versuch
+
+    Modellwahl: 'eskalation', 'erkundung' (zufällig, Anteil ERKUNDUNG), 'einfach' oder 'schwierig'
+    """
+    if versuch_nr > 1:
+        return stark, "Eskalation nach Fehlversuch", 'eskalation'
+    if random.random() < ERKUNDUNG:
+        modell = random.choice((guenstig, stark))
+        return modell, f"Erkundung: zufällig gewählt (Anteil {ERKUNDUNG:.0%})", 'erkundung'
+    schwelle, n_guenstig, n_stark = hole_schwelle(guenstig, stark)
+    wert = schwierigkeit(problem)
+    herkunft = f"gelernt aus {n_guenstig}/{n_stark} Läufen" if n_guenstig >= MIN_BEOBACHTUNGEN and n_stark >= MIN_BEOBACHTUNGEN \
+        else "Standard"
+    if wert <= schwelle:
+        return guenstig, f"einfach: Schwierigkeit {wert} <= {schwelle} ({herkunft})", 'einfach'
+    return stark, f"schwierig: Schwierigkeit {wert} > {schwelle} ({herkunft})", 'schwierig'
+
+
+def zaehle_modelle(versuche):
+    """
+    Versuche je Modell (Vorlagen-Versuche ohne Modellanfrage zählen nicht)
+    """
+    anzahl = {}
+    for versuch in versuche:
+        if versuch.get('modell'):
+            anzahl[versuch['modell']] = anzahl.get(versuch['modell'], 0) + 1
+    return anzahl
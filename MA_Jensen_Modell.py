@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - MODELLANALYSE
+Größe und Struktur eines geladenen AMPL-Modells: Variablen, Nebenbedingungen, Nichtnullen,
+Mengen, größte Entitäten und versehentliche Kreuzprodukte
+
+Die Solverwahl trifft das Solver-Portfolio (MA_Jensen_Solver.wettlauf_nl) durch den Wettlauf
+selbst; die Analyse liefert dafür keine Empfehlung.
+"""
+
+import tempfile
+import math
+
+# ===== KONFIGURATION =====
+GROESSTE_ENTITAETEN = 5
+KREUZPRODUKT_SCHWELLE = 100000   # ab so vielen Instanzen ist ein volles Kreuzprodukt verdächtig
+DOMINANZ_ANTEIL = 0.8            # eine Entität mit diesem Anteil aller Instanzen wird gemeldet
+NICHTNULLEN_AUS_NL = False       # ohne Portfolio eigene .nl-Übersetzung nur für die Nichtnullen (kostet ein write g je Solve)
+
+
+def _deklaration(ampl, name):
+    """
+    Deklarationstext einer Entität, z.B. 'var x {I, J} binary;'
+    """
+    try:
+        return ampl.getOutput(f"show {name};").lower()
+    except Exception:
+        return ''
+
+
+def _indexmengen(entitaet):
+    holen = getattr(entitaet, 'get_indexing_sets', None) or getattr(entitaet, 'getIndexingSets', None)
+    try:
+        return list(holen()) if holen else []
+    except Exception:
+        return []
+
+
+def _kreuzprodukt(indexmengen, kardinalitaeten):
+    """
+    Größe des vollen Kreuzprodukts, falls alle Indexmengen einfache, bekannte Mengen sind
+    """
+    groessen = []
+    for menge in indexmengen:
+        # 'i in I' oder 'I'
+        name = menge.split(' in ')[-1].strip()
+        if name not in kardinalitaeten:
+            return None
+        groessen.append(kardinalitaeten[name])
+    return math.prod(groessen) if groessen else None
+
+
+def nl_kennzahlen(nl_pfad):
+    """
+    Größen nach AMPL-Presolve aus dem Kopf einer .nl-Datei im Textformat (write g)
+    """
+    with open(nl_pfad, 'r', encoding='ascii', errors='replace') as f:
+        kopf = [f.readline().split('#')[0].split() for _ in range(8)]
+    return {
+        'nl_variablen': int(kopf[1][0]),
+        'nl_nebenbedingungen': int(kopf[1][1]),
+        'nl_binaer': int(kopf[6][0]),
+        'nl_ganzzahlig': int(kopf[6][1]),
+        'nichtnullen': int(kopf[7][0])
+    }
+
+
+def zaehle_nichtnullen(ampl):
+    """
+    Nichtnullen der Nebenbedingungsmatrix vor dem Solve: AMPL übersetzt das geladene Modell
+    (mit Presolve) in eine temporäre .nl-Datei, deren Kopf die Größen enthält
+
+    _snzcons ist erst nach einem Solve gesetzt und taugt deshalb nicht für den ersten Solve.
+    """
+    from MA_Jensen_Solver import schreibe_instanz
+
+    with tempfile.TemporaryDirectory(prefix='ma_jensen_analyse_') as verzeichnis:
+        instanz = schreibe_instanz(ampl, verzeichnis, 'analyse')
+        kennzahlen = nl_kennzahlen(instanz['nl'])
+    kennzahlen['uebersetzung_zeit'] = instanz['uebersetzung_zeit']
+    return kennzahlen
+
+
+def analysiere_modell(ampl, instanz=None):
+    """
+    Analyse nach dem Laden von Modell und Daten (vor dem Solve)
+
+    instanz: bereits übersetzte .nl-Datei dieses Solves (schreibe_instanz, z.B. für das Portfolio) -
+    die Nichtnullen kommen dann ohne weitere Übersetzung aus deren Kopf.
+    """
+    analyse = {
+        'variablen': 0,
+        'kontinuierlich': 0,
+        'ganzzahlig': 0,
+        'binaer': 0,
+        'nebenbedingungen': 0,
+        'nichtnullen': None,
+        'mengen': {},
+        'groesste_entitaeten': [],
+        'warnungen': []
+    }
+
+    for name, menge in ampl.getSets():
+        try:
+            if menge.indexarity() == 0:
+                analyse['mengen'][name] = menge.size()
+        except Exception:
+            continue
+
+    entitaeten = []
+    for name, variable in ampl.getVariables():
+        anzahl = variable.numInstances()
+        deklaration = _deklaration(ampl, name)
+        typ = 'binaer' if ' binary' in deklaration else 'ganzzahlig' if ' integer' in deklaration else 'kontinuierlich'
+        analyse['variablen'] += anzahl
+        analyse[typ] += anzahl
+        entitaeten.append({'name': name, 'art': 'var', 'typ': typ, 'instanzen': anzahl,
+                           'indexmengen': _indexmengen(variable)})
+    for name, nebenbedingung in ampl.getConstraints():
+        anzahl = nebenbedingung.numInstances()
+        analyse['nebenbedingungen'] += anzahl
+        entitaeten.append({'name': name, 'art': 'subject to', 'instanzen': anzahl,
+                           'indexmengen': _indexmengen(nebenbedingung)})
+
+    entitaeten.sort(key=lambda e: e['instanzen'], reverse=True)
+    analyse['groesste_entitaeten'] = entitaeten[:GROESSTE_ENTITAETEN]
+
+    # Aufblähungen: volles Kreuzprodukt über mehrere Mengen oder eine alles dominierende Entität
+    gesamt = analyse['variablen'] + analyse['nebenbedingungen']
+    for entitaet in entitaeten:
+        kreuz = _kreuzprodukt(entitaet['indexmengen'], analyse['mengen'])
+        if len(entitaet['indexmengen']) >= 2 and kreuz and entitaet['instanzen'] == kreuz \
+                and kreuz >= KREUZPRODUKT_SCHWELLE:
+            analyse['warnungen'].append(
+                f"{entitaet['name']}: volles Kreuzprodukt über {', '.join(entitaet['indexmengen'])} "
+                f"({kreuz} Instanzen) - dünn besetzte Indexmenge prüfen"
+            )
+        elif gesamt and entitaet['instanzen'] >= KREUZPRODUKT_SCHWELLE \
+                and entitaet['instanzen'] / gesamt >= DOMINANZ_ANTEIL:
+            analyse['warnungen'].append(
+                f"{entitaet['name']}: {entitaet['instanzen']} von {gesamt} Instanzen"
+            )
+
+    analyse['modelltyp'] = 'MIP' if analyse['ganzzahlig'] + analyse['binaer'] else 'LP'
+    analyse['aufgeblaeht'] = bool(analyse['warnungen'])
+    if instanz is not None:
+        try:
+            analyse.update(nl_kennzahlen(instanz['nl']))
+        except Exception as e:
+            analyse['nichtnullen_fehler'] = str(e)
+    elif NICHTNULLEN_AUS_NL:
+        try:
+            analyse.update(zaehle_nichtnullen(ampl))
+        except Exception as e:
+            analyse['nichtnullen_fehler'] = str(e)
+    return analyse
+
+
+def ergaenze_nach_solve(ampl, analyse):
+    """
+    Vom Solver gesehene Größen nach Presolve (_snvars, _snbvars, _snivars, _sncons, _snzcons)
+
+    Ohne .nl-Kopf vor dem Solve stammen die Nichtnullen von hier (_snzcons).
+    """
+    for schluessel in ('_snvars', '_snbvars', '_snivars', '_sncons', '_snzcons'):
+        try:
+            analyse[schluessel] = int(ampl.getValue(schluessel))
+        except Exception:
+            analyse[schluessel] = None
+    if analyse.get('nichtnullen') is None:
+        analyse['nichtnullen'] = analyse['_snzcons']
+    return analyse
+
+
+def letzte_modellanalyse(versuche):
+    """
+    Modellanalyse des letzten Solves (für den Bericht)
+    """
+    for versuch in reversed(versuche):
+        for solve in reversed(versuch.get('solves', [])):
+            analyse = solve.get('modellanalyse')
+            if analyse and 'fehler' not in analyse:
+                return analyse
+    return None
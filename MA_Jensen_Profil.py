@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - LAUFZEITPROFIL
+Stichproben-Profiler für den generierten Code in der Sonde: Zeitanteile der Phasen
+Datenaufbau, Modell laden, Solve und Ausgabe sowie die langsamsten Codezeilen
+"""
+
+import collections
+import threading
+import linecache
+import time
+import sys
+import os
+
+# ===== KONFIGURATION =====
+PROFIL_INTERVALL = 0.005         # Sekunden zwischen zwei Stichproben
+PROFIL_SCHREIBINTERVALL = 1.0    # Zwischenstand für den Bericht (bleibt auch bei Timeout erhalten)
+PROFIL_TOP_ZEILEN = 10
+PROFIL_PROMPT_ZEILEN = 5
+
+PHASEN_NAMEN = {
+    'daten': 'Datenaufbau',
+    'eval': 'Modell laden',
+    'solve': 'Solve',
+    'ausgabe': 'Ausgabe'
+}
+# amplpy-Methoden, deren Laufzeit einer Phase zugeordnet wird; Python-Code dazwischen zählt
+# vor dem ersten Solve zum Datenaufbau, danach zur Ausgabe
+PHASEN_METHODEN = {
+    'AMPL': {'eval': 'eval', 'read': 'eval', 'readData': 'eval', 'read_data': 'eval',
+             'solve': 'solve', 'getValue': 'ausgabe', 'get_value': 'ausgabe'},
+    'Parameter': {'setValues': 'daten', 'set_values': 'daten', '__setitem__': 'daten', 'set': 'daten'},
+    'Set': {'setValues': 'daten', 'set_values': 'daten'},
+    'Variable': {'getValues': 'ausgabe', 'get_values': 'ausgabe', 'value': 'ausgabe'},
+    'Objective': {'value': 'ausgabe'}
+}
+# Parameter, Sets, Variablen und Zielfunktionen erzeugt amplpy selbst - gemessen wird über die Zugriffe der AMPL-Instanz
+ENTITAETEN_ZUGRIFFE = {
+    'getParameter': 'Parameter', 'get_parameter': 'Parameter', 'getSet': 'Set', 'get_set': 'Set',
+    'getVariable': 'Variable', 'get_variable': 'Variable', 'getObjective': 'Objective', 'get_objective': 'Objective'
+}
+# Tabellen wie ampl.param['kosten'] = {...}: Zuweisung zählt zum Datenaufbau, Einträge wie oben
+ENTITAETEN_TABELLEN = {
+    'param': ('Parameter', {'__setitem__': 'daten'}),
+    'set': ('Set', {'__setitem__': 'daten'}),
+    'var': ('Variable', {}),
+    'obj': ('Objective', {})
+}
+
+
+class Profiler:
+    """
+    Nimmt in einem Hintergrund-Thread Stichproben des Hauptthreads: aktuelle Phase und
+    innerste Zeile des generierten Skripts
+    """
+
+    def __init__(self, skript, bei_zwischenstand=None, nicht_instrumentiert=()):
+        self.skript = os.path.abspath(skript)
+        self.bei_zwischenstand = bei_zwischenstand
+        self.nicht_instrumentiert = list(nicht_instrumentiert)
+        self.phasen = collections.Counter()
+        self.zeilen = collections.Counter()
+        self.zeilen_phasen = collections.defaultdict(collections.Counter)
+        self.proben = 0
+        self.start = None
+        self.ende = None
+        self._phasen_stapel = []
+        self._solve_gesehen = False
+        self._haupt = threading.main_thread().ident
+        self._stopp = threading.Event()
+        self._thread = None
+
+    def betrete(self, phase):
+        if phase == 'solve':
+            self._solve_gesehen = True
+        self._phasen_stapel.append(phase)
+
+    def verlasse(self):
+        if self._phasen_stapel:
+            self._phasen_stapel.pop()
+
+    def _aktuelle_phase(self):
+        if self._phasen_stapel:
+            return self._phasen_stapel[-1]
+        return 'ausgabe' if self._solve_gesehen else 'daten'
+
+    def _probe(self):
+        rahmen = sys._current_frames().get(self._haupt)
+        if rahmen is None:
+            return
+        phase = self._aktuelle_phase()
+        self.proben += 1
+        self.phasen[phase] += 1
+        while rahmen is not None:
+            if rahmen.f_code.co_filename == self.skript:
+                self.zeilen[rahmen.f_lineno] += 1
+                self.zeilen_phasen[rahmen.f_lineno][phase] += 1
+                break
+            rahmen = rahmen.f_back
+
+    def _lauf(self):
+        letzter_stand = time.time()
+        while not self._stopp.wait(PROFIL_INTERVALL):
+            self._probe()
+            if self.bei_zwischenstand and time.time() - letzter_stand >= PROFIL_SCHREIBINTERVALL:
+                letzter_stand = time.time()
+                self.bei_zwischenstand(self.ergebnis())
+
+    def starte(self):
+        self.start = time.time()
+        self._thread = threading.Thread(target=self._lauf, name='ma_jensen_profil', daemon=True)
+        self._thread.start()
+
+    def stoppe(self):
+        self._stopp.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+        self.ende = time.time()
+
+    def ergebnis(self):
+        """
+        Zeitanteile je Phase und langsamste Zeilen (Zeit anteilig aus der Laufzeit hochgerechnet)
+        """
+        gesamt = (self.ende or time.time()) - (self.start or time.time())
+        proben = max(self.proben, 1)
+        phasen = {phase: {'anteil': self.phasen[phase] / proben, 'zeit': gesamt * self.phasen[phase] / proben}
+                  for phase in PHASEN_NAMEN}
+        zeilen = []
+        for zeile, anzahl in self.zeilen.most_common(PROFIL_TOP_ZEILEN):
+            zeilen.append({
+                'zeile': zeile,
+                'code': linecache.getline(self.skript, zeile).strip(),
+                'anteil': anzahl / proben,
+                'zeit': gesamt * anzahl / proben,
+                'phase': self.zeilen_phasen[zeile].most_common(1)[0][0]
+            })
+        return {
+            'gesamt_zeit': gesamt,
+            'proben': self.proben,
+            'intervall': PROFIL_INTERVALL,
+            'phasen': phasen,
+            'langsamste_zeilen': zeilen,
+            'nicht_instrumentiert': self.nicht_instrumentiert,
+            'abgeschlossen': self.ende is not None
+        }
+
+
+def _mit_phase(profiler, phase, methode):
+    def gemessen(*args, **kwargs):
+        profiler.betrete(phase)
+        try:
+            return methode(*args, **kwargs)
+        finally:
+            profiler.verlasse()
+    gemessen.__name__ = getattr(methode, '__name__', 'gemessen')
+    return gemessen
+
+
+class _Phasenhuelle:
+    """
+    Hülle um ein von amplpy erzeugtes Objekt: Methoden aus methoden zählen zur jeweiligen Phase,
+    alles andere wird durchgereicht (eintraege: Methoden der Einträge einer Tabelle wie ampl.param)
+    """
+
+    def __init__(self, objekt, methoden, profiler, eintraege=None):
+        self._objekt = objekt
+        self._methoden = methoden
+        self._profiler = profiler
+        self._eintraege = eintraege
+
+    def __getattr__(self, name):
+        wert = getattr(self._objekt, name)
+        phase = self._methoden.get(name)
+        if phase is None or not callable(wert):
+            return wert
+        return _mit_phase(self._profiler, phase, wert)
+
+    def __getitem__(self, schluessel):
+        wert = self._objekt[schluessel]
+        if self._eintraege is None:
+            return wert
+        return _Phasenhuelle(wert, self._eintraege, self._profiler)
+
+    def __setitem__(self, schluessel, wert):
+        phase = self._methoden.get('__setitem__')
+        if phase is None:
+            self._objekt[schluessel] = wert
+            return
+        self._profiler.betrete(phase)
+        try:
+            self._objekt[schluessel] = wert
+        finally:
+            self._profiler.verlasse()
+
+    def __iter__(self):
+        return iter(self._objekt)
+
+    def __len__(self):
+        return len(self._objekt)
+
+    def __str__(self):
+        return str(self._objekt)
+
+    def __repr__(self):
+        return repr(self._objekt)
+
+
+def phasen_klasse(basis, aktiver_profiler):
+    """
+    Unterklasse von basis (amplpy.AMPL) mit Phasenmessung für die Methoden aus PHASEN_METHODEN
+
+    amplpy-Klassen sind unveränderliche Erweiterungstypen - Methoden lassen sich nur in einer
+    Unterklasse ersetzen. Parameter, Sets, Variablen und Zielfunktionen kommen beim Zugriff über
+    die AMPL-Instanz (getParameter, ampl.param[...]) in eine messende Hülle.
+    aktiver_profiler() liefert den Profiler des laufenden Skripts oder None (dann ohne Messung).
+    Auf den instrumentierten Solve der Sonde anwenden, damit deren Arbeit zum Solve zählt.
+
+    Rückgabe: (Klasse, Phasen ohne Messung als 'Klasse/Phase')
+    """
+    attribute = {}
+    gemessen = set()
+
+    def messend(methode, phase):
+        def aufruf(self, *args, **kwargs):
+            profiler = aktiver_profiler()
+            if profiler is None:
+                return methode(self, *args, **kwargs)
+            return _mit_phase(profiler, phase, methode)(self, *args, **kwargs)
+        return aufruf
+
+    def huellend(methode, klassen_name):
+        def aufruf(self, *args, **kwargs):
+            wert = methode(self, *args, **kwargs)
+            profiler = aktiver_profiler()
+            if profiler is None or wert is None:
+                return wert
+            return _Phasenhuelle(wert, PHASEN_METHODEN[klassen_name], profiler)
+        return aufruf
+
+    def tabelle(eigenschaft, methoden, klassen_name):
+        def holen(self):
+            wert = eigenschaft.__get__(self, type(self))
+            profiler = aktiver_profiler()
+            if profiler is None:
+                return wert
+            return _Phasenhuelle(wert, methoden, profiler, PHASEN_METHODEN[klassen_name])
+        return property(holen)
+
+    for name, phase in PHASEN_METHODEN['AMPL'].items():
+        methode = getattr(basis, name, None)
+        if callable(methode):
+            attribute[name] = messend(methode, phase)
+            gemessen.add(('AMPL', phase))
+    for name, klassen_name in ENTITAETEN_ZUGRIFFE.items():
+        methode = getattr(basis, name, None)
+        if callable(methode):
+            attribute[name] = huellend(methode, klassen_name)
+            gemessen.update((klassen_name, phase) for phase in PHASEN_METHODEN[klassen_name].values())
+    for name, (klassen_name, methoden) in ENTITAETEN_TABELLEN.items():
+        eigenschaft = getattr(basis, name, None)
+        if hasattr(eigenschaft, '__get__') and not callable(eigenschaft):
+            attribute[name] = tabelle(eigenschaft, methoden, klassen_name)
+            gemessen.update((klassen_name, phase) for phase in PHASEN_METHODEN[klassen_name].values())
+
+    fehlend = sorted({f"{klassen_name}/{phase}" for klassen_name, methoden in PHASEN_METHODEN.items()
+                      for phase in methoden.values() if (klassen_name, phase) not in gemessen})
+    return type(f"Gemessenes{basis.__name__}", (basis,), attribute), fehlend
+
+
+def formatiere_profil(profil, anlass="Abbruch durch Zeitlimit"):
+    """
+    Profil als Prompt-Block: Phasenanteile und langsamste Zeilen
+    """
+    if not profil or not profil.get('proben'):
+        return ""
+    anteile = ", ".join(f"{PHASEN_NAMEN[phase]} {werte['anteil'] * 100:.0f}%"
+                        for phase, werte in profil['phasen'].items() if werte['anteil'] >= 0.01)
+    block = f"""
+LAUFZEIT-PROFIL (vom System gemessen, {anlass}):
+Zeitanteile: {anteile}
+"""
+    if profil.get('nicht_instrumentiert'):
+        block += f"Ohne Phasenmessung (zählt zu Datenaufbau/Ausgabe): {', '.join(profil['nicht_instrumentiert'])}\n"
+    block += "Langsamste Zeilen:\n"
+    for zeile in profil['langsamste_zeilen'][:PROFIL_PROMPT_ZEILEN]:
+        block += f"  Zeile {zeile['zeile']} ({zeile['anteil'] * 100:.0f}%, {PHASEN_NAMEN[zeile['phase']]}): {zeile['code']}\n"
+    block += ("Beschleunige genau diese Stellen: Daten gesammelt setzen (ganze Dictionaries/DataFrames statt "
+              "Einzelzuweisungen in Schleifen), Ergebnisse mit getValues().toDict() einmal lesen statt getValue je "
+              "Element, Ausgabe auf Werte ungleich 0 begrenzen.\n")
+    return block
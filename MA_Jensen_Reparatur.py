@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - MODELLREPARATUR IN DER OFFENEN SITZUNG
+Ist nur das AMPL-Modell fehlerhaft (Syntax, Doppeldefinition, ungültiger Index), wird nur
+das Modell neu angefordert und in der noch laufenden AMPL-Sitzung des Versuchs gelöst
+"""
+
+import ast
+import re
+
+from MA_Jensen_Duplikate import MODELL_SCHLUESSELWOERTER
+from MA_Jensen_Fehlerauszug import verdichte_fehler
+
+# ===== KONFIGURATION =====
+# Fehlerkategorien (analysiere_fehler_detailliert), die allein im Modelltext liegen können
+REPARATUR_KATEGORIEN = ('AMPL_SYNTAX', 'DOPPELDEFINITION', 'SET_PARAMETER_INCONSISTENZ')
+
+MODELL_REPARATUR_SYSTEM = """Du korrigierst ein fehlerhaftes AMPL-Modell.
+Die Daten sind bereits in der laufenden AMPL-Sitzung geladen - Namen und Indizes aller Sets und
+Parameter müssen deshalb unverändert bleiben. Ändere nur die Deklarationen, die den Fehler verursachen.
+Keine Daten-Anweisungen (data; set ... := ...; param ... := ...;) im Modell!
+Gib NUR das vollständige korrigierte Modell in einem ```ampl Block zurück!"""
+
+
+def _modell_konstante(code):
+    """
+    Die eine String-Konstante mit dem AMPL-Modell (z.B. model_str) oder None
+    """
+    try:
+        baum = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    # Teile von f-Strings lassen sich nicht als eigenes Literal ersetzen
+    in_fstrings = {id(teil) for node in ast.walk(baum) if isinstance(node, ast.JoinedStr) for teil in node.values}
+    kandidaten = [node for node in ast.walk(baum)
+                  if isinstance(node, ast.Constant) and isinstance(node.value, str)
+                  and id(node) not in in_fstrings and MODELL_SCHLUESSELWOERTER.search(node.value)]
+    return kandidaten[0] if len(kandidaten) == 1 else None
+
+
+def ist_modellfehler(fehler_kategorie, code):
+    """
+    Lässt sich der Fehler durch ein korrigiertes Modell in der offenen Sitzung beheben?
+    """
+    return fehler_kategorie in REPARATUR_KATEGORIEN and _modell_konstante(code) is not None
+
+
+def _als_literal(text):
+    if '"""' in text or '\\' in text or text.endswith('"'):
+        return repr(text)
+    return f'"""{text}"""'
+
+
+def setze_modell_ein(code, modell):
+    """
+    Ersetzt die Modell-Konstante im Code durch das korrigierte Modell (oder None)
+
+    Der übrige Code bleibt unverändert, damit Nachweis-Datei und Vorlage vollständig sind.
+    """
+    node = _modell_konstante(code)
+    if node is None:
+        return None
+    # col_offset zählt UTF-8-Bytes
+    roh = code.encode('utf-8')
+    zeilen = roh.splitlines(keepends=True)
+    anfang = sum(len(z) for z in zeilen[:node.lineno - 1]) + node.col_offset
+    ende = sum(len(z) for z in zeilen[:node.end_lineno - 1]) + node.end_col_offset
+    neuer_code = (roh[:anfang] + _als_literal(modell).encode('utf-8') + roh[ende:]).decode('utf-8')
+    try:
+        ast.parse(neuer_code)
+    except (SyntaxError, ValueError):
+        return None
+    return neuer_code
+
+
+def modell_reparatur_prompt(fehler, original_problem, alter_code):
+    """
+    Kurze Anfrage nur für das Modell: Aufgabe als gecachter Block, Modell und Fehler variabel
+    """
+    modell = _modell_konstante(alter_code).value
+    fehler_auszug = verdichte_fehler(fehler)
+    return {
+        'system': [(MODELL_REPARATUR_SYSTEM, True)],
+        'nachricht': [
+            (f"ORIGINAL-AUFGABE: {original_problem}", True),
+            (f"BISHERIGES AMPL-MODELL:\n{modell}\n\nFEHLER BEIM LADEN/LÖSEN:\n{fehler_auszug}", False)
+        ]
+    }
+
+
+def modell_aus_antwort(antwort):
+    """
+    AMPL-Modell aus der Antwort oder None (z.B. wenn doch vollständiger Python-Code kam)
+    """
+    treffer = re.search(r'```(?:ampl|mod)?\s*\n(.*?)```', antwort or '', re.DOTALL)
+    modell = (treffer.group(1) if treffer else antwort or '').strip()
+    if not MODELL_SCHLUESSELWOERTER.search(modell) or re.search(r'\bimport\b|ampl\.\w+\(', modell):
+        return None
+    return modell + "\n"
@@ -0,0 +1,512 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - SOLVER-WERKZEUGE
+Gemeinsame Solver-Funktionen für die Varianten MA_Jensen_Claude.py und MA_Jensen_GPT.py
+"""
+
+import subprocess
+import tempfile
+import hashlib
+import shutil
+import time
+import json
+import re
+import os
+
+# ===== KONFIGURATION =====
+# Jede Konfiguration: Anzeigename, AMPL-Solver und zusätzliche AMPL-Optionen
+PORTFOLIO_KONFIGURATIONEN = [
+    {'name': 'highs', 'solver': 'highs', 'optionen': {}},
+    {'name': 'cbc', 'solver': 'cbc', 'optionen': {}},
+    {'name': 'highs_ipm', 'solver': 'highs', 'optionen': {'highs_options': 'alg:method=ipm'}},
+]
+PORTFOLIO_ZEITLIMIT = 40  # Sekunden - deutlich unter dem Timeout je Versuch, damit ein Rückfall-Solve noch Zeit hat
+PORTFOLIO_RESERVE = 10  # Sekunden, die nach einem Solve für Auswertung und Ausgabe des Skripts bleiben
+
+# Warmstart: letzte zulässige Lösung je Modell-Fingerabdruck
+WARMSTART_DATEI = os.environ.get('MA_JENSEN_WARMSTART_DATEI', 'warmstart_cache.json')
+WARMSTART_MAX_WERTE = 200000  # größere Lösungen werden nicht zwischengespeichert
+# Solver-Optionen für MIP-Start (AMPL/MP-Treiber); Startwerte erhält jeder Solver über die .nl-Datei
+WARMSTART_SOLVER_OPTIONEN = {
+    'highs': 'mip:start=1',
+    'gurobi': 'mip:start=1',
+    'cplex': 'mip:start=1',
+    'xpress': 'mip:start=1',
+    'copt': 'mip:start=1'
+}
+# Solver-Log einschalten, damit parse_solver_log Kennzahlen findet
+SOLVER_LOG_OPTIONEN = {
+    'highs': 'outlev=1',
+    'cbc': 'outlev=1'
+}
+# Zeitlimit je Solve ({} = Sekunden), z.B. für Rückfall-Solves und IIS-Diagnose
+ZEITLIMIT_SOLVER_OPTIONEN = {
+    'highs': 'lim:time={}',
+    'cbc': 'sec={}',
+    'gurobi': 'lim:time={}',
+    'cplex': 'lim:time={}',
+    'xpress': 'lim:time={}',
+    'copt': 'lim:time={}'
+}
+
+
+def _solver_programm(solver):
+    """
+    Pfad des Solver-Programms (aus den amplpy-Modulen oder PATH)
+    """
+    try:
+        from amplpy import modules
+        modules.load()  # Modul-Verzeichnisse in PATH aufnehmen
+    except Exception:
+        pass
+    return shutil.which(solver)
+
+
+def _sol_meldung(sol_datei):
+    """
+    Solver-Meldung am Anfang der .sol-Datei (bis zur Leerzeile / 'Options')
+    """
+    zeilen = []
+    try:
+        with open(sol_datei, 'r', encoding='utf-8', errors='replace') as f:
+            for zeile in f:
+                if not zeile.strip() or zeile.startswith('Options'):
+                    break
+                zeilen.append(zeile.strip())
+    except OSError:
+        return None
+    return " ".join(zeilen)
+
+
+def _solve_result_aus_meldung(meldung):
+    meldung = (meldung or '').lower()
+    for stichwort, ergebnis in (('infeasible', 'infeasible'), ('unbounded', 'unbounded'),
+                                ('limit', 'limit'), ('optimal', 'solved')):
+        if stichwort in meldung:
+            return ergebnis
+    return 'failure'
+
+
+def _starte_nl_solver(instanz, solver, optionen, verzeichnis):
+    """
+    Startet das Solver-Programm (solver stub -AMPL) auf einer Verknüpfung der .nl-Datei in verzeichnis
+
+    AMPL-Optionen wie highs_options werden - wie bei AMPL selbst - als Umgebungsvariablen übergeben.
+    Die Ausgabe landet in verzeichnis/log.txt. Rückgabe: (Popen, Dateistamm)
+    """
+    programm = _solver_programm(solver)
+    if programm is None:
+        raise RuntimeError(f"Solver-Programm '{solver}' nicht gefunden")
+
+    umgebung = dict(os.environ)
+    umgebung.update({option: str(wert) for option, wert in (optionen or {}).items()})
+    zusatz = SOLVER_LOG_OPTIONEN.get(solver)
+    if zusatz:
+        umgebung[f'{solver}_options'] = f"{umgebung.get(f'{solver}_options', '')} {zusatz}".strip()
+
+    # Die .sol-Datei entsteht neben der .nl-Datei
+    stamm = os.path.join(verzeichnis, 'instanz')
+    try:
+        os.link(instanz['nl'], f"{stamm}.nl")
+    except OSError:
+        shutil.copyfile(instanz['nl'], f"{stamm}.nl")
+    with open(os.path.join(verzeichnis, 'log.txt'), 'w', encoding='utf-8') as log:
+        # Gleiche Prozessgruppe wie die Sonde: ein Timeout des Versuchs (killpg) beendet auch die Solver
+        prozess = subprocess.Popen([programm, stamm, '-AMPL'], cwd=verzeichnis, env=umgebung,
+                                   stdout=log, stderr=subprocess.STDOUT)
+    return prozess, stamm
+
+
+def _nl_ergebnis(stamm, solver, solver_zeit):
+    """
+    Ergebnis eines beendeten Solver-Programms aus .sol-Datei und Log
+    """
+    meldung = _sol_meldung(f"{stamm}.sol")
+    with open(os.path.join(os.path.dirname(stamm), 'log.txt'), 'r', encoding='utf-8', errors='replace') as f:
+        log = f.read()
+    ziel = _suche(r'objective\s+(-?[\d.]+(?:[eE][+-]?\d+)?)', meldung or '')
+    return {
+        'solve_result': _solve_result_aus_meldung(meldung) if meldung else 'failure',
+        'zielfunktion': _zahl(ziel),
+        'solver_zeit': solver_zeit,
+        'solver_metriken': parse_solver_log(log, solver),
+        'meldung': meldung or log.strip()[-500:]
+    }
+
+
+def schreibe_instanz(ampl, verzeichnis, stamm='instanz'):
+    """
+    Übersetzt das in ampl geladene Modell nach verzeichnis/<stamm>.nl
+
+    In derselben AMPL-Sitzung - deren solution-Befehl kann die .sol-Datei eines Solvers dann
+    direkt übernehmen. Je Solve genügt eine Übersetzung für Modellanalyse und Portfolio.
+    """
+    start = time.time()
+    vorher = ampl.cd()
+    try:
+        ampl.cd(os.path.abspath(verzeichnis))
+        ampl.eval(f"write g{stamm};")
+    finally:
+        ampl.cd(vorher)
+    nl = os.path.join(os.path.abspath(verzeichnis), f"{stamm}.nl")
+    if not os.path.exists(nl):
+        raise RuntimeError("AMPL hat keine .nl-Datei geschrieben")
+    return {'nl': nl, 'uebersetzung_zeit': time.time() - start}
+
+
+def portfolio_konfigurationen(ampl, konfigurationen=None):
+    """
+    Portfolio-Konfigurationen ergänzt um die Solver-Optionen der Sitzung (z.B. time_limit, mip:start)
+    """
+    ergaenzt = []
+    for konfiguration in konfigurationen or PORTFOLIO_KONFIGURATIONEN:
+        optionen = dict(konfiguration.get('optionen', {}))
+        name = f"{konfiguration['solver']}_options"
+        try:
+            eigene = (ampl.getOption(name) or '').strip()
+        except Exception:
+            eigene = ''
+        if eigene:
+            optionen[name] = f"{eigene} {optionen.get(name, '')}".strip()
+        ergaenzt.append(dict(konfiguration, optionen=optionen))
+    return ergaenzt
+
+
+def _beende_solver(prozess):
+    # Nur das Solver-Programm - die Prozessgruppe gehört dem Versuch
+    try:
+        prozess.kill()
+    except ProcessLookupError:
+        pass
+    prozess.wait()
+
+
+def wettlauf_nl(instanz, verzeichnis, konfigurationen=None, zeitlimit=None):
+    """
+    Solver-Portfolio auf einer übersetzten Instanz: alle Solver-Programme lösen dieselbe .nl-Datei
+    gleichzeitig, das erste bewiesene Optimum gewinnt, die übrigen werden beendet
+
+    Ohne Python-Worker - läuft damit auch in der Sonde, deren __main__ der generierte Code ist.
+    Rückgabe: Gewinner, Zielfunktion, Zeiten und alle Ergebnisse (jedes mit 'sol_datei').
+    """
+    if konfigurationen is None:
+        konfigurationen = PORTFOLIO_KONFIGURATIONEN
+    if zeitlimit is None:
+        zeitlimit = PORTFOLIO_ZEITLIMIT
+
+    start = time.time()
+    laufend = {}
+    ergebnisse = []
+    for konfiguration in konfigurationen:
+        unterverzeichnis = os.path.join(verzeichnis, konfiguration['name'])
+        os.makedirs(unterverzeichnis, exist_ok=True)
+        try:
+            prozess, stamm = _starte_nl_solver(instanz, konfiguration['solver'], konfiguration.get('optionen', {}), unterverzeichnis)
+        except Exception as e:
+            ergebnisse.append({'name': konfiguration['name'], 'solver': konfiguration['solver'], 'solve_result': None,
+                               'fehler': str(e), 'zeit_bis_ergebnis': time.time() - start, 'sol_datei': None})
+            continue
+        laufend[konfiguration['name']] = (prozess, stamm, konfiguration)
+
+    gewinner = None
+    pause = 0.001
+    while laufend and gewinner is None and time.time() - start < zeitlimit:
+        beendet = [name for name, (prozess, _, _) in laufend.items() if prozess.poll() is not None]
+        if not beendet:
+            time.sleep(pause)
+            pause = min(pause * 2, 0.05)
+            continue
+        for name in beendet:
+            prozess, stamm, konfiguration = laufend.pop(name)
+            ergebnis = _nl_ergebnis(stamm, konfiguration['solver'], time.time() - start)
+            ergebnis.update({
+                'name': name,
+                'solver': konfiguration['solver'],
+                'optionen': konfiguration.get('optionen', {}),
+                'zeit_bis_ergebnis': time.time() - start,
+                'sol_datei': f"{stamm}.sol" if os.path.exists(f"{stamm}.sol") else None
+            })
+            ergebnisse.append(ergebnis)
+            if ergebnis['solve_result'] == 'solved' and gewinner is None:
+                gewinner = ergebnis
+
+    # Verlierer und Nachzügler beenden
+    abgebrochen = list(laufend)
+    for prozess, _, _ in laufend.values():
+        _beende_solver(prozess)
+
+    return {
+        'gewinner': gewinner['name'] if gewinner else None,
+        'zielfunktion': gewinner['zielfunktion'] if gewinner else None,
+        'gesamt_zeit': time.time() - start,
+        'zeitlimit': zeitlimit,
+        'ergebnisse': ergebnisse,
+        'abgebrochen': abgebrochen,
+        'instanz': instanz
+    }
+
+
+def modell_fingerabdruck(model_text):
+    """
+    Normalisierter Hash eines AMPL-Modells (ohne Kommentare und Leerraum-Unterschiede)
+    """
+    text = re.sub(r'#[^\n]*', '', model_text)
+    text = re.sub(r'/\*.*?\*/', '', text, flags=re.DOTALL)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def ampl_fingerabdruck(ampl):
+    """
+    Fingerabdruck des aktuell geladenen Modells (nur Deklarationen, ohne Daten)
+    """
+    import tempfile
+    with tempfile.TemporaryDirectory() as verzeichnis:
+        pfad = os.path.join(verzeichnis, 'export.mod')
+        ampl.exportModel(pfad)
+        with open(pfad, 'r', encoding='utf-8', errors='replace') as f:
+            return modell_fingerabdruck(f.read())
+
+
+def lade_warmstart_cache(pfad=None):
+    """
+    Lädt den Warmstart-Cache; fehlende oder defekte Datei ergibt leeren Cache
+    """
+    pfad = pfad or WARMSTART_DATEI
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def speichere_warmstart_cache(cache, pfad=None):
+    """
+    Schreibt den Warmstart-Cache atomar (parallele Läufe sehen nie eine halbe Datei)
+    """
+    pfad = pfad or WARMSTART_DATEI
+    temp_pfad = f"{pfad}.{os.getpid()}.tmp"
+    with open(temp_pfad, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(temp_pfad, pfad)
+
+
+def aktiviere_mipstart(ampl):
+    """
+    Ergänzt die Solver-Optionen um den MIP-Start, falls der Solver ihn unterstützt
+    """
+    solver = (ampl.getOption('solver') or '').strip().lower()
+    zusatz = WARMSTART_SOLVER_OPTIONEN.get(solver)
+    if not zusatz:
+        return False
+    optionen = ampl.getOption(f'{solver}_options') or ''
+    if zusatz not in optionen:
+        ampl.setOption(f'{solver}_options', f"{optionen} {zusatz}".strip())
+    return True
+
+
+def wende_warmstart_an(ampl, fingerabdruck, pfad=None):
+    """
+    Setzt die zuletzt gespeicherte zulässige Lösung als Startpunkt / MIP-Start
+    """
+    info = {'fingerabdruck': fingerabdruck, 'warmstart': False, 'variablen': 0, 'mipstart': False}
+    eintrag = lade_warmstart_cache(pfad).get(fingerabdruck)
+    if not eintrag:
+        return info
+
+    gesetzt = 0
+    for name, werte in eintrag['werte'].items():
+        try:
+            variable = ampl.getVariable(name)
+            startwerte = {(tuple(index) if isinstance(index, list) else index): wert for index, wert in werte}
+            if None in startwerte:
+                variable.setValue(startwerte[None])
+            else:
+                variable.setValues(startwerte)
+            gesetzt += len(startwerte)
+        except Exception:
+            # Variable existiert im neuen Modell nicht mehr oder Indizes passen nicht
+            continue
+
+    if gesetzt:
+        info.update({'warmstart': True, 'variablen': gesetzt, 'mipstart': aktiviere_mipstart(ampl)})
+    return info
+
+
+def speichere_warmstart(ampl, fingerabdruck, solver_zeit, warmstart, pfad=None):
+    """
+    Speichert eine zulässige Lösung und misst die Zeitersparnis gegenüber dem Kaltstart
+    """
+    info = {'fingerabdruck': fingerabdruck, 'solver_zeit': solver_zeit, 'warmstart': warmstart,
+            'kalt_zeit': None, 'ersparnis': None, 'gespeichert': False}
+    solve_result = ampl.getValue('solve_result')
+    if solve_result not in ('solved', 'limit'):
+        return info
+
+    werte = {}
+    anzahl = 0
+    for name, variable in ampl.getVariables():
+        eintraege = []
+        for index, wert in variable.getValues().toDict().items():
+            # Nur Werte ungleich 0 speichern - 0 ist ohnehin der AMPL-Startwert
+            if wert:
+                eintraege.append([list(index) if isinstance(index, tuple) else index, wert])
+        if variable.indexarity() == 0:
+            eintraege = [[None, variable.value()]]
+        anzahl += len(eintraege)
+        werte[name] = eintraege
+    if anzahl > WARMSTART_MAX_WERTE:
+        return info
+
+    cache = lade_warmstart_cache(pfad)
+    eintrag = cache.get(fingerabdruck, {})
+    if warmstart and eintrag.get('kalt_zeit') is not None:
+        info['kalt_zeit'] = eintrag['kalt_zeit']
+        info['ersparnis'] = eintrag['kalt_zeit'] - solver_zeit
+    elif not warmstart:
+        eintrag['kalt_zeit'] = solver_zeit
+
+    eintrag.update({'werte': werte, 'solve_result': solve_result, 'zeitpunkt': time.time()})
+    cache[fingerabdruck] = eintrag
+    speichere_warmstart_cache(cache, pfad)
+    info['gespeichert'] = True
+    return info
+
+
+def aktiviere_solver_log(ampl, solver=None):
+    """
+    Ergänzt die Solver-Optionen um die Log-Ausgabe (HiGHS, CBC); Rückgabe: Solvername
+    """
+    solver = (solver or ampl.getOption('solver') or '').strip().lower()
+    zusatz = SOLVER_LOG_OPTIONEN.get(solver)
+    if zusatz:
+        optionen = ampl.getOption(f'{solver}_options') or ''
+        if zusatz not in optionen:
+            ampl.setOption(f'{solver}_options', f"{optionen} {zusatz}".strip())
+    return solver
+
+
+def setze_zeitlimit(ampl, solver, sekunden):
+    """
+    Ergänzt die Solver-Optionen um ein Zeitlimit; Rückgabe: (Optionsname, vorheriger Wert) zum
+    Zurücksetzen oder None, wenn der Solver kein bekanntes Zeitlimit hat
+    """
+    solver = (solver or ampl.getOption('solver') or '').strip().lower()
+    zusatz = ZEITLIMIT_SOLVER_OPTIONEN.get(solver)
+    if not zusatz:
+        return None
+    name = f'{solver}_options'
+    vorher = ampl.getOption(name) or ''
+    ampl.setOption(name, f"{vorher} {zusatz.format(max(1, int(sekunden)))}".strip())
+    return name, vorher
+
+
+def _zahl(text):
+    try:
+        wert = float(text)
+    except (TypeError, ValueError):
+        return None
+    return None if wert != wert or wert in (float('inf'), float('-inf')) else wert
+
+
+def _suche(muster, log, gruppe=1, flags=re.MULTILINE):
+    treffer = re.search(muster, log, flags)
+    return treffer.group(gruppe) if treffer else None
+
+
+def _parse_highs(log, metriken):
+    reduktion = re.search(r'Reductions: rows (\d+)\((-?\d+)\); columns (\d+)\((-?\d+)\); elements (\d+)\((-?\d+)\)', log)
+    if reduktion:
+        werte = [int(x) for x in reduktion.groups()]
+        metriken['presolve'] = {
+            'zeilen': werte[0], 'zeilen_entfernt': -werte[1],
+            'spalten': werte[2], 'spalten_entfernt': -werte[3],
+            'elemente': werte[4], 'elemente_entfernt': -werte[5]
+        }
+    metriken['status'] = _suche(r'^\s*Status\s+(\S.*?)\s*$', log) or _suche(r'Model\s+status\s*:\s*(.+?)\s*$', log)
+    iterationen = _suche(r'LP iterations\s+(\d+)', log) or _suche(r'(?:Simplex|IPM)\s+iterations:\s*(\d+)', log)
+    metriken['lp_iterationen'] = int(iterationen) if iterationen else None
+    knoten = _suche(r'^\s*Nodes\s+(\d+)', log)
+    metriken['knoten'] = int(knoten) if knoten else None
+    metriken['gap'] = _zahl(_suche(r'^\s*Gap\s+([\d.eE+-]+)%', log))
+    metriken['primal_bound'] = _zahl(_suche(r'Primal bound\s+(\S+)', log))
+    metriken['dual_bound'] = _zahl(_suche(r'Dual bound\s+(\S+)', log))
+    metriken['zeit_gesamt'] = _zahl(_suche(r'Timing\s+([\d.]+)\s+\(total\)', log) or _suche(r'HiGHS run time\s*:\s*([\d.]+)', log))
+
+    # B&B-Tabelle: Proc. InQueue Leaves Expl. BestBound BestSol Gap ... Time
+    zeile_muster = re.compile(r'^\s*[A-Z]?\s+(\d+)\s+(\d+)\s+(\d+)\s+[\d.]+%\s+(\S+)\s+(\S+)\s+(\S+)\s.*?([\d.]+)s\s*$', re.MULTILINE)
+    for treffer in zeile_muster.finditer(log):
+        verarbeitet, schranke, loesung, zeit = int(treffer.group(1)), _zahl(treffer.group(4)), _zahl(treffer.group(5)), _zahl(treffer.group(7))
+        if verarbeitet == 0 and schranke is not None:
+            metriken['root_bound'] = schranke
+        if loesung is not None and metriken.get('zeit_erste_loesung') is None:
+            metriken['zeit_erste_loesung'] = zeit
+
+
+def _parse_cbc(log, metriken):
+    verarbeitet = re.search(r'processed model has (\d+) rows, (\d+) columns.*?and (\d+) elements', log)
+    if verarbeitet:
+        metriken['presolve'] = {'zeilen': int(verarbeitet.group(1)), 'spalten': int(verarbeitet.group(2)),
+                                'elemente': int(verarbeitet.group(3))}
+    metriken['status'] = _suche(r'^Result - (.+?)\s*$', log) or _suche(r'CBC \d+\.\d+\S*: (.+?)[;.]', log)
+    iterationen = _suche(r'Total iterations:\s*(\d+)', log) or _suche(r'took (\d+) iterations', log)
+    metriken['lp_iterationen'] = int(iterationen) if iterationen else None
+    knoten = _suche(r'Enumerated nodes:\s*(\d+)', log) or _suche(r'iterations and (\d+) nodes', log)
+    metriken['knoten'] = int(knoten) if knoten else None
+    gap = _zahl(_suche(r'^Gap:\s*(\S+)', log))
+    metriken['gap'] = gap * 100 if gap is not None else None
+    metriken['primal_bound'] = _zahl(_suche(r'^Objective value:\s*(\S+)', log))
+    metriken['dual_bound'] = _zahl(_suche(r'^Lower bound:\s*(\S+)', log))
+    metriken['root_bound'] = _zahl(_suche(r'At root node, .*? to (\S+)', log))
+    metriken['zeit_erste_loesung'] = _zahl(_suche(r'(?:Integer solution of|Solution found of) \S+ .*?\(([\d.]+) seconds\)', log))
+    metriken['zeit_gesamt'] = _zahl(_suche(r'Wallclock seconds\):\s*([\d.]+)', log))
+
+
+def parse_solver_log(log, solver):
+    """
+    Kennzahlen aus dem HiGHS- bzw. CBC-Log: Presolve, LP-Iterationen, Knoten, Gap,
+    Root-Schranke, Zeit bis zur ersten Lösung und Gesamtzeit des Solvers
+    """
+    solver = (solver or '').strip().lower()
+    metriken = {
+        'solver': solver,
+        'status': None,
+        'presolve': None,
+        'lp_iterationen': None,
+        'knoten': None,
+        'gap': None,
+        'primal_bound': None,
+        'dual_bound': None,
+        'root_bound': None,
+        'zeit_erste_loesung': None,
+        'zeit_gesamt': None
+    }
+    if not log:
+        return metriken
+    if solver == 'highs':
+        _parse_highs(log, metriken)
+    elif solver == 'cbc':
+        _parse_cbc(log, metriken)
+    return metriken
+
+
+def summiere_solver_metriken(versuche):
+    """
+    Aggregat über alle Solves eines Laufs: Solver-Zeit laut Log vs. Modellaufbau, Iterationen, Knoten
+    """
+    summe = {'solves': 0, 'solves_mit_log': 0, 'solver_zeit': 0.0, 'modellierung_zeit': 0.0,
+             'lp_iterationen': 0, 'knoten': 0, 'max_gap': None}
+    for versuch in versuche:
+        for solve in versuch.get('solves', []):
+            summe['solves'] += 1
+            metriken = solve.get('solver_metriken')
+            if not metriken or metriken['zeit_gesamt'] is None:
+                continue
+            summe['solves_mit_log'] += 1
+            summe['solver_zeit'] += metriken['zeit_gesamt']
+            summe['modellierung_zeit'] += solve.get('modellierung_zeit', 0.0)
+            summe['lp_iterationen'] += metriken['lp_iterationen'] or 0
+            summe['knoten'] += metriken['knoten'] or 0
+            if metriken['gap'] is not None:
+                summe['max_gap'] = max(summe['max_gap'] or 0.0, metriken['gap'])
+    return summe
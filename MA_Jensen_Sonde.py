@@ -0,0 +1,667 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - AUSFÜHRUNGSSONDE
+Führt generierten Code aus und instrumentiert dabei amplpy (Warmstart, Solver-Portfolio, Messwerte, Solver-Log,
+Modellanalyse, IIS-Diagnose bei Unzulässigkeit, optional Laufzeitprofil)
+
+Aufruf durch fuehre_code_aus:
+    python MA_Jensen_Sonde.py temp_code.py
+    python MA_Jensen_Sonde.py --warm   (vorgestartet, Auftrag als JSON-Zeile über stdin)
+    python MA_Jensen_Sonde.py --sitzung   (Reparatursitzung: Aufträge und Antworten als JSON-Zeilen)
+Messwerte werden als JSON in die Datei aus MA_JENSEN_SONDE_BERICHT geschrieben.
+"""
+
+import collections
+import contextlib
+import traceback
+import threading
+import tempfile
+import shutil
+import runpy
+import time
+import json
+import sys
+import os
+
+# Ergebnisse aller ampl.solve()-Aufrufe des generierten Codes
+_bericht = {
+    'solves': []
+}
+_bericht_lock = threading.Lock()  # Profiler schreibt Zwischenstände aus eigenem Thread
+# Sitzungsmodus: AMPL-Instanz des Skripts bleibt für Modellkorrekturen erhalten
+_sitzung = {
+    'ampl': None,
+    'wiederverwenden': False
+}
+_instrumentiert = False
+# Beginn des laufenden Versuchs - Zeitbudget für Portfolio und Rückfall-Solve (MA_JENSEN_ZEITLIMIT)
+_versuch = {
+    'start': time.time()
+}
+# Laufzeitprofil: Profiler des laufenden Skripts und Phasen, die sich nicht messen lassen
+_profil = {
+    'profiler': None,
+    'nicht_instrumentiert': []
+}
+
+
+def _schreibe_bericht():
+    """
+    Schreibt die gesammelten Messwerte für den aufrufenden Prozess
+    """
+    pfad = os.environ.get('MA_JENSEN_SONDE_BERICHT')
+    if not pfad:
+        return
+    with _bericht_lock:
+        # Atomar ersetzen: bei Timeout wird der Prozess mitten im Schreiben beendet
+        temp_pfad = f"{pfad}.tmp"
+        with open(temp_pfad, 'w', encoding='utf-8') as f:
+            json.dump(_bericht, f, default=str)
+        os.replace(temp_pfad, pfad)
+
+
+def _profil_zwischenstand(profil):
+    _bericht['profil'] = profil
+    _schreibe_bericht()
+
+
+def setze_ressourcenlimits():
+    """
+    Setzt die Limits aus MA_JENSEN_LIMITS (z.B. {"RLIMIT_CPU": 300}) als weiche Grenzen
+
+    Kindprozesse (AMPL, Solver) erben die Limits jeweils für sich.
+    """
+    limits = json.loads(os.environ.get('MA_JENSEN_LIMITS') or '{}')
+    try:
+        import resource
+    except ImportError:
+        # Windows: keine rlimits
+        return
+    for name, wert in limits.items():
+        art = getattr(resource, name, None)
+        if art is None:
+            continue
+        _, hart = resource.getrlimit(art)
+        weich = wert if hart == resource.RLIM_INFINITY else min(wert, hart)
+        try:
+            resource.setrlimit(art, (weich, hart))
+        except (ValueError, OSError):
+            pass
+
+
+class _Mitschnitt:
+    """
+    Output-Handler für die Dauer eines Solves: gibt alles wie gewohnt aus und
+    behält Anfang und Ende des Solver-Logs für parse_solver_log
+    """
+    MAX_TEILE = 2000
+
+    def __init__(self, vorher):
+        self.vorher = vorher
+        self.anfang = []
+        self.ende = collections.deque(maxlen=self.MAX_TEILE)
+
+    def output(self, kind, msg):
+        if len(self.anfang) < self.MAX_TEILE:
+            self.anfang.append(msg)
+        else:
+            self.ende.append(msg)
+        if self.vorher is not None:
+            self.vorher.output(kind, msg)
+        else:
+            print(msg, end='')
+
+    def text(self):
+        return ''.join(self.anfang) + ''.join(self.ende)
+
+
+def _setze_output_handler(ampl, handler):
+    setzen = getattr(ampl, 'set_output_handler', None) or ampl.setOutputHandler
+    setzen(handler)
+
+
+def _hole_output_handler(ampl):
+    holen = getattr(ampl, 'get_output_handler', None) or ampl.getOutputHandler
+    return holen()
+
+
+def _setze_ampl_klasse(amplpy, klasse):
+    # Generierter Code importiert 'from amplpy import AMPL' - beide Fundorte ersetzen
+    amplpy.AMPL = klasse
+    ampl_modul = getattr(amplpy, 'ampl', None)
+    if ampl_modul is not None and hasattr(ampl_modul, 'AMPL'):
+        ampl_modul.AMPL = klasse
+
+
+def _instrumentiere_ampl():
+    """
+    Ersetzt amplpy.AMPL durch eine Unterklasse, deren solve Warmstart, Zeitmessung und
+    Solver-Log-Auswertung ergänzt, und modules.install durch die zwischengespeicherte Installation
+
+    amplpy.AMPL ist ein unveränderlicher Erweiterungstyp: solve lässt sich nur in einer Unterklasse
+    ersetzen. Die Schalter (MA_JENSEN_WARMSTART, ...) werden je Solve gelesen - vorgestartete
+    Prozesse werden instrumentiert, bevor der Auftrag mit seiner Umgebung eintrifft.
+    """
+    import amplpy
+    from amplpy import modules
+    from MA_Jensen_Solver import ampl_fingerabdruck, wende_warmstart_an, speichere_warmstart, \
+        aktiviere_solver_log, parse_solver_log, schreibe_instanz
+    from MA_Jensen_Modell import analysiere_modell, ergaenze_nach_solve
+    from MA_Jensen_Diagnose import diagnostiziere_unzulaessigkeit
+    from MA_Jensen_Start import installiere_module_einmalig
+
+    # modules.install() im generierten Code prüft die Installation nur einmal pro Umgebung
+    modules._ma_jensen_original_install = modules.install
+    modules.install = installiere_module_einmalig
+
+    def instrumentierter_solve(self, original_solve, args, kwargs):
+        warmstart_aktiv = os.environ.get('MA_JENSEN_WARMSTART') == '1'
+        solver_log_aktiv = os.environ.get('MA_JENSEN_SOLVER_LOG') == '1'
+        modellanalyse_aktiv = os.environ.get('MA_JENSEN_MODELLANALYSE') == '1'
+        iis_aktiv = os.environ.get('MA_JENSEN_IIS') == '1'
+        portfolio_aktiv = os.environ.get('MA_JENSEN_PORTFOLIO') == '1'
+
+        fingerabdruck = None
+        warmstart = {'warmstart': False}
+        if warmstart_aktiv:
+            try:
+                fingerabdruck = ampl_fingerabdruck(self)
+                warmstart = wende_warmstart_an(self, fingerabdruck)
+            except Exception as e:
+                warmstart = {'warmstart': False, 'fehler': str(e)}
+
+        # Wettlauf nur für den üblichen solve() bzw. solve(solver=...) - nicht für Teilprobleme.
+        # Eine Übersetzung je Solve: Portfolio und Modellanalyse lesen dieselbe .nl-Datei
+        portfolio = None
+        instanz = None
+        verzeichnis = None
+        if portfolio_aktiv and not args and set(kwargs) <= {'solver', 'verbose'}:
+            verzeichnis = tempfile.mkdtemp(prefix='ma_jensen_portfolio_')
+            try:
+                instanz = schreibe_instanz(self, verzeichnis)
+            except Exception as e:
+                portfolio = {'fehler': str(e), 'uebernommen': None}
+
+        # Modell und Daten sind geladen: Größe und Struktur vor dem Solve erfassen
+        analyse = None
+        if modellanalyse_aktiv:
+            try:
+                analyse = analysiere_modell(self, instanz)
+            except Exception as e:
+                analyse = {'fehler': str(e)}
+
+        # Solver-Log einschalten und mitschneiden (solve(problem, solver, ...) in amplpy)
+        mitschnitt = None
+        solver = None
+        if solver_log_aktiv:
+            try:
+                solver = aktiviere_solver_log(self, kwargs.get('solver') or (args[1] if len(args) > 1 else None))
+                mitschnitt = _Mitschnitt(_hole_output_handler(self))
+                _setze_output_handler(self, mitschnitt)
+            except Exception:
+                mitschnitt = None
+
+        start = time.time()
+        try:
+            if instanz is not None:
+                try:
+                    portfolio = _loese_im_wettlauf(self, instanz, verzeichnis, _restzeit())
+                except Exception as e:
+                    portfolio = {'fehler': str(e), 'uebernommen': None}
+                if portfolio['uebernommen']:
+                    return None
+            if portfolio is not None:
+                return _loese_mit_restzeit(self, original_solve, kwargs, portfolio)
+            return original_solve(*args, **kwargs)
+        finally:
+            if verzeichnis is not None:
+                shutil.rmtree(verzeichnis, ignore_errors=True)
+            solver_zeit = time.time() - start
+            eintrag = {'solver_zeit': solver_zeit, 'warmstart': warmstart}
+            # Ergebnis des Solves (z.B. für den Abgleich der Zielfunktion zwischen Providern)
+            try:
+                eintrag['solve_result'] = self.getValue('solve_result')
+                for _, objective in self.getObjectives():
+                    eintrag['zielfunktion'] = objective.value()
+                    break
+            except Exception:
+                pass
+            if analyse is not None:
+                if 'fehler' not in analyse:
+                    ergaenze_nach_solve(self, analyse)
+                eintrag['modellanalyse'] = analyse
+            if mitschnitt is not None:
+                try:
+                    _setze_output_handler(self, mitschnitt.vorher)
+                except Exception:
+                    pass
+                metriken = parse_solver_log(mitschnitt.text(), solver)
+                eintrag['solver_metriken'] = metriken
+                # Differenz zwischen Wandzeit und Solver-Zeit: Modellaufbau, Übersetzung, Datentransfer
+                if metriken['zeit_gesamt'] is not None:
+                    eintrag['modellierung_zeit'] = max(0.0, solver_zeit - metriken['zeit_gesamt'])
+            if portfolio is not None:
+                eintrag['portfolio'] = portfolio
+                # Log des Gewinners statt des (leeren) AMPL-Mitschnitts
+                metriken = portfolio.get('solver_metriken')
+                if metriken is not None:
+                    eintrag['solver_metriken'] = metriken
+                    if metriken['zeit_gesamt'] is not None:
+                        eintrag['modellierung_zeit'] = max(0.0, solver_zeit - metriken['zeit_gesamt'])
+            if fingerabdruck:
+                try:
+                    eintrag['warmstart'].update(
+                        speichere_warmstart(self, fingerabdruck, solver_zeit, warmstart['warmstart'])
+                    )
+                except Exception as e:
+                    eintrag['warmstart']['fehler'] = str(e)
+            # Unzulässig: widersprüchliche Nebenbedingungen auf dem geladenen Modell bestimmen
+            if iis_aktiv:
+                try:
+                    if self.getValue('solve_result') == 'infeasible':
+                        zeitlimit = _iis_zeitlimit(solver_zeit)
+                        if zeitlimit is None or zeitlimit >= 1:
+                            eintrag['iis'] = diagnostiziere_unzulaessigkeit(self, zeitlimit)
+                        else:
+                            eintrag['iis'] = {'fehler': 'keine Restzeit für die Diagnose'}
+                except Exception as e:
+                    eintrag['iis'] = {'fehler': str(e)}
+            _bericht['solves'].append(eintrag)
+            _schreibe_bericht()
+
+    class InstrumentiertesAMPL(amplpy.AMPL):
+        def solve(self, *args, **kwargs):
+            return instrumentierter_solve(self, super().solve, args, kwargs)
+
+    # Phasenmessung außen um den instrumentierten Solve - die Sonden-Arbeit zählt zum Solve
+    klasse = InstrumentiertesAMPL
+    try:
+        from MA_Jensen_Profil import phasen_klasse
+        klasse, _profil['nicht_instrumentiert'] = phasen_klasse(InstrumentiertesAMPL, lambda: _profil['profiler'])
+    except Exception as e:
+        _profil['nicht_instrumentiert'] = [f"alle Phasen ({type(e).__name__}: {e})"]
+    _setze_ampl_klasse(amplpy, klasse)
+
+
+def _restzeit():
+    """
+    Verbleibende Sekunden des Versuchs (MA_JENSEN_ZEITLIMIT) oder None ohne Zeitlimit
+    """
+    try:
+        zeitlimit = float(os.environ.get('MA_JENSEN_ZEITLIMIT') or 0)
+    except ValueError:
+        return None
+    if zeitlimit <= 0:
+        return None
+    return zeitlimit - (time.time() - _versuch['start'])
+
+
+def _iis_zeitlimit(solver_zeit):
+    """
+    Zeitlimit der IIS-Diagnose aus der Restzeit des Versuchs (None: Standard IIS_ZEITLIMIT)
+
+    Abgezogen werden der abschließende Solve des vollständigen Modells (etwa so lang wie der
+    ursprüngliche Solve) und die Reserve für das Skript danach.
+    """
+    from MA_Jensen_Diagnose import IIS_ZEITLIMIT
+    from MA_Jensen_Solver import PORTFOLIO_RESERVE
+
+    restzeit = _restzeit()
+    if restzeit is None:
+        return None
+    return min(IIS_ZEITLIMIT, restzeit - solver_zeit - PORTFOLIO_RESERVE)
+
+
+def _loese_im_wettlauf(ampl, instanz, verzeichnis, restzeit=None):
+    """
+    Solver-Portfolio statt des einzelnen Solves: alle Solver lösen die in der Sitzung übersetzte
+    Instanz (schreibe_instanz) parallel, AMPLs solution-Befehl übernimmt die Lösung des Gewinners
+
+    Der Wettlauf nutzt höchstens die Hälfte der Restzeit - die andere Hälfte bleibt dem Rückfall.
+    Rückgabe: Portfolio-Info; 'uebernommen' ist None, wenn kein Solver eine Lösung geliefert hat
+    (dann löst AMPL mit der verbleibenden Zeit, siehe _loese_mit_restzeit)
+    """
+    from MA_Jensen_Solver import wettlauf_nl, portfolio_konfigurationen, PORTFOLIO_ZEITLIMIT
+
+    zeitlimit = PORTFOLIO_ZEITLIMIT if restzeit is None else max(0.0, min(PORTFOLIO_ZEITLIMIT, restzeit / 2))
+    portfolio = wettlauf_nl(instanz, verzeichnis, portfolio_konfigurationen(ampl), zeitlimit)
+    # Gewinner mit bewiesenem Optimum, sonst die erste eindeutige Antwort (z.B. unzulässig)
+    kandidaten = [ergebnis for ergebnis in portfolio['ergebnisse'] if ergebnis.get('sol_datei')]
+    bestes = next((e for e in kandidaten if e['name'] == portfolio['gewinner']), None) or \
+        next((e for e in kandidaten if e['solve_result'] in ('infeasible', 'unbounded')), None)
+    portfolio['uebernommen'] = None
+    if bestes is not None:
+        ampl.eval(f'solution "{bestes["sol_datei"]}";')
+        # Meldung nur im Bericht - stdout gehört dem generierten Code
+        portfolio['meldung'] = bestes['meldung']
+        portfolio['uebernommen'] = bestes['name']
+        portfolio['solver_metriken'] = bestes['solver_metriken']
+    # Dateien werden gleich gelöscht - nur die Kennzahlen bleiben im Bericht
+    portfolio['instanz'] = {'uebersetzung_zeit': instanz['uebersetzung_zeit']}
+    for ergebnis in portfolio['ergebnisse']:
+        ergebnis.pop('sol_datei', None)
+    return portfolio
+
+
+def _loese_mit_restzeit(ampl, original_solve, kwargs, portfolio):
+    """
+    Rückfall nach einem Wettlauf ohne Lösung: einzelner Solve, begrenzt auf die Restzeit des Versuchs
+
+    Reicht die Restzeit nicht mehr, entfällt der Solve (solve_result bleibt ungelöst) - so
+    verdoppelt der Rückfall den schlechtesten Fall nicht über den Timeout des Versuchs hinaus.
+    """
+    from MA_Jensen_Solver import setze_zeitlimit, PORTFOLIO_RESERVE
+
+    restzeit = _restzeit()
+    if restzeit is None:
+        portfolio['rueckfall'] = 'ohne_zeitlimit'
+        return original_solve(**kwargs)
+    budget = restzeit - PORTFOLIO_RESERVE
+    if budget < 1:
+        portfolio['rueckfall'] = 'uebersprungen'
+        print("Solver-Portfolio ohne Lösung, keine Zeit für einen weiteren Solve", file=sys.stderr)
+        return None
+    portfolio['rueckfall'] = {'zeitlimit': int(budget)}
+    zuruecksetzen = None
+    try:
+        zuruecksetzen = setze_zeitlimit(ampl, kwargs.get('solver'), budget)
+    except Exception as e:
+        portfolio['rueckfall']['fehler'] = str(e)
+    try:
+        return original_solve(**kwargs)
+    finally:
+        if zuruecksetzen is not None:
+            ampl.setOption(*zuruecksetzen)
+
+
+def _instrumentiere_einmal():
+    """
+    Instrumentiert amplpy einmal je Prozess - ein Fehler dabei bricht den Lauf nie ab
+    """
+    global _instrumentiert
+    if _instrumentiert:
+        return
+    _instrumentiert = True
+    try:
+        _instrumentiere_ampl()
+    except ImportError:
+        # Ohne amplpy läuft der Code trotzdem und scheitert mit dem üblichen Fehler
+        pass
+    except Exception as e:
+        # z.B. geänderte amplpy-Klassen: Code läuft ohne Messwerte, der Grund steht im Bericht
+        _bericht['instrumentierung_fehler'] = f"{type(e).__name__}: {e}"
+        _profil['nicht_instrumentiert'] = [f"alle Phasen ({type(e).__name__}: {e})"]
+
+
+def lies_sondenbericht(pfad):
+    """
+    Liest und entfernt den Sonden-Bericht eines Versuchs (leer, falls keiner geschrieben wurde)
+    """
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            bericht = json.load(f)
+    except (OSError, ValueError):
+        bericht = {'solves': []}
+    if os.path.exists(pfad):
+        os.unlink(pfad)
+    return bericht
+
+
+def starte_skript(skript, argumente=()):
+    """
+    Startet ein Skript wie 'python skript.py argumente...'
+    """
+    skript = os.path.abspath(skript)
+    sys.argv = [skript] + list(argumente)
+    _versuch['start'] = time.time()
+    # Wie bei 'python skript.py': Verzeichnis des Skripts zuerst im Suchpfad
+    sys.path.insert(0, os.path.dirname(skript))
+
+    # Vor dem Skript: AMPL() im generierten Code liefert die instrumentierte Klasse
+    _instrumentiere_einmal()
+
+    # Laufzeitprofil: Stichproben des Hauptthreads, Phasen über die amplpy-Aufrufe
+    profiler = None
+    if os.environ.get('MA_JENSEN_PROFIL') == '1':
+        from MA_Jensen_Profil import Profiler
+        profiler = Profiler(skript, bei_zwischenstand=_profil_zwischenstand,
+                            nicht_instrumentiert=_profil['nicht_instrumentiert'])
+        _profil['profiler'] = profiler
+        profiler.starte()
+
+    try:
+        runpy.run_path(skript, run_name='__main__')
+    finally:
+        if profiler is not None:
+            profiler.stoppe()
+            _profil['profiler'] = None
+            _bericht['profil'] = profiler.ergebnis()
+        _schreibe_bericht()
+
+
+def _waerme_vor():
+    """
+    Lädt amplpy und startet eine AMPL-Instanz, bevor der Auftrag eintrifft
+
+    Der erste AMPL()-Aufruf des generierten Codes erhält diese Instanz.
+    """
+    try:
+        import amplpy
+        from MA_Jensen_Start import installiere_module_einmalig
+
+        installiere_module_einmalig()
+        # Vorrat aus der instrumentierten Klasse - sonst fehlen dem Skript die Messwerte
+        _instrumentiere_einmal()
+        basis = amplpy.AMPL
+        vorrat = [basis()]
+
+        class WarmesAMPL(basis):
+            def __new__(cls, *args, **kwargs):
+                if vorrat and not args and not kwargs:
+                    # Instanz der Basisklasse - __init__ wird dadurch nicht erneut aufgerufen
+                    return vorrat.pop()
+                return super().__new__(cls)
+
+        _setze_ampl_klasse(amplpy, WarmesAMPL)
+    except Exception:
+        # Ohne Vorwärmen verhält sich der Prozess wie ein normaler Start
+        pass
+
+
+def warmer_modus():
+    """
+    Vorgestarteter Prozess: vorwärmen, dann einen Auftrag aus stdin ausführen
+
+    Auftrag: {"skript": ..., "argumente": [...], "arbeitsverzeichnis": ..., "umgebung": {...}}
+    """
+    _waerme_vor()
+    zeile = sys.stdin.readline()
+    if not zeile.strip():
+        return
+    auftrag = json.loads(zeile)
+    os.environ.update(auftrag.get('umgebung', {}))
+    os.chdir(auftrag['arbeitsverzeichnis'])
+    starte_skript(auftrag['skript'], auftrag.get('argumente', []))
+
+
+def _merke_ampl_instanz():
+    """
+    AMPL() im generierten Code liefert eine Instanz, die die Sitzung behält
+
+    Bei wiederverwenden (erneuter Skriptlauf nach einer Korrektur) kommt dieselbe Instanz zurück.
+    """
+    import amplpy
+    vorher = amplpy.AMPL
+
+    class SitzungsAMPL(vorher):
+        def __new__(cls, *args, **kwargs):
+            if _sitzung['wiederverwenden'] and _sitzung['ampl'] is not None:
+                return _sitzung['ampl']
+            # Keine Instanz von cls - __init__ wird dadurch nicht erneut aufgerufen
+            instanz = vorher(*args, **kwargs)
+            _sitzung['ampl'] = instanz
+            return instanz
+
+    _setze_ampl_klasse(amplpy, SitzungsAMPL)
+
+
+@contextlib.contextmanager
+def _leite_ausgabe_um(verzeichnis):
+    """
+    stdout/stderr (auch von AMPL und Solver) in stdout.txt/stderr.txt des Versuchsverzeichnisses
+    """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    gesichert = [os.dup(1), os.dup(2)]
+    dateien = [open(os.path.join(verzeichnis, name), 'wb') for name in ('stdout.txt', 'stderr.txt')]
+    try:
+        for fd, datei in zip((1, 2), dateien):
+            os.dup2(datei.fileno(), fd)
+        yield
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        for fd, alt in zip((1, 2), gesichert):
+            os.dup2(alt, fd)
+            os.close(alt)
+        for datei in dateien:
+            datei.close()
+
+
+def _rueckgabe(ausnahme):
+    # Rückgabewert wie beim Prozessende mit sys.exit(...)
+    if ausnahme.code is None:
+        return 0
+    if isinstance(ausnahme.code, int):
+        return ausnahme.code
+    print(ausnahme.code, file=sys.stderr)
+    return 1
+
+
+def _fuehre_in_sitzung_aus(skript):
+    try:
+        starte_skript(skript)
+    except SystemExit as e:
+        return _rueckgabe(e)
+    except BaseException:
+        traceback.print_exc()
+        return 1
+    return 0
+
+
+def _loese_an_ort_und_stelle(ampl, modell):
+    """
+    Daten der Sitzung sichern, Modell zurücksetzen und korrigiert laden, Daten zurückspielen, lösen
+
+    Nur die Prüfung des korrigierten Modells auf den vorhandenen Daten - die Ausgabe erzeugt danach
+    der korrigierte Code selbst. Rückgabe: solve_result oder None, wenn die Sitzung keine Daten hat
+    """
+    try:
+        ampl.exportData('data.dat')
+        with open('data.dat', 'r', encoding='utf-8', errors='replace') as f:
+            daten_vorhanden = ':=' in f.read()
+    except Exception:
+        daten_vorhanden = False
+    if not daten_vorhanden:
+        if os.path.exists('data.dat'):
+            os.unlink('data.dat')
+        return None
+    ampl.reset()
+    with open('model.mod', 'w', encoding='utf-8') as f:
+        f.write(modell)
+    ampl.read('model.mod')
+    ampl.readData('data.dat')
+    ampl.solve()
+    return ampl.getValue('solve_result')
+
+
+def _repariere_in_sitzung(auftrag):
+    """
+    Korrigiertes Modell auf die geladenen Daten anwenden
+
+    Scheitert es dort, endet die Reparatur ohne erneuten Lauf des Codes. Sonst läuft der korrigierte
+    Code in derselben Sitzung - ohne Prozess- und AMPL-Start - und erzeugt mit seiner eigenen
+    Auswertung nach dem Solve die Ausgabe (mit Warmstart aus der Prüfung meist ohne Suche).
+    Fehlen die Daten (Skript scheiterte schon beim Laden des Modells), läuft er ohne Prüfung.
+    """
+    ampl = _sitzung['ampl']
+    try:
+        solve_result = _loese_an_ort_und_stelle(ampl, auftrag['modell'])
+    except SystemExit as e:
+        return _rueckgabe(e), 'daten_behalten'
+    except BaseException:
+        traceback.print_exc()
+        return 1, 'daten_behalten'
+    finally:
+        _schreibe_bericht()
+
+    if solve_result is not None and solve_result != 'solved':
+        print(f"Reparatur: solve_result = {solve_result}", file=sys.stderr)
+        return 1, 'daten_behalten'
+    ampl.reset()
+    _sitzung['wiederverwenden'] = True
+    rueckgabe = _fuehre_in_sitzung_aus(auftrag['skript'])
+    return rueckgabe, 'skript_erneut' if solve_result is None else 'daten_behalten'
+
+
+def sitzungs_modus():
+    """
+    Reparatursitzung: Versuch ausführen und die AMPL-Sitzung danach für Modellkorrekturen offen halten
+
+    Aufträge über stdin (je eine JSON-Zeile), Antworten über das ursprüngliche stdout:
+        {"befehl": "ausfuehren", "skript": ..., "arbeitsverzeichnis": ..., "umgebung": {...}}
+        {"befehl": "reparieren", "modell": ..., "skript": ..., "arbeitsverzeichnis": ..., "umgebung": {...}}
+    Die Ausgaben des Skripts landen in stdout.txt/stderr.txt des jeweiligen Arbeitsverzeichnisses.
+    """
+    # Antwortkanal vor der Umleitung sichern (dup liefert nicht vererbbare Deskriptoren)
+    antworten = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    # Zuerst instrumentieren: die Sitzung erzeugt ihre Instanzen aus der instrumentierten Klasse
+    _instrumentiere_einmal()
+    try:
+        _merke_ampl_instanz()
+    except Exception:
+        # Ohne amplpy (oder unpassende Klasse) gibt es keine Modellkorrektur in der Sitzung
+        pass
+
+    for zeile in iter(sys.stdin.readline, ''):
+        if not zeile.strip():
+            continue
+        auftrag = json.loads(zeile)
+        os.environ.update(auftrag.get('umgebung', {}))
+        os.chdir(auftrag['arbeitsverzeichnis'])
+        _bericht['solves'] = []
+        _bericht.pop('profil', None)
+        start = _versuch['start'] = time.time()
+        with _leite_ausgabe_um(auftrag['arbeitsverzeichnis']):
+            if auftrag['befehl'] == 'reparieren' and _sitzung['ampl'] is not None:
+                rueckgabe, modus = _repariere_in_sitzung(auftrag)
+            elif auftrag['befehl'] == 'reparieren':
+                rueckgabe, modus = 1, 'keine_sitzung'
+                print("Keine AMPL-Sitzung vorhanden", file=sys.stderr)
+            else:
+                rueckgabe, modus = _fuehre_in_sitzung_aus(auftrag['skript']), 'ausfuehren'
+        antworten.write(json.dumps({
+            'rueckgabe': rueckgabe,
+            'modus': modus,
+            'zeit': time.time() - start,
+            'ampl': _sitzung['ampl'] is not None
+        }) + "\n")
+        antworten.flush()
+
+
+def main():
+    """
+    Startet das Skript aus sys.argv[1] wie 'python skript.py'
+    """
+    # Limits vor amplpy, AMPL-Start und generiertem Code setzen
+    setze_ressourcenlimits()
+    if sys.argv[1] == '--warm':
+        warmer_modus()
+    elif sys.argv[1] == '--sitzung':
+        sitzungs_modus()
+    else:
+        starte_skript(sys.argv[1], sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - SCHNELLER START
+AMPL-Module nur einmal pro Python-Umgebung installieren, danach nur noch laden
+"""
+
+import hashlib
+import time
+import json
+import sys
+import os
+
+# ===== KONFIGURATION =====
+CACHE_VERZEICHNIS = os.environ.get('MA_JENSEN_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'ma_jensen'))
+
+
+def _umgebungs_schluessel(argumente):
+    """
+    Schlüssel aus Interpreter, amplpy-Version und Installationsargumenten
+    """
+    import importlib.metadata  # erst hier importiert: kostet beim Start spürbar Zeit
+
+    try:
+        amplpy_version = importlib.metadata.version('amplpy')
+    except importlib.metadata.PackageNotFoundError:
+        amplpy_version = 'fehlt'
+    roh = f"{sys.executable}|{amplpy_version}|{argumente}"
+    return hashlib.sha256(roh.encode('utf-8')).hexdigest()[:16]
+
+
+def installiere_module_einmalig(*args, **kwargs):
+    """
+    Ersatz für modules.install(): installiert nur beim ersten Aufruf je Umgebung
+
+    Rückgabe: 'cache' (nur geladen) oder 'installiert'
+    """
+    from amplpy import modules
+
+    marker = os.path.join(CACHE_VERZEICHNIS, f"module_{_umgebungs_schluessel(repr((args, sorted(kwargs.items()))))}.json")
+    if os.path.exists(marker):
+        try:
+            modules.load()
+            return 'cache'
+        except Exception:
+            # Installation beschädigt oder entfernt - neu installieren
+            os.unlink(marker)
+
+    # Original-Funktion, falls die Sonde modules.install bereits ersetzt hat
+    install = getattr(modules, '_ma_jensen_original_install', modules.install)
+
+    start = time.time()
+    install(*args, **kwargs)
+    modules.load()
+
+    os.makedirs(CACHE_VERZEICHNIS, exist_ok=True)
+    temp_marker = f"{marker}.{os.getpid()}.tmp"
+    with open(temp_marker, 'w', encoding='utf-8') as f:
+        json.dump({'python': sys.executable, 'argumente': repr((args, kwargs)),
+                   'dauer': time.time() - start, 'zeitpunkt': time.time()}, f)
+    os.replace(temp_marker, marker)
+    return 'installiert'
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - STARTZEIT-BENCHMARK
+Misst Kalt- und Warmstart des Harness und eines generierten Skripts über die Sonde
+
+Aufruf:
+    python MA_Jensen_Startzeit.py [wiederholungen]
+Ergebnisse werden an startzeit_benchmark.json angehängt.
+"""
+
+import statistics
+import subprocess
+import tempfile
+import datetime
+import shutil
+import time
+import json
+import sys
+import os
+
+# ===== KONFIGURATION =====
+WIEDERHOLUNGEN = 5
+BENCHMARK_DATEI = 'startzeit_benchmark.json'
+VERZEICHNIS = os.path.dirname(os.path.abspath(__file__))
+
+# Typischer Anfang eines generierten Skripts
+GENERIERTER_PROLOG = """from amplpy import AMPL, modules
+modules.install()
+ampl = AMPL()
+"""
+
+
+def _messe(befehl, umgebung):
+    """
+    Laufzeit eines Befehls in Sekunden und sein Rückgabewert
+    """
+    start = time.perf_counter()
+    result = subprocess.run(befehl, capture_output=True, env=umgebung, cwd=VERZEICHNIS)
+    return time.perf_counter() - start, result.returncode
+
+
+def messe_startzeiten(wiederholungen=None):
+    """
+    Kaltstart: frischer Modul-Cache und frischer Bytecode-Cache je Messung
+    Warmstart: beide Caches aus einem vorherigen Lauf vorhanden
+    """
+    wiederholungen = wiederholungen or WIEDERHOLUNGEN
+    arbeitsverzeichnis = tempfile.mkdtemp(prefix='startzeit_')
+    prolog_datei = os.path.join(arbeitsverzeichnis, 'prolog.py')
+    with open(prolog_datei, 'w', encoding='utf-8') as f:
+        f.write(GENERIERTER_PROLOG)
+
+    messungen = {
+        'harness_import': ['python', '-c', 'import MA_Jensen_Claude, MA_Jensen_GPT'],
+        'sonde_generiertes_skript': ['python', os.path.join(VERZEICHNIS, 'MA_Jensen_Sonde.py'), prolog_datei]
+    }
+
+    ergebnisse = {}
+    try:
+        for name, befehl in messungen.items():
+            kalt, warm, rueckgaben = [], [], set()
+            warm_cache = os.path.join(arbeitsverzeichnis, f"warm_{name}")
+            for i in range(wiederholungen):
+                kalt_cache = os.path.join(arbeitsverzeichnis, f"kalt_{name}_{i}")
+                umgebung = dict(os.environ, MA_JENSEN_CACHE=kalt_cache, PYTHONPYCACHEPREFIX=kalt_cache)
+                zeit, rueckgabe = _messe(befehl, umgebung)
+                kalt.append(zeit)
+                rueckgaben.add(rueckgabe)
+                shutil.rmtree(kalt_cache, ignore_errors=True)
+
+            umgebung = dict(os.environ, MA_JENSEN_CACHE=warm_cache, PYTHONPYCACHEPREFIX=warm_cache)
+            _messe(befehl, umgebung)  # Caches füllen
+            for _ in range(wiederholungen):
+                zeit, rueckgabe = _messe(befehl, umgebung)
+                warm.append(zeit)
+                rueckgaben.add(rueckgabe)
+
+            ergebnisse[name] = {
+                'kalt_median': statistics.median(kalt),
+                'kalt_min': min(kalt),
+                'warm_median': statistics.median(warm),
+                'warm_min': min(warm),
+                'rueckgabewerte': sorted(rueckgaben)
+            }
+    finally:
+        shutil.rmtree(arbeitsverzeichnis, ignore_errors=True)
+
+    return {
+        'zeitpunkt': datetime.datetime.now().isoformat(),
+        'python': sys.version.split()[0],
+        'wiederholungen': wiederholungen,
+        'messungen': ergebnisse
+    }
+
+
+def main():
+    """
+    Benchmark ausführen, ausgeben und an die Verlaufsdatei anhängen
+    """
+    wiederholungen = int(sys.argv[1]) if len(sys.argv) > 1 else WIEDERHOLUNGEN
+    print(f"⏱️ Messe Startzeiten ({wiederholungen} Wiederholungen)...")
+    ergebnis = messe_startzeiten(wiederholungen)
+
+    for name, m in ergebnis['messungen'].items():
+        print(f"   - {name}: kalt {m['kalt_median']:.2f}s, warm {m['warm_median']:.2f}s (Rückgabe {m['rueckgabewerte']})")
+
+    verlauf = []
+    if os.path.exists(BENCHMARK_DATEI):
+        with open(BENCHMARK_DATEI, 'r', encoding='utf-8') as f:
+            verlauf = json.load(f)
+    verlauf.append(ergebnis)
+    with open(BENCHMARK_DATEI, 'w', encoding='utf-8') as f:
+        json.dump(verlauf, f, indent=2, ensure_ascii=False)
+    print(f"📊 Verlauf: {BENCHMARK_DATEI}")
+
+
+if __name__ == "__main__":
+    main()
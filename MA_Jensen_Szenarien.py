@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - WHAT-IF SZENARIEN
+Löst ein verifiziertes Modell mit geänderten Parametern erneut, ohne die KI aufzurufen
+
+Aufruf:
+    python MA_Jensen_Szenarien.py model_X.mod data_X.dat szenarien.json
+    python MA_Jensen_Szenarien.py finale_loesung_X.py szenarien.json
+
+szenarien.json: {"Nachfrage+10%": {"demand": {"A,1": 110, "B,1": 55}}, "Kapazitaet": {"capacity": 500}}
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import subprocess
+import tempfile
+import datetime
+import time
+import json
+import sys
+import os
+
+# ===== KONFIGURATION =====
+SZENARIO_SOLVER = 'highs'
+SZENARIO_PROZESSE = os.cpu_count() or 1
+SZENARIO_TOP_AENDERUNGEN = 5  # Anzahl der größten Variablenänderungen je Szenario
+BASIS_NAME = 'BASIS'
+
+# Warme AMPL-Instanz je Worker-Prozess (Modell und Basisdaten einmal geladen)
+_ampl = None
+_basis_werte = {}
+_basis_ziel = None
+
+
+def _loese_aktuelles_modell(ampl):
+    """
+    Löst das geladene Modell und liefert Status, Zielfunktion und Solver-Zeit
+    """
+    start = time.time()
+    ampl.getOutput('solve;')
+    solver_zeit = time.time() - start
+
+    zielfunktion = None
+    for _, objective in ampl.getObjectives():
+        zielfunktion = objective.value()
+        break
+    return ampl.getValue('solve_result'), zielfunktion, solver_zeit
+
+
+def _variablenwerte(ampl):
+    """
+    Liest alle Variablenwerte als {(variable, index): wert}
+    """
+    werte = {}
+    for name, variable in ampl.getVariables():
+        for index, wert in variable.getValues().toDict().items():
+            werte[(name, index)] = wert
+    return werte
+
+
+def _initialisiere_worker(model_datei, daten_datei, solver):
+    """
+    Lädt Modell und Basisdaten einmal pro Worker und löst das Basisszenario
+    """
+    global _ampl, _basis_werte, _basis_ziel
+    from amplpy import AMPL
+    _ampl = AMPL()
+    _ampl.read(model_datei)
+    _ampl.readData(daten_datei)
+    _ampl.setOption('solver', solver)
+
+    _, _basis_ziel, _ = _loese_aktuelles_modell(_ampl)
+    _basis_werte = _variablenwerte(_ampl)
+
+
+def _setze_ueberschreibungen(ampl, ueberschreibungen):
+    """
+    Setzt Parameterwerte und gibt die Originalwerte zur Wiederherstellung zurück
+    """
+    originale = []
+    for name, wert in ueberschreibungen.items():
+        parameter = ampl.getParameter(name)
+        if isinstance(wert, dict):
+            for index, neuer_wert in wert.items():
+                originale.append((name, index, parameter[index]))
+                parameter[index] = neuer_wert
+        else:
+            originale.append((name, None, parameter.value()))
+            parameter.set(wert)
+    return originale
+
+
+def _stelle_wieder_her(ampl, originale):
+    """
+    Setzt überschriebene Parameter auf die Basisdaten zurück
+    """
+    for name, index, wert in reversed(originale):
+        parameter = ampl.getParameter(name)
+        if index is None:
+            parameter.set(wert)
+        else:
+            parameter[index] = wert
+
+
+def _loese_szenario(szenario):
+    """
+    Löst ein einzelnes Szenario auf der warmen AMPL-Instanz des Workers
+    """
+    name, ueberschreibungen = szenario
+    ergebnis = {
+        'szenario': name,
+        'ueberschreibungen': {k: (v if not isinstance(v, dict) else {str(i): w for i, w in v.items()})
+                              for k, v in ueberschreibungen.items()},
+        'solve_result': None,
+        'zielfunktion': None,
+        'delta_ziel': None,
+        'solver_zeit': None,
+        'aenderungen': [],
+        'fehler': None
+    }
+    originale = []
+    try:
+        originale = _setze_ueberschreibungen(_ampl, ueberschreibungen)
+        solve_result, zielfunktion, solver_zeit = _loese_aktuelles_modell(_ampl)
+        ergebnis.update({
+            'solve_result': solve_result,
+            'zielfunktion': zielfunktion,
+            'solver_zeit': solver_zeit
+        })
+        if zielfunktion is not None and _basis_ziel is not None:
+            ergebnis['delta_ziel'] = zielfunktion - _basis_ziel
+
+        # Größte Änderungen der Variablenwerte gegenüber der Basislösung
+        aenderungen = []
+        for (variable, index), wert in _variablenwerte(_ampl).items():
+            basis = _basis_werte.get((variable, index), 0)
+            if abs(wert - basis) > 1e-6:
+                aenderungen.append({
+                    'variable': variable,
+                    'index': str(index),
+                    'basis': basis,
+                    'neu': wert,
+                    'delta': wert - basis
+                })
+        aenderungen.sort(key=lambda a: abs(a['delta']), reverse=True)
+        ergebnis['aenderungen'] = aenderungen[:SZENARIO_TOP_AENDERUNGEN]
+    except Exception as e:
+        ergebnis['fehler'] = str(e)
+    finally:
+        try:
+            _stelle_wieder_her(_ampl, originale)
+        except Exception as e:
+            ergebnis['fehler'] = ergebnis['fehler'] or f"Wiederherstellung fehlgeschlagen: {e}"
+    return ergebnis
+
+
+def loese_szenarien(model_datei, daten_datei, szenarien, prozesse=None, solver=None):
+    """
+    Löst viele Szenarien parallel in einem Pool warmer AMPL-Instanzen
+
+    szenarien: {name: {parameter: wert | {index: wert}}} oder Liste von (name, ueberschreibungen)
+    """
+    if prozesse is None:
+        prozesse = SZENARIO_PROZESSE
+    if solver is None:
+        solver = SZENARIO_SOLVER
+    if isinstance(szenarien, dict):
+        szenarien = list(szenarien.items())
+
+    # Basisszenario immer als erste Zeile der Tabelle
+    aufgaben = [(BASIS_NAME, {})] + list(szenarien)
+    prozesse = max(1, min(prozesse, len(aufgaben)))
+    chunksize = max(1, len(aufgaben) // (prozesse * 4))
+
+    start = time.time()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=prozesse,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_initialisiere_worker,
+            initargs=(os.path.abspath(model_datei), os.path.abspath(daten_datei), solver)
+        ) as pool:
+            ergebnisse = list(pool.map(_loese_szenario, aufgaben, chunksize=chunksize))
+        fehler = None
+    except BrokenProcessPool as e:
+        ergebnisse = []
+        fehler = f"Worker-Initialisierung fehlgeschlagen (Modell/Daten ladbar?): {e}"
+
+    return {
+        'model_datei': model_datei,
+        'daten_datei': daten_datei,
+        'solver': solver,
+        'prozesse': prozesse,
+        'anzahl_szenarien': len(szenarien),
+        'gesamt_zeit': time.time() - start,
+        'basis': ergebnisse[0] if ergebnisse else None,
+        'szenarien': ergebnisse[1:],
+        'fehler': fehler
+    }
+
+
+def formatiere_szenario_tabelle(ergebnis):
+    """
+    Erstellt eine Texttabelle mit Zielfunktion und wichtigsten Variablenänderungen
+    """
+    zeilen = []
+    zeilen.append(f"{'Szenario':<25} {'Status':<12} {'Ziel':>14} {'Delta':>12} {'Zeit':>8}  Top-Änderungen")
+    zeilen.append("-" * 100)
+    alle = ([ergebnis['basis']] if ergebnis['basis'] else []) + ergebnis['szenarien']
+    for s in alle:
+        ziel = f"{s['zielfunktion']:.4g}" if s['zielfunktion'] is not None else "-"
+        delta = f"{s['delta_ziel']:+.4g}" if s['delta_ziel'] is not None else "-"
+        zeit = f"{s['solver_zeit']:.2f}s" if s['solver_zeit'] is not None else "-"
+        status = s['solve_result'] or 'FEHLER'
+        aenderungen = ", ".join(f"{a['variable']}[{a['index']}] {a['delta']:+.4g}" for a in s['aenderungen'][:3])
+        if s['fehler']:
+            aenderungen = s['fehler'].split('\n')[0][:60]
+        zeilen.append(f"{s['szenario'][:25]:<25} {status:<12} {ziel:>14} {delta:>12} {zeit:>8}  {aenderungen}")
+    return '\n'.join(zeilen)
+
+
+def _parse_index(schluessel):
+    """
+    Wandelt JSON-Indizes wie "A,1" in AMPL-Indizes ('A', 1) um
+    """
+    teile = []
+    for teil in str(schluessel).split(','):
+        teil = teil.strip()
+        try:
+            teile.append(int(teil))
+        except ValueError:
+            try:
+                teile.append(float(teil))
+            except ValueError:
+                teile.append(teil)
+    return teile[0] if len(teile) == 1 else tuple(teile)
+
+
+def lade_szenarien(pfad):
+    """
+    Lädt Szenarien aus einer JSON-Datei
+    """
+    with open(pfad, 'r', encoding='utf-8') as f:
+        roh = json.load(f)
+
+    szenarien = {}
+    for name, ueberschreibungen in roh.items():
+        szenarien[name] = {}
+        for parameter, wert in ueberschreibungen.items():
+            if isinstance(wert, dict):
+                wert = {_parse_index(index): w for index, w in wert.items()}
+            szenarien[name][parameter] = wert
+    return szenarien
+
+
+def artefakte_aus_code(code_datei, zielverzeichnis=None):
+    """
+    Führt eine gespeicherte finale Lösung aus, um model.mod und data.dat zu erzeugen
+    """
+    if zielverzeichnis is None:
+        zielverzeichnis = tempfile.mkdtemp(prefix='szenario_')
+    subprocess.run(
+        ['python', os.path.abspath(code_datei)],
+        cwd=zielverzeichnis,
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        timeout=120
+    )
+    model_datei = os.path.join(zielverzeichnis, 'model.mod')
+    daten_datei = os.path.join(zielverzeichnis, 'data.dat')
+    if not (os.path.exists(model_datei) and os.path.exists(daten_datei)):
+        raise FileNotFoundError(f"{code_datei} hat kein model.mod/data.dat erzeugt")
+    return model_datei, daten_datei
+
+
+def main():
+    """
+    Kommandozeile: Szenarien aus JSON lösen und Tabelle ausgeben
+    """
+    if len(sys.argv) == 3 and sys.argv[1].endswith('.py'):
+        print(f"🔄 Erzeuge Modell und Daten aus {sys.argv[1]}...")
+        model_datei, daten_datei = artefakte_aus_code(sys.argv[1])
+        szenario_datei = sys.argv[2]
+    elif len(sys.argv) == 4:
+        model_datei, daten_datei, szenario_datei = sys.argv[1:4]
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    szenarien = lade_szenarien(szenario_datei)
+    print(f"🧪 Löse {len(szenarien)} Szenarien mit {min(SZENARIO_PROZESSE, len(szenarien) + 1)} Prozessen...")
+    ergebnis = loese_szenarien(model_datei, daten_datei, szenarien)
+
+    if ergebnis['fehler']:
+        print(f"❌ {ergebnis['fehler']}")
+    print(formatiere_szenario_tabelle(ergebnis))
+    print(f"⏱️ Gesamtzeit: {ergebnis['gesamt_zeit']:.2f}s")
+
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    bericht_datei = f"szenarien_{timestamp}.json"
+    with open(bericht_datei, 'w', encoding='utf-8') as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False, default=str)
+    print(f"📊 Szenario-Bericht: {bericht_datei}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,269 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - PROVIDER-VERGLEICH
+Claude und GPT gleichzeitig auf denselben Aufgaben mit identischem Prompt, Budget und
+Ausführungseinstellungen; gepaarter Bericht mit Signifikanztests
+
+Aufruf:
+    python MA_Jensen_Vergleich.py vergleich.json
+
+vergleich.json:
+    {"probleme": ["...", ...], "temperatur": 0.1, "max_versuche": 3, "wiederholungen": 3}
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import statistics
+import datetime
+import random
+import math
+import time
+import json
+import sys
+
+from MA_Jensen_Ausfuehrung import beende_warme_prozesse
+from MA_Jensen_Auswertung import bootstrap_intervall
+from MA_Jensen_Dienst import lade_provider
+
+# ===== KONFIGURATION =====
+PROVIDER = ('claude', 'gpt')      # der erste Provider gibt Prompt und Einstellungen vor
+TEMPERATUR = 0.1
+MAX_VERSUCHE = 3
+PARALLELE_PAARE = 2               # gleichzeitig laufende Paare (je zwei Läufe)
+# Prompt und Ausführung: vom ersten Provider auf alle übertragen
+GEMEINSAME_ATTRIBUTE = ['PROMPT_KOPF', 'PROMPT_SCHLUSS', 'REPROMPT_REGELN', 'WARMSTART', 'SOLVER_LOG', 'MODELLANALYSE',
+                        'IIS_DIAGNOSE', 'PROFILING']
+# Für den Vergleich abgeschaltet: Vorlagen umgehen den Provider, die Historie ist je Modell verschieden,
+# die Kaskade mischt ein zweites Modell je Provider in den Vergleich; Portfolio und Reparatursitzung
+# ändern Solver bzw. Ausführung - beide Seiten lösen mit genau einem Solver in einem frischen Prozess
+VERGLEICH_EINSTELLUNGEN = {'VORLAGEN_NUTZEN': False, 'HISTORIE_NUTZEN': False, 'KASKADE': False,
+                           'SOLVER_PORTFOLIO': False, 'REPARATUR_SITZUNG': False}
+API_WIEDERHOLUNGEN = 2            # Paare mit API-Abbruch so oft neu laufen lassen, danach verwerfen
+ZIEL_TOLERANZ = 1e-6              # relative Abweichung, ab der Zielfunktionen als verschieden gelten
+PERMUTATIONEN = 10000
+ZUFALLS_SAAT = 42
+
+
+def gleiche_provider_an(provider):
+    """
+    Lädt die Provider und setzt Prompt, Budget-relevante Schalter und Ausführung identisch
+    """
+    module = {name: lade_provider(name) for name in provider}
+    referenz = module[provider[0]]
+    for modul in module.values():
+        for attribut in GEMEINSAME_ATTRIBUTE:
+            setattr(modul, attribut, getattr(referenz, attribut))
+        for attribut, wert in VERGLEICH_EINSTELLUNGEN.items():
+            setattr(modul, attribut, wert)
+    return module
+
+
+def _zielfunktion(statistiken):
+    """
+    Zielfunktion des letzten Solves im erfolgreichen Versuch (aus dem Sonden-Bericht)
+    """
+    if not statistiken['erfolg']:
+        return None
+    for solve in reversed(statistiken['versuche'][-1]['solves']):
+        if solve.get('zielfunktion') is not None:
+            return solve['zielfunktion']
+    return None
+
+
+def _lauf(modul, problem, temperatur, max_versuche):
+    start = time.time()
+    statistiken = modul.loese_problem(problem, temperatur=temperatur, max_versuche=max_versuche)
+    tokens = statistiken['statistiken']['tokens']
+    return {
+        'erfolg': statistiken['erfolg'],
+        'latenz': time.time() - start,
+        'tokens': tokens['eingabe_tokens'] + tokens['ausgabe_tokens'],
+        'versuche': len(statistiken['versuche']),
+        'solver_zeit': sum(s['solver_zeit'] for v in statistiken['versuche'] for s in v['solves']),
+        'zielfunktion': _zielfunktion(statistiken),
+        'api_fehler': len(statistiken['api_fehler']),
+        'api_abbruch': bool(statistiken['api_fehler']) and not statistiken['erfolg'],
+        'bericht_datei': statistiken.get('bericht_datei')
+    }
+
+
+def api_abbruch(paar):
+    """
+    Mindestens ein Lauf des Paars endete durch einen API-Fehler - kein Vergleich der Modelle
+    """
+    return any(paar[name]['api_abbruch'] for name in PROVIDER[:2])
+
+
+def ziele_gleich(a, b):
+    if a is None or b is None:
+        return None
+    return abs(a - b) <= ZIEL_TOLERANZ * max(1.0, abs(a), abs(b))
+
+
+def mcnemar_exakt(nur_a, nur_b):
+    """
+    Exakter McNemar-Test (zweiseitig) auf den diskordanten Paaren
+    """
+    n = nur_a + nur_b
+    if n == 0:
+        return 1.0
+    k = min(nur_a, nur_b)
+    return min(1.0, 2 * sum(math.comb(n, i) for i in range(k + 1)) / 2 ** n)
+
+
+def permutationstest(differenzen, permutationen=None, zufall=None):
+    """
+    Gepaarter Vorzeichen-Permutationstest für den Mittelwert der Differenzen (zweiseitig)
+
+    Bis 16 Paare exakt, darüber Monte Carlo.
+    """
+    n = len(differenzen)
+    if n == 0:
+        return None
+    beobachtet = abs(sum(differenzen))
+    if n <= 16:
+        extrem = sum(1 for vorzeichen in range(2 ** n)
+                     if abs(sum(d if vorzeichen >> i & 1 else -d for i, d in enumerate(differenzen))) >= beobachtet - 1e-12)
+        return extrem / 2 ** n
+    permutationen = permutationen or PERMUTATIONEN
+    zufall = zufall or random.Random(ZUFALLS_SAAT)
+    extrem = sum(1 for _ in range(permutationen)
+                 if abs(sum(d if zufall.random() < 0.5 else -d for d in differenzen)) >= beobachtet - 1e-12)
+    return (extrem + 1) / (permutationen + 1)
+
+
+def vergleiche_kennzahl(paare, kennzahl, nur_erfolgreiche=False):
+    """
+    Gepaarte Differenz a - b einer Kennzahl: Mittelwerte, Bootstrap-Intervall, p-Wert
+    """
+    a_name, b_name = PROVIDER[:2]
+    werte = [(p[a_name][kennzahl], p[b_name][kennzahl]) for p in paare
+             if not nur_erfolgreiche or (p[a_name]['erfolg'] and p[b_name]['erfolg'])]
+    if not werte:
+        return {'paare': 0}
+    differenzen = [a - b for a, b in werte]
+    return {
+        'paare': len(werte),
+        a_name: statistics.mean(a for a, _ in werte),
+        b_name: statistics.mean(b for _, b in werte),
+        'differenz_mittel': statistics.mean(differenzen),
+        'differenz_median': statistics.median(differenzen),
+        'differenz_ki': bootstrap_intervall(differenzen, statistics.mean),
+        'p_wert': permutationstest(differenzen)
+    }
+
+
+def werte_paare_aus(paare):
+    """
+    Gepaarter Bericht: Erfolg (McNemar), Latenz, Tokens, Versuche, Solver-Zeit, Zielfunktion
+
+    Paare mit API-Abbruch zählen nicht (ein API-Fehler ist kein Misserfolg des Providers).
+    """
+    a_name, b_name = PROVIDER[:2]
+    verworfen = sum(1 for p in paare if api_abbruch(p))
+    paare = [p for p in paare if not api_abbruch(p)]
+    nur_a = sum(1 for p in paare if p[a_name]['erfolg'] and not p[b_name]['erfolg'])
+    nur_b = sum(1 for p in paare if p[b_name]['erfolg'] and not p[a_name]['erfolg'])
+    beide = [p for p in paare if p[a_name]['erfolg'] and p[b_name]['erfolg']]
+    abgleich = [ziele_gleich(p[a_name]['zielfunktion'], p[b_name]['zielfunktion']) for p in beide]
+    abgleich = [gleich for gleich in abgleich if gleich is not None]
+    return {
+        'paare': len(paare),
+        'verworfen': verworfen,
+        'erfolg': {
+            a_name: sum(1 for p in paare if p[a_name]['erfolg']),
+            b_name: sum(1 for p in paare if p[b_name]['erfolg']),
+            'beide': len(beide),
+            f'nur_{a_name}': nur_a,
+            f'nur_{b_name}': nur_b,
+            'p_wert': mcnemar_exakt(nur_a, nur_b)
+        },
+        'latenz': vergleiche_kennzahl(paare, 'latenz'),
+        'tokens': vergleiche_kennzahl(paare, 'tokens'),
+        'versuche': vergleiche_kennzahl(paare, 'versuche'),
+        'solver_zeit': vergleiche_kennzahl(paare, 'solver_zeit', nur_erfolgreiche=True),
+        'zielfunktion': {
+            'verglichen': len(abgleich),
+            'uebereinstimmend': sum(abgleich),
+            'abweichend': len(abgleich) - sum(abgleich)
+        }
+    }
+
+
+def fuehre_vergleich_aus(konfiguration):
+    """
+    Jedes (Problem, Wiederholung) ergibt ein Paar; beide Läufe eines Paars laufen gleichzeitig
+
+    Ein Paar mit API-Abbruch läuft bis zu API_WIEDERHOLUNGEN-mal komplett neu.
+    """
+    module = gleiche_provider_an(PROVIDER)
+    temperatur = konfiguration.get('temperatur', TEMPERATUR)
+    max_versuche = konfiguration.get('max_versuche', MAX_VERSUCHE)
+    auftraege = [(problem_nr, problem, wiederholung)
+                 for problem_nr, problem in enumerate(konfiguration['probleme'])
+                 for wiederholung in range(konfiguration.get('wiederholungen', 1))]
+
+    with ThreadPoolExecutor(max_workers=PARALLELE_PAARE * len(PROVIDER)) as pool:
+        def starte_paar(problem):
+            return {name: pool.submit(_lauf, modul, problem, temperatur, max_versuche) for name, modul in module.items()}
+
+        zukuenfte = [(problem_nr, problem, wiederholung, starte_paar(problem))
+                     for problem_nr, problem, wiederholung in auftraege]
+        paare = []
+        for problem_nr, problem, wiederholung, laeufe in zukuenfte:
+            paar = {'problem_nr': problem_nr, 'wiederholung': wiederholung, 'api_wiederholungen': 0}
+            paar.update({name: zukunft.result() for name, zukunft in laeufe.items()})
+            while api_abbruch(paar) and paar['api_wiederholungen'] < API_WIEDERHOLUNGEN:
+                paar['api_wiederholungen'] += 1
+                paar.update({name: zukunft.result() for name, zukunft in starte_paar(problem).items()})
+            paar['ziel_gleich'] = ziele_gleich(*(paar[name]['zielfunktion'] for name in PROVIDER[:2]))
+            paare.append(paar)
+
+    return {
+        'zeitpunkt': datetime.datetime.now().isoformat(),
+        'provider': {name: modul.MODELL for name, modul in module.items()},
+        'temperatur': temperatur,
+        'max_versuche': max_versuche,
+        'auswertung': werte_paare_aus(paare),
+        'paare': paare
+    }
+
+
+def main():
+    """
+    Vergleich ausführen, gepaarten Bericht ausgeben und als JSON speichern
+    """
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        konfiguration = json.load(f)
+
+    try:
+        ergebnis = fuehre_vergleich_aus(konfiguration)
+    finally:
+        beende_warme_prozesse()
+
+    a_name, b_name = PROVIDER[:2]
+    auswertung = ergebnis['auswertung']
+    print("\n" + "=" * 70)
+    print(f" VERGLEICH {a_name.upper()} vs. {b_name.upper()} (T={ergebnis['temperatur']}, max. {ergebnis['max_versuche']} Versuche)")
+    print("=" * 70)
+    erfolg = auswertung['erfolg']
+    print(f"Erfolg: {erfolg[a_name]} vs. {erfolg[b_name]} von {auswertung['paare']} (McNemar p = {erfolg['p_wert']:.3f})")
+    if auswertung['verworfen']:
+        print(f"⚠️  {auswertung['verworfen']} Paare wegen API-Abbruch verworfen")
+    for kennzahl in ('latenz', 'tokens', 'versuche', 'solver_zeit'):
+        werte = auswertung[kennzahl]
+        if not werte['paare']:
+            continue
+        unten, oben = werte['differenz_ki']
+        print(f"{kennzahl}: {werte[a_name]:.2f} vs. {werte[b_name]:.2f} - Differenz {werte['differenz_mittel']:.2f} "
+              f"[{unten:.2f}, {oben:.2f}], p = {werte['p_wert']:.3f} ({werte['paare']} Paare)")
+    ziel = auswertung['zielfunktion']
+    print(f"Zielfunktion: {ziel['uebereinstimmend']} von {ziel['verglichen']} übereinstimmend")
+
+    datei = f"vergleich_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    with open(datei, 'w', encoding='utf-8') as f:
+        json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+    print(f"\n📁 Ergebnisse: {datei}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - VERTEILTE SWEEPS ÜBER EIN SPOOL-VERZEICHNIS
+Beliebig viele Arbeiter auf beliebig vielen Rechnern holen Läufe aus einem gemeinsamen
+Verzeichnis (z.B. NFS). Vergabe per atomarem Umbenennen, Leases mit Ablauf, abgelaufene
+Leases werden neu vergeben; die Koordination fasst die Ergebnisse zusammen.
+
+Aufruf:
+    python MA_Jensen_Verteilt.py einreichen sweep.json spool/
+    python MA_Jensen_Verteilt.py arbeiter spool/ [parallel]
+    python MA_Jensen_Verteilt.py auswerten spool/
+
+sweep.json wie bei MA_Jensen_Batch.py. Spool-Verzeichnis:
+    offen/<lauf>.json               wartende Läufe
+    vergeben/<lauf>@<arbeiter>.json laufende Läufe (Änderungszeit = letztes Lebenszeichen)
+    ergebnisse/<lauf>.json          Ergebnisse
+    fehlgeschlagen/<lauf>.json      zu oft vergebene Läufe (Arbeiter jeweils abgestürzt)
+    berichte/                       Berichte der Läufe (bericht_*.json)
+    rate/                           gemeinsame Rate-Limit-Buckets aller Arbeiter (MA_Jensen_API.py)
+"""
+
+import threading
+import datetime
+import socket
+import shutil
+import time
+import json
+import sys
+import os
+
+from MA_Jensen_Ausfuehrung import beende_warme_prozesse
+from MA_Jensen_Batch import erstelle_laeufe
+from MA_Jensen_Dienst import lade_provider
+from MA_Jensen_API import RATE_VERZEICHNIS_VARIABLE
+
+# ===== KONFIGURATION =====
+LEASE_DAUER = 600            # Sekunden ohne Lebenszeichen, bis ein Lauf neu vergeben wird (großzügig wegen Uhrabweichung)
+LEBENSZEICHEN = 60           # Sekunden zwischen zwei Lebenszeichen eines Arbeiters
+MAX_VERGABEN = 3             # danach gilt ein Lauf als fehlgeschlagen
+POLL_INTERVALL = 10          # Sekunden, wenn nichts offen ist, aber noch Leases laufen
+PARALLELE_LAEUFE = 2         # Läufe je Arbeiter-Prozess
+UNTERVERZEICHNISSE = ('offen', 'vergeben', 'ergebnisse', 'fehlgeschlagen', 'berichte')
+
+
+def _pfad(spool, bereich, name=''):
+    return os.path.join(spool, bereich, name)
+
+
+def _schreibe_atomar(pfad, daten):
+    # Temporär schreiben, dann umbenennen - andere Knoten sehen nie eine halbe Datei
+    temp_pfad = f"{pfad}.{socket.gethostname()}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(temp_pfad, 'w', encoding='utf-8') as f:
+        json.dump(daten, f, indent=2, ensure_ascii=False)
+    os.replace(temp_pfad, pfad)
+
+
+def _lies(pfad):
+    with open(pfad, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _lauf_id(dateiname):
+    return dateiname[:-len('.json')].partition('@')[0]
+
+
+def arbeiter_id():
+    return f"{socket.gethostname()}_{os.getpid()}"
+
+
+def reiche_ein(sweep, spool):
+    """
+    Legt alle Läufe des Sweeps als Aufträge in offen/ ab (bereits vorhandene bleiben unverändert)
+    """
+    for bereich in UNTERVERZEICHNISSE:
+        os.makedirs(_pfad(spool, bereich), exist_ok=True)
+    neu = 0
+    # Laufende Läufe liegen als vergeben/<lauf>@<arbeiter>.json - nicht ein zweites Mal einreichen
+    vergeben = {_lauf_id(name) for name in os.listdir(_pfad(spool, 'vergeben')) if name.endswith('.json')}
+    for lauf in erstelle_laeufe(sweep):
+        if lauf['id'] in vergeben or os.path.exists(_pfad(spool, 'offen', f"{lauf['id']}.json")) or \
+                os.path.exists(_pfad(spool, 'ergebnisse', f"{lauf['id']}.json")):
+            continue
+        lauf['vergaben'] = 0
+        _schreibe_atomar(_pfad(spool, 'offen', f"{lauf['id']}.json"), lauf)
+        neu += 1
+    return neu
+
+
+def hole_lauf(spool, arbeiter):
+    """
+    Vergibt den nächsten offenen Lauf an arbeiter - das Umbenennen gelingt nur einem Arbeiter
+
+    Rückgabe: (Lauf, Lease-Pfad) oder (None, None)
+    """
+    for name in sorted(os.listdir(_pfad(spool, 'offen'))):
+        if not name.endswith('.json'):
+            continue
+        lease = _pfad(spool, 'vergeben', f"{_lauf_id(name)}@{arbeiter}.json")
+        try:
+            os.rename(_pfad(spool, 'offen', name), lease)
+        except FileNotFoundError:
+            continue  # ein anderer Arbeiter war schneller
+        os.utime(lease)  # Umbenennen behält die alte Änderungszeit - sonst gälte die Lease sofort als abgelaufen
+        lauf = _lies(lease)
+        if os.path.exists(_pfad(spool, 'ergebnisse', name)):
+            os.unlink(lease)  # Ergebnis liegt schon vor (Lauf war nur scheinbar abgestürzt)
+            continue
+        lauf['vergaben'] += 1
+        lauf['arbeiter'] = arbeiter
+        if lauf['vergaben'] > MAX_VERGABEN:
+            _schreibe_atomar(_pfad(spool, 'fehlgeschlagen', name), lauf)
+            os.unlink(lease)
+            print(f"💥 {lauf['id']}: {MAX_VERGABEN}x ohne Ergebnis vergeben - als fehlgeschlagen abgelegt")
+            continue
+        _schreibe_atomar(lease, lauf)
+        return lauf, lease
+    return None, None
+
+
+def gib_abgelaufene_frei(spool):
+    """
+    Leases ohne Lebenszeichen seit LEASE_DAUER zurück nach offen/ (Arbeiter vermutlich abgestürzt)
+    """
+    frei = 0
+    for name in os.listdir(_pfad(spool, 'vergeben')):
+        lease = _pfad(spool, 'vergeben', name)
+        try:
+            if not name.endswith('.json') or time.time() - os.path.getmtime(lease) < LEASE_DAUER:
+                continue
+            os.rename(lease, _pfad(spool, 'offen', f"{_lauf_id(name)}.json"))
+        except FileNotFoundError:
+            continue  # inzwischen beendet oder von anderem Arbeiter freigegeben
+        print(f"⏰ Lease abgelaufen: {name} - Lauf wieder offen")
+        frei += 1
+    return frei
+
+
+def gib_zurueck(spool, lease):
+    """
+    Legt einen vergebenen Lauf sofort zurück nach offen/ - die Zahl der Vergaben bleibt erhalten
+
+    Rückgabe: False, wenn die Lease inzwischen abgelaufen und neu vergeben ist
+    """
+    try:
+        os.rename(lease, _pfad(spool, 'offen', f"{_lauf_id(os.path.basename(lease))}.json"))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def _lebenszeichen(lease, fertig):
+    while not fertig.wait(LEBENSZEICHEN):
+        try:
+            os.utime(lease)
+        except FileNotFoundError:
+            return  # Lease wurde neu vergeben - Ergebnis wird trotzdem abgelegt
+
+
+def bearbeite(spool, lauf, lease):
+    """
+    Führt einen Lauf aus und legt Ergebnis und Bericht im Spool-Verzeichnis ab
+    """
+    fertig = threading.Event()
+    threading.Thread(target=_lebenszeichen, args=(lease, fertig), daemon=True).start()
+    start = time.time()
+    try:
+        modul = lade_provider(lauf['provider'])
+        statistiken = modul.loese_problem(lauf['problem'], temperatur=lauf['temperatur'], max_versuche=lauf['max_versuche'])
+    finally:
+        fertig.set()
+
+    bericht = statistiken.get('bericht_datei')
+    if bericht and os.path.exists(bericht):
+        ziel = _pfad(spool, 'berichte', os.path.basename(bericht))
+        shutil.copyfile(bericht, f"{ziel}.tmp")
+        os.replace(f"{ziel}.tmp", ziel)
+    ergebnis = {
+        'id': lauf['id'],
+        'problem_nr': lauf['problem_nr'],
+        'provider': lauf['provider'],
+        'temperatur': statistiken['temperature'],
+        'erfolg': statistiken['erfolg'],
+        'anzahl_versuche': len(statistiken['versuche']),
+        'latenz': time.time() - start,
+        'api_fehler': len(statistiken['api_fehler']),
+        'bericht_datei': os.path.basename(bericht) if bericht else None,
+        'arbeiter': lauf['arbeiter'],
+        'vergaben': lauf['vergaben'],
+        'zeitpunkt': datetime.datetime.now().isoformat()
+    }
+    _schreibe_atomar(_pfad(spool, 'ergebnisse', f"{lauf['id']}.json"), ergebnis)
+    try:
+        os.unlink(lease)
+    except FileNotFoundError:
+        pass
+    return ergebnis
+
+
+def arbeite(spool, arbeiter=None):
+    """
+    Holt Läufe, bis nichts mehr offen ist und keine Leases mehr laufen
+    """
+    arbeiter = arbeiter or arbeiter_id()
+    bearbeitet = 0
+    while True:
+        lauf, lease = hole_lauf(spool, arbeiter)
+        if lauf is None:
+            if gib_abgelaufene_frei(spool):
+                continue
+            if not any(name.endswith('.json') for name in os.listdir(_pfad(spool, 'vergeben'))):
+                return bearbeitet
+            time.sleep(POLL_INTERVALL)
+            continue
+        print(f"\n🛠️  {arbeiter}: {lauf['id']} (Vergabe {lauf['vergaben']})")
+        try:
+            ergebnis = bearbeite(spool, lauf, lease)
+        except Exception as e:
+            # Sofort wieder offen statt erst nach LEASE_DAUER; nach MAX_VERGABEN gilt er als fehlgeschlagen
+            print(f"❌ {lauf['id']}: {e}")
+            gib_zurueck(spool, lease)
+            continue
+        bearbeitet += 1
+        print(f"{'✅' if ergebnis['erfolg'] else '❌'} {lauf['id']}: {ergebnis['anzahl_versuche']} Versuche, {ergebnis['latenz']:.1f}s")
+
+
+def werte_aus(spool):
+    """
+    Fasst alle Ergebnisse zusammen (Format wie fuehre_sweep_aus) und meldet den Stand
+    """
+    def eintraege(bereich):
+        return [_lies(_pfad(spool, bereich, name)) for name in sorted(os.listdir(_pfad(spool, bereich)))
+                if name.endswith('.json')]
+
+    ergebnisse = eintraege('ergebnisse')
+    provider = {}
+    for e in ergebnisse:
+        stand = provider.setdefault(e['provider'], {'laeufe': 0, 'erfolgreich': 0})
+        stand['laeufe'] += 1
+        stand['erfolgreich'] += e['erfolg']
+    return {
+        'zeitpunkt': datetime.datetime.now().isoformat(),
+        'laeufe': ergebnisse,
+        'erfolgreich': sum(1 for e in ergebnisse if e['erfolg']),
+        'erfolg_im_ersten_versuch': sum(1 for e in ergebnisse if e['erfolg'] and e['anzahl_versuche'] == 1),
+        'provider': provider,
+        'arbeiter': sorted({e['arbeiter'] for e in ergebnisse}),
+        'offen': len([n for n in os.listdir(_pfad(spool, 'offen')) if n.endswith('.json')]),
+        'vergeben': [_lauf_id(n) for n in os.listdir(_pfad(spool, 'vergeben')) if n.endswith('.json')],
+        'fehlgeschlagen': [e['id'] for e in eintraege('fehlgeschlagen')]
+    }
+
+
+def main():
+    befehl, argumente = (sys.argv[1] if len(sys.argv) > 1 else None), sys.argv[2:]
+
+    if befehl == 'einreichen':
+        with open(argumente[0], 'r', encoding='utf-8') as f:
+            sweep = json.load(f)
+        neu = reiche_ein(sweep, argumente[1])
+        print(f"📥 {neu} Läufe in {argumente[1]} eingereicht")
+
+    elif befehl == 'arbeiter':
+        spool = argumente[0]
+        parallel = int(argumente[1]) if len(argumente) > 1 else PARALLELE_LAEUFE
+        # Rate-Limits gelten für alle Arbeiter zusammen, nicht je Prozess
+        os.environ.setdefault(RATE_VERZEICHNIS_VARIABLE, _pfad(spool, 'rate'))
+        threads = [threading.Thread(target=arbeite, args=(spool, f"{arbeiter_id()}_{i}")) for i in range(parallel)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            beende_warme_prozesse()
+        print(f"🏁 Arbeiter {arbeiter_id()}: keine offenen Läufe mehr")
+
+    elif befehl == 'auswerten':
+        ergebnis = werte_aus(argumente[0])
+        datei = f"sweep_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        with open(datei, 'w', encoding='utf-8') as f:
+            json.dump(ergebnis, f, indent=2, ensure_ascii=False)
+        print(f"📊 Sweep: {ergebnis['erfolgreich']}/{len(ergebnis['laeufe'])} gelöst, "
+              f"davon {ergebnis['erfolg_im_ersten_versuch']} im ersten Versuch")
+        for name, stand in ergebnis['provider'].items():
+            print(f"   - {name}: {stand['erfolgreich']}/{stand['laeufe']}")
+        print(f"⏳ Offen: {ergebnis['offen']}, laufend: {len(ergebnis['vergeben'])}, "
+              f"fehlgeschlagen: {len(ergebnis['fehlgeschlagen'])} - {len(ergebnis['arbeiter'])} Arbeiter")
+        print(f"📁 Ergebnisse: {datei}")
+
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
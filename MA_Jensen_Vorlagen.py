@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - MODELLVORLAGEN
+Wiederkehrende Problemstrukturen (gleicher Text, andere Zahlen) erkennen und das verifizierte
+Modell mit den neuen Daten lösen - ohne neue Modellgenerierung
+"""
+
+import datetime
+import hashlib
+import json
+import re
+import os
+
+# ===== KONFIGURATION =====
+VORLAGEN_DATEI = os.environ.get('MA_JENSEN_VORLAGEN_DATEI', 'vorlagen.json')
+VORLAGEN_SOLVER = 'highs'
+EXTRAKTION_TEMPERATUR = 0.0   # Datenextraktion soll deterministisch sein
+# Zahl im Aufgabentext oder in data.dat; nicht Teil eines Bezeichners wie P1 oder T_3
+ZAHL = re.compile(r'(?<![\w.,])\d+(?:[.,]\d+)?(?![\w])')
+# Token einer data.dat-Anweisung: Slice [a,*], Tupel (a,b) bzw. (tr), :=, :, Symbol oder Zahl
+DATEN_TOKEN = re.compile(r'\[[^\]]*\]|\([^)]*\)|:=|:|[^\s,:;\[\]()]+')
+WERT_TOKEN = re.compile(r'[-+]?(\d+(?:\.\d+)?)')
+
+EXTRAKTION_SYSTEM = """Du überträgst Daten einer Optimierungsaufgabe in eine AMPL-Datendatei.
+Das AMPL-Modell ist fest vorgegeben und darf nicht verändert werden.
+Die bisherige data.dat zeigt Format, Mengen und Parameter für eine gleich aufgebaute Aufgabe.
+Erstelle die data.dat für die neue Aufgabe: gleiche Struktur, nur die Werte der neuen Aufgabe.
+Gib NUR die data.dat in einem ```ampl Block zurück!"""
+
+
+def _zahl(text):
+    return float(text.replace(',', '.'))
+
+
+def _hash(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+
+def problem_struktur(problem):
+    """
+    Struktur-Fingerabdruck (Text ohne Zahlen) und Zahlen der Aufgabe in Reihenfolge
+    """
+    zahlen = ZAHL.findall(problem)
+    text = re.sub(r'\s+', ' ', ZAHL.sub('#', problem)).strip().lower()
+    return {
+        'fingerabdruck': _hash(text),
+        'zahlen': zahlen
+    }
+
+
+def _schluessel(fingerabdruck, kardinalitaeten):
+    """
+    Vorlagen-Schlüssel: Text-Fingerabdruck plus Kardinalitäten (Mengengrößen, Perioden, Indizes)
+    """
+    teile = [f"{i}={wert}" for i, wert in sorted(kardinalitaeten.items(), key=lambda eintrag: int(eintrag[0]))]
+    return f"{fingerabdruck}-{_hash(','.join(teile))}"
+
+
+def _passt(vorlage, struktur):
+    if vorlage.get('fingerabdruck') != struktur['fingerabdruck'] or len(vorlage['zahlen']) != len(struktur['zahlen']):
+        return False
+    return all(_zahl(struktur['zahlen'][int(i)]) == _zahl(wert) for i, wert in vorlage['kardinalitaeten'].items())
+
+
+def _maskiere_kommentare(daten):
+    # Kommentare durch Leerzeichen ersetzen - Positionen bleiben gültig
+    return re.sub(r'#[^\n]*', lambda treffer: ' ' * len(treffer.group(0)), daten)
+
+
+def _oberste_ebene(text):
+    """
+    Teilt an Kommas außerhalb von Klammern
+    """
+    teile, tiefe, anfang = [], 0, 0
+    for i, zeichen in enumerate(text):
+        if zeichen in '([{':
+            tiefe += 1
+        elif zeichen in ')]}':
+            tiefe -= 1
+        elif zeichen == ',' and tiefe == 0:
+            teile.append(text[anfang:i])
+            anfang = i + 1
+    teile.append(text[anfang:])
+    return teile
+
+
+def _mengen_dimension(modell, menge):
+    treffer = re.search(rf'\bset\s+{re.escape(menge)}\b([^;]*);', modell) if re.fullmatch(r'\w+', menge) else None
+    if treffer is None:
+        return 1
+    dimen = re.search(r'\bdimen\s+(\d+)', treffer.group(1))
+    if dimen:
+        return int(dimen.group(1))
+    kreuz = re.search(r'\bwithin\s+(.*)', treffer.group(1))
+    return kreuz.group(1).count(' cross ') + 1 if kreuz else 1
+
+
+def _param_dimension(modell, name):
+    """
+    Anzahl der Indizes eines Parameters laut Modell oder None (nicht deklariert)
+    """
+    treffer = re.search(rf'\bparam\s+{re.escape(name)}\b\s*(\{{[^}}]*\}})?', modell)
+    if treffer is None:
+        return None
+    if not treffer.group(1):
+        return 0
+    dimension = 0
+    for teil in _oberste_ebene(treffer.group(1)[1:-1].split(':')[0]):
+        teil = teil.strip()
+        if teil.startswith('('):
+            dimension += teil[:teil.index(')')].count(',') + 1
+        else:
+            dimension += _mengen_dimension(modell, teil.split(' in ')[-1].strip())
+    return dimension
+
+
+def _werte_im_koerper(tokens, indizes, anzahl_werte):
+    """
+    Wert-Token im Körper einer param-Anweisung (Liste, Slices [a,*] und Tabellen mit Spaltenkopf)
+
+    Rückgabe: Liste der Wert-Token oder None, wenn die Einträge nicht aufgehen
+    """
+    werte = []
+    eintrag, groesse, kopf = 0, indizes + anzahl_werte, None
+    i = 0
+    while i < len(tokens):
+        text = tokens[i][0]
+        if text.startswith('[') or text in (':', ':=', '(tr)'):
+            if eintrag:
+                return None  # unvollständiger Eintrag vor Slice oder Tabellenkopf
+            if text.startswith('['):
+                indizes = text.count('*')
+                groesse = indizes + anzahl_werte
+            elif text == ':':
+                # Tabelle: Spaltenköpfe bis :=, danach je Zeile eine Zeilenmarke und ein Wert je Spalte
+                kopf = []
+                i += 1
+                while i < len(tokens) and tokens[i][0] != ':=':
+                    kopf.append(tokens[i])
+                    i += 1
+                if i == len(tokens) or not kopf:
+                    return None
+                indizes, groesse = 1, 1 + len(kopf)
+            i += 1
+            continue
+        if text.startswith('(') and eintrag == 0 and indizes:
+            eintrag = indizes  # Tupel als vollständiger Index
+        elif eintrag >= indizes:
+            werte.append(tokens[i])
+            eintrag += 1
+        else:
+            eintrag += 1
+        if eintrag == groesse:
+            eintrag = 0
+        i += 1
+    return None if eintrag else werte
+
+
+def _wert_token(daten, modell):
+    """
+    Wert-Token aller param-Anweisungen in data.dat als (Text, Anfang, Ende) oder None
+
+    Mengenelemente, Indizes, Spaltenköpfe und default-Werte gehören nicht dazu. None, wenn
+    eine Anweisung nicht zugeordnet werden kann (z.B. Parameter fehlt im Modell).
+    """
+    maskiert = _maskiere_kommentare(daten)
+    werte = []
+    for anweisung in re.finditer(r'[^;]*;', maskiert):
+        kopf = re.match(r'\s*param\b', anweisung.group(0))
+        if kopf is None:
+            continue
+        anfang = anweisung.start() + kopf.end()
+        tokens = [(t.group(0), anfang + t.start(), anfang + t.end())
+                  for t in DATEN_TOKEN.finditer(maskiert[anfang:anweisung.end() - 1])]
+        if not tokens:
+            return None
+        if tokens[0][0] == ':':
+            # param: [MENGE:] p1 p2 := ... - mehrere Parameter über gleichem Index
+            ende = next((i for i, t in enumerate(tokens) if t[0] == ':='), None)
+            if ende is None:
+                return None
+            namen = [t[0] for t in tokens[1:ende]]
+            if ':' in namen:
+                namen = namen[len(namen) - namen[::-1].index(':'):]
+            indizes = _param_dimension(modell, namen[0]) if namen else None
+            gefunden = None if indizes is None else _werte_im_koerper(tokens[ende + 1:], indizes, len(namen))
+        else:
+            indizes = _param_dimension(modell, tokens[0][0])
+            rest = tokens[1:]
+            if rest and rest[0][0] == 'default':
+                rest = rest[2:]
+            gefunden = None if indizes is None else _werte_im_koerper(rest, indizes, 1)
+        if gefunden is None:
+            return None
+        werte.extend(gefunden)
+    return werte
+
+
+def _zahl_stellen(werte):
+    """
+    {Zahl: [(Anfang, Ende), ...]} der numerischen Wert-Token (ohne Vorzeichen)
+    """
+    stellen = {}
+    for text, anfang, _ in werte:
+        treffer = WERT_TOKEN.fullmatch(text)
+        if treffer:
+            stellen.setdefault(float(treffer.group(1)), []).append((anfang + treffer.start(1), anfang + treffer.end(1)))
+    return stellen
+
+
+def _strukturzahlen(daten, werte):
+    """
+    Zahlen in data.dat außerhalb von Parameterwerten (Mengenelemente, Perioden, Indizes) und Mengengrößen
+    """
+    maskiert = _maskiere_kommentare(daten)
+    wert_anfaenge = {anfang for stellen in _zahl_stellen(werte or []).values() for anfang, _ in stellen}
+    zahlen = {_zahl(t.group(0)) for t in ZAHL.finditer(maskiert) if t.start() not in wert_anfaenge}
+    for menge in re.finditer(r'\bset\s+\w+[^:;]*:=([^;]*);', maskiert):
+        zahlen.add(float(len(DATEN_TOKEN.findall(menge.group(1)))))
+    return zahlen
+
+
+def lade_vorlagen(pfad=None):
+    """
+    Lädt die Vorlagen; fehlende oder defekte Datei ergibt keine Vorlagen
+    """
+    pfad = pfad or VORLAGEN_DATEI
+    try:
+        with open(pfad, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _speichere_vorlagen(vorlagen, pfad=None):
+    # Atomar ersetzen wie der Warmstart-Cache
+    pfad = pfad or VORLAGEN_DATEI
+    temp_pfad = f"{pfad}.{os.getpid()}.tmp"
+    with open(temp_pfad, 'w', encoding='utf-8') as f:
+        json.dump(vorlagen, f, indent=2, ensure_ascii=False)
+    os.replace(temp_pfad, pfad)
+
+
+def finde_vorlage(problem, pfad=None):
+    """
+    Verifizierte Vorlage mit gleicher Problemstruktur und gleichen Kardinalitäten oder None
+    """
+    struktur = problem_struktur(problem)
+    for vorlage in lade_vorlagen(pfad).values():
+        if _passt(vorlage, struktur):
+            return vorlage
+    return None
+
+
+def speichere_vorlage(problem, artefakte, modell, pfad=None):
+    """
+    Legt nach einem erfolgreichen Lauf Modell und Daten als Vorlage ab (nur mit model.mod und data.dat)
+
+    Zahlen der Aufgabe, die in data.dat als Mengenelement, Index oder Mengengröße vorkommen, sind
+    Kardinalitäten: sie gehören zum Schlüssel und müssen bei Wiederverwendung gleich sein.
+    """
+    if 'model.mod' not in artefakte or 'data.dat' not in artefakte:
+        return None
+    struktur = problem_struktur(problem)
+    with open(artefakte['model.mod']['pfad'], 'r', encoding='utf-8', errors='replace') as f:
+        modelltext = f.read()
+    with open(artefakte['data.dat']['pfad'], 'r', encoding='utf-8', errors='replace') as f:
+        datentext = f.read()
+
+    werte = _wert_token(datentext, modelltext)
+    strukturzahlen = _strukturzahlen(datentext, werte)
+    wertzahlen = _zahl_stellen(werte or [])
+    kardinalitaeten = {str(i): zahl for i, zahl in enumerate(struktur['zahlen']) if _zahl(zahl) in strukturzahlen}
+    schluessel = _schluessel(struktur['fingerabdruck'], kardinalitaeten)
+    vorlagen = lade_vorlagen(pfad)
+    if schluessel in vorlagen:
+        return schluessel
+
+    vorlagen[schluessel] = {
+        'schluessel': schluessel,
+        'fingerabdruck': struktur['fingerabdruck'],
+        'kardinalitaeten': kardinalitaeten,
+        # Zahlen der Aufgabe, die als Parameterwert in data.dat stehen - müssen es auch in neuen Daten
+        'datenzahlen': [i for i, zahl in enumerate(struktur['zahlen']) if _zahl(zahl) in wertzahlen],
+        'problem': problem,
+        'zahlen': struktur['zahlen'],
+        'modell': modelltext,
+        'daten': datentext,
+        'model_hash': artefakte['model.mod']['hash'],
+        'erstellt_mit': modell,
+        'erstellt': datetime.datetime.now().isoformat(),
+        'wiederverwendet': 0
+    }
+    _speichere_vorlagen(vorlagen, pfad)
+    return schluessel
+
+
+def vermerke_wiederverwendung(problem, pfad=None):
+    """
+    Zählt eine erfolgreiche Wiederverwendung der Vorlage
+    """
+    struktur = problem_struktur(problem)
+    vorlagen = lade_vorlagen(pfad)
+    for vorlage in vorlagen.values():
+        if _passt(vorlage, struktur):
+            vorlage['wiederverwendet'] += 1
+            vorlage['zuletzt_verwendet'] = datetime.datetime.now().isoformat()
+            _speichere_vorlagen(vorlagen, pfad)
+            return
+
+
+def uebertrage_daten(vorlage, problem):
+    """
+    Deterministische Datenübernahme: Zahlen der alten Aufgabe in den Parameterwerten von data.dat
+    durch die neuen ersetzen - Mengenelemente, Indizes, Spaltenköpfe und default-Werte bleiben
+
+    Gelingt nur, wenn
+    - jede geänderte Zahl der Aufgabe als Parameterwert genauso oft vorkommt wie in der Aufgabe
+      (sonst abgeleitete Werte wie 0.5 für 50% oder zufällig gleiche Werte wie ein Big-M),
+    - gleiche alte Werte auf gleiche neue Werte abgebildet werden und
+    - keine geänderte Zahl zugleich Mengenelement oder Index ist.
+    Sonst None - dann übernimmt die Extraktions-Anfrage.
+    """
+    neue_zahlen = problem_struktur(problem)['zahlen']
+    alte_zahlen = vorlage['zahlen']
+    if len(neue_zahlen) != len(alte_zahlen):
+        return None
+
+    zuordnung = {}
+    for alt, neu in zip(alte_zahlen, neue_zahlen):
+        wert = _zahl(alt)
+        if wert in zuordnung and _zahl(zuordnung[wert]) != _zahl(neu):
+            return None  # gleicher alter Wert wird zu verschiedenen neuen Werten: nicht eindeutig
+        zuordnung.setdefault(wert, neu.replace(',', '.'))
+
+    daten = vorlage['daten']
+    werte = _wert_token(daten, vorlage['modell'])
+    if werte is None:
+        return None  # Datenformat nicht eindeutig zuordenbar
+    stellen = _zahl_stellen(werte)
+    strukturzahlen = _strukturzahlen(daten, werte)
+    haeufigkeit = {}
+    for alt in alte_zahlen:
+        haeufigkeit[_zahl(alt)] = haeufigkeit.get(_zahl(alt), 0) + 1
+
+    ersetzungen = []
+    for wert, neu in zuordnung.items():
+        if _zahl(neu) == wert:
+            continue
+        if wert in strukturzahlen or len(stellen.get(wert, [])) != haeufigkeit[wert]:
+            return None
+        ersetzungen.extend((anfang, ende, neu) for anfang, ende in stellen[wert])
+
+    for anfang, ende, neu in sorted(ersetzungen, reverse=True):
+        daten = daten[:anfang] + neu + daten[ende:]
+    return daten
+
+
+def pruefe_daten(vorlage, problem, daten):
+    """
+    Zahlen der neuen Aufgabe, die als Parameterwert in data.dat fehlen (leere Liste: plausibel)
+
+    Geprüft werden die Positionen, die in der Vorlage als Parameterwert vorkamen - so fällt eine
+    Extraktion auf, die Werte vertauscht, vergessen oder aus der alten Aufgabe übernommen hat.
+    """
+    neue_zahlen = problem_struktur(problem)['zahlen']
+    werte = _wert_token(daten, vorlage['modell'])
+    if werte is None:
+        return ['data.dat passt nicht zu den Parametern des Modells']
+    stellen = _zahl_stellen(werte)
+    return [neue_zahlen[i] for i in vorlage.get('datenzahlen', []) if _zahl(neue_zahlen[i]) not in stellen]
+
+
+def extraktions_prompt(vorlage, problem):
+    """
+    Kurze Anfrage nur für die Daten - Modell und alte Daten als gecachter Block
+    """
+    return {
+        'system': [(EXTRAKTION_SYSTEM, True)],
+        'nachricht': [
+            (f"AMPL-MODELL:\n{vorlage['modell']}\n\nBISHERIGE AUFGABE:\n{vorlage['problem']}\n\n"
+             f"BISHERIGE data.dat:\n{vorlage['daten']}", True),
+            (f"NEUE AUFGABE:\n{problem}", False)
+        ]
+    }
+
+
+def daten_aus_antwort(antwort):
+    """
+    data.dat aus der Antwort der Extraktions-Anfrage oder None
+    """
+    treffer = re.search(r'```(?:ampl|dat)?\s*\n(.*?)```', antwort or '', re.DOTALL)
+    daten = (treffer.group(1) if treffer else antwort or '').strip()
+    if not re.search(r'\b(param|set)\b', daten):
+        return None
+    return daten + "\n"
+
+
+def vorlagen_code(modell, daten, solver=None):
+    """
+    Python-Code, der das Vorlagenmodell mit neuen Daten löst (Ausgabe wie generierter Code)
+    """
+    solver = solver or VORLAGEN_SOLVER
+    return "\n".join([
+        "# -*- coding: utf-8 -*-",
+        "# Gelöst mit verifizierter Modellvorlage (MA_Jensen_Vorlagen.py)",
+        "import math",
+        "import sys",
+        "from amplpy import AMPL, modules",
+        "modules.install()",
+        "",
+        "with open('model.mod', 'w', encoding='utf-8') as f:",
+        f"    f.write({modell!r})",
+        "with open('data.dat', 'w', encoding='utf-8') as f:",
+        f"    f.write({daten!r})",
+        "",
+        "ampl = AMPL()",
+        "ampl.read('model.mod')",
+        "ampl.readData('data.dat')",
+        f"ampl.setOption('solver', {solver!r})",
+        "ampl.solve()",
+        "",
+        "solve_result = ampl.getValue('solve_result')",
+        "if solve_result != 'solved':",
+        "    sys.exit('Vorlage: solve_result = ' + str(solve_result))",
+        "for name, objective in ampl.getObjectives():",
+        "    if not math.isfinite(objective.value()):",
+        "        sys.exit('Vorlage: Zielfunktion ' + name + ' nicht endlich')",
+        "print('Optimale Loesung gefunden')",
+        "for name, objective in ampl.getObjectives():",
+        "    print(name, objective.value())",
+        "for name, variable in ampl.getVariables():",
+        "    for key, val in variable.getValues().toDict().items():",
+        "        print(name, key, val)",
+        ""
+    ])
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DER RATE-LIMITS
+TokenBucket, prozessübergreifender Bucket und Rückbuchung fehlgeschlagener Anfragen -
+mit künstlicher Uhr, ohne API
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_API.py
+"""
+
+import pytest
+
+import MA_Jensen_API as api
+from MA_Jensen_API import TokenBucket, GeteilterTokenBucket, AnfrageScheduler
+
+
+class Uhr:
+    def __init__(self, zeit=1000.0):
+        self.zeit = zeit
+
+    def __call__(self):
+        return self.zeit
+
+    def schlafe(self, sekunden):
+        self.zeit += sekunden
+
+
+def _mit_uhr(bucket, uhr):
+    bucket._uhr = uhr
+    bucket.letzte_auffuellung = uhr()
+    return bucket
+
+
+def test_entnehmen_und_auffuellen():
+    uhr = Uhr()
+    bucket = _mit_uhr(TokenBucket(60), uhr)
+    assert bucket.entnehme(50) == 0.0
+    assert bucket.bestand == 10
+    uhr.schlafe(30)  # 60 pro Minute: 30 Einheiten in 30 s
+    assert bucket.entnehme(40) == 0.0
+    assert bucket.bestand == pytest.approx(0.0)
+    uhr.schlafe(600)  # nie über die Kapazität
+    bucket.korrigiere(0)
+    assert bucket.bestand == 60
+
+
+def test_entnehmen_wartet_bis_genug_da_ist(monkeypatch):
+    uhr = Uhr()
+    monkeypatch.setattr(api.time, 'sleep', uhr.schlafe)
+    bucket = _mit_uhr(TokenBucket(60), uhr)
+    bucket.entnehme(60)
+    assert bucket.entnehme(15) == pytest.approx(15.0)
+    # größer als die Kapazität: wartet auf einen vollen Bucket statt ewig
+    assert bucket.entnehme(1000) == pytest.approx(60.0)
+
+
+def test_korrektur_und_gutschrift():
+    uhr = Uhr()
+    bucket = _mit_uhr(TokenBucket(100), uhr)
+    bucket.entnehme(80)
+    bucket.korrigiere(10)  # 10 mehr verbraucht als geschätzt
+    assert bucket.bestand == pytest.approx(10.0)
+    bucket.korrigiere(-80)  # Gutschrift, höchstens bis zur Kapazität
+    assert bucket.bestand == pytest.approx(90.0)
+    bucket.korrigiere(-80)
+    assert bucket.bestand == 100
+
+
+@pytest.mark.skipif(api.fcntl is None, reason="flock nicht verfügbar")
+def test_geteilter_bucket_ueber_eine_datei(tmp_path):
+    uhr = Uhr()
+    datei = str(tmp_path / 'rate_tokens.json')
+    erster = _mit_uhr(GeteilterTokenBucket(60, datei), uhr)
+    zweiter = _mit_uhr(GeteilterTokenBucket(60, datei), uhr)
+    erster.entnehme(40)
+    zweiter.entnehme(15)
+    assert zweiter.bestand == pytest.approx(5.0)
+    erster.korrigiere(0)
+    assert erster.bestand == pytest.approx(5.0)
+
+
+def test_fehlgeschlagene_anfrage_bucht_tokens_zurueck():
+    scheduler = AnfrageScheduler(anfragen_pro_minute=10, tokens_pro_minute=1000)
+
+    def anfrage():
+        raise ValueError("ungültige Anfrage")
+
+    ergebnis = scheduler.sende(anfrage, 600)
+    assert not ergebnis['erfolg'] and not ergebnis['wiederholbar']
+    assert scheduler.tokens.bestand == pytest.approx(1000, abs=1)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DER AUSWERTUNG
+pass@k, Konfidenzintervalle und adaptiver Abbruch ohne AMPL und ohne API
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Auswertung.py
+"""
+
+import random
+
+import pytest
+
+from MA_Jensen_Auswertung import pass_at_k, bootstrap_intervall, wilson_intervall, ist_genau_genug, \
+    werte_zelle_aus, _gueltige, STICHPROBEN_MIN, STICHPROBEN_MAX
+
+
+def _stichproben(erfolge, n):
+    return [{'erfolg': i < erfolge, 'anzahl_versuche': 1, 'latenz': 1.0, 'api_abbruch': False} for i in range(n)]
+
+
+def test_pass_at_k():
+    assert pass_at_k(5, 0, 1) == 0.0
+    assert pass_at_k(5, 5, 3) == 1.0
+    assert pass_at_k(10, 3, 1) == pytest.approx(0.3)
+    # 1 - C(7,3)/C(10,3) = 1 - 35/120
+    assert pass_at_k(10, 3, 3) == pytest.approx(1 - 35 / 120)
+    assert pass_at_k(3, 1, 5) is None
+
+
+def test_bootstrap_intervall_umschliesst_mittelwert():
+    stichproben = [1.0, 2.0, 3.0, 4.0, 5.0] * 4
+    unten, oben = bootstrap_intervall(stichproben, lambda s: sum(s) / len(s), ziehungen=500,
+                                      zufall=random.Random(1))
+    assert unten < 3.0 < oben
+    assert bootstrap_intervall([1.0], lambda s: None, ziehungen=10) == (None, None)
+
+
+def test_wilson_intervall_bei_null_und_allen_erfolgen_nicht_entartet():
+    unten, oben = wilson_intervall(5, 5)
+    assert oben == 1.0 and unten < 0.6
+    unten, oben = wilson_intervall(0, 5)
+    assert unten == pytest.approx(0.0) and oben > 0.4
+    assert wilson_intervall(0, 0) == (None, None)
+
+
+def test_ist_genau_genug():
+    assert not ist_genau_genug(_stichproben(1, STICHPROBEN_MIN - 1))
+    # 5/5 und 0/5: Intervall noch weit - weiter ziehen
+    assert not ist_genau_genug(_stichproben(5, 5))
+    assert not ist_genau_genug(_stichproben(0, 5))
+    assert ist_genau_genug(_stichproben(0, 30))
+    assert ist_genau_genug(_stichproben(10, STICHPROBEN_MAX))
+
+
+def test_api_abbrueche_zaehlen_nicht():
+    stichproben = _stichproben(2, 4) + [{'erfolg': False, 'anzahl_versuche': 1, 'latenz': 0.1, 'api_abbruch': True}]
+    gueltige = _gueltige(stichproben)
+    assert len(gueltige) == 4
+    auswertung = werte_zelle_aus(gueltige, [1])
+    assert auswertung['erfolgsquote'] == 0.5
+    assert werte_zelle_aus([]) is None
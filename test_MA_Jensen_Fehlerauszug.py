@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DES FEHLERAUSZUGS
+Verdichtung von Tracebacks und AMPL-Meldungen für den Reprompt
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Fehlerauszug.py
+"""
+
+from MA_Jensen_Fehlerauszug import verdichte_fehler, betroffene_bezeichner
+
+AMPL_FEHLER = '''Traceback (most recent call last):
+  File "/tmp/laeufe/lauf_1/versuch_1/versuch.py", line 42, in <module>
+    ampl.read('model.mod')
+  File "/usr/lib/python3/site-packages/amplpy/ampl.py", line 501, in read
+    raise AMPLException(msg)
+amplpy.exceptions.AMPLException: file model.mod
+line 7 offset 112
+x is not defined
+context:  subject to c1: >>> x <<< [i] <= cap[i];
+''' + "Warning: presolve step 3 failed\n" * 4
+
+
+def test_traceback_und_ampl_meldung():
+    auszug = verdichte_fehler(AMPL_FEHLER)
+    assert "FEHLERMELDUNG: amplpy.exceptions.AMPLException: file model.mod" in auszug
+    assert "STELLE IM CODE: versuch.py, Zeile 42 (<module>): ampl.read('model.mod')" in auszug
+    assert "line 7 offset 112" in auszug
+    assert "BETROFFEN: x" in auszug
+    assert "4x Warning: presolve step # failed" in auszug
+
+
+def test_hinweis_bleibt_vorne():
+    auszug = verdichte_fehler("Ressourcenlimit: CPU-Zeit (60s) überschritten\nirgendeine Ausgabe")
+    assert auszug.startswith("HINWEIS: Ressourcenlimit")
+    # ohne Struktur bleibt das Ende der Meldung
+    assert "ENDE DER MELDUNG:\nirgendeine Ausgabe" in auszug
+
+
+def test_budget_wird_eingehalten():
+    lang = AMPL_FEHLER + "".join(f"Error executing line {i}: no value for p{i}\n" for i in range(200))
+    assert len(verdichte_fehler(lang, token_budget=50)) <= 50 * 4
+    assert verdichte_fehler("") == ""
+
+
+def test_betroffene_bezeichner():
+    fehler = "no value for cost['a']\ninvalid subscript discarded: d[3]\nname 'plan' is not defined"
+    assert betroffene_bezeichner(fehler) == ["d[3]", "cost['a']", "plan"]
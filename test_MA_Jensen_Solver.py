@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DER SOLVER-WERKZEUGE
+Zerlegung von HiGHS- und CBC-Logs in Kennzahlen ohne AMPL
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Solver.py
+"""
+
+import pytest
+
+from MA_Jensen_Solver import parse_solver_log, summiere_solver_metriken
+
+HIGHS_LOG = '''
+Presolving model
+3 rows, 4 cols, 10 nonzeros  0s
+Presolve : Reductions: rows 3(-1); columns 4(-0); elements 10(-2)
+
+Solving MIP model with:
+   3 rows
+   4 cols (0 binary, 4 integer, 0 implied int., 0 continuous)
+   10 nonzeros
+
+        Nodes      |    B&B Tree     |            Objective Bounds              |  Dynamic Constraints |       Work
+     Proc. InQueue |  Leaves   Expl. | BestBound       BestSol              Gap |   Cuts   InLp Confl. | LpIters     Time
+
+         0       0         0   0.00%   17              -inf                 inf        0      0      0         0     0.0s
+ T       0       0         0   0.00%   17              15                13.33%        0      0      0         3     0.1s
+         1       0         1 100.00%   15              15                 0.00%        0      0      0         5     0.2s
+
+Solving report
+  Status            Optimal
+  Primal bound      15
+  Dual bound        15
+  Gap               0% (tolerance: 0.01%)
+  Solution status   feasible
+                    15 (objective)
+  Timing            0.25 (total)
+                    0.00 (presolve)
+  Nodes             1
+  LP iterations     5 (total)
+'''
+
+CBC_LOG = '''
+Continuous objective value is 17 - 0.00 seconds
+Cgl0004I processed model has 3 rows, 4 columns (4 integer (0 of which binary)) and 10 elements
+Cbc0012I Integer solution of 15 found by DiveCoefficient after 3 iterations and 0 nodes (0.01 seconds)
+Cbc0013I At root node, 2 cuts changed objective from 17 to 15 in 2 passes
+Result - Optimal solution found
+
+Objective value:                15.00000000
+Enumerated nodes:               0
+Total iterations:               5
+Time (CPU seconds):             0.02
+Time (Wallclock seconds):       0.03
+'''
+
+
+def test_highs_log():
+    metriken = parse_solver_log(HIGHS_LOG, 'HiGHS')
+    assert metriken['solver'] == 'highs'
+    assert metriken['status'] == 'Optimal'
+    assert metriken['presolve'] == {'zeilen': 3, 'zeilen_entfernt': 1, 'spalten': 4, 'spalten_entfernt': 0,
+                                    'elemente': 10, 'elemente_entfernt': 2}
+    assert metriken['lp_iterationen'] == 5
+    assert metriken['knoten'] == 1
+    assert metriken['gap'] == 0.0
+    assert metriken['primal_bound'] == 15.0
+    assert metriken['dual_bound'] == 15.0
+    assert metriken['root_bound'] == 17.0
+    assert metriken['zeit_erste_loesung'] == 0.1
+    assert metriken['zeit_gesamt'] == 0.25
+
+
+def test_cbc_log():
+    metriken = parse_solver_log(CBC_LOG, 'cbc')
+    assert metriken['status'] == 'Optimal solution found'
+    assert metriken['presolve'] == {'zeilen': 3, 'spalten': 4, 'elemente': 10}
+    assert metriken['lp_iterationen'] == 5
+    assert metriken['knoten'] == 0
+    assert metriken['gap'] is None
+    assert metriken['primal_bound'] == 15.0
+    assert metriken['root_bound'] == 15.0
+    assert metriken['zeit_erste_loesung'] == 0.01
+    assert metriken['zeit_gesamt'] == 0.03
+
+
+def test_leeres_und_unbekanntes_log():
+    assert parse_solver_log('', 'highs')['zeit_gesamt'] is None
+    assert parse_solver_log(CBC_LOG, 'gurobi')['status'] is None
+
+
+def test_summe_ueber_solves():
+    versuche = [{'solves': [
+        {'solver_metriken': parse_solver_log(HIGHS_LOG, 'highs'), 'modellierung_zeit': 0.5},
+        {'solver_metriken': parse_solver_log(CBC_LOG, 'cbc'), 'modellierung_zeit': 0.25},
+        {'solver_metriken': None}
+    ]}]
+    summe = summiere_solver_metriken(versuche)
+    assert summe['solves'] == 3 and summe['solves_mit_log'] == 2
+    assert summe['lp_iterationen'] == 10
+    assert summe['solver_zeit'] == pytest.approx(0.28)
+    assert summe['modellierung_zeit'] == pytest.approx(0.75)
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - RAUCHTEST DER AUSFÜHRUNGSSONDE
+Startet MA_Jensen_Sonde.py wie fuehre_code_aus mit dem installierten amplpy
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Sonde.py
+"""
+
+import subprocess
+import json
+import sys
+import os
+
+import pytest
+
+amplpy = pytest.importorskip('amplpy')
+
+SONDE_DATEI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'MA_Jensen_Sonde.py')
+
+TINY_LP = '''
+from amplpy import AMPL, modules
+modules.install()
+ampl = AMPL()
+ampl.eval("var x >= 0; var y >= 0; maximize z: 3*x + 2*y; s.t. c1: x + y <= 4; s.t. c2: x + 3*y <= 6;")
+ampl.setOption('solver', 'highs')
+ampl.solve()
+print('ERGEBNIS', ampl.getValue('solve_result'), ampl.getObjective('z').value())
+'''
+
+
+def _starte_sonde(verzeichnis, code):
+    """
+    Führt code über die Sonde aus; Rückgabe: (CompletedProcess, Sondenbericht)
+    """
+    skript = os.path.join(verzeichnis, 'versuch.py')
+    with open(skript, 'w', encoding='utf-8') as f:
+        f.write(code)
+    bericht = os.path.join(verzeichnis, 'sonde.json')
+    umgebung = dict(os.environ)
+    umgebung.update({
+        'MA_JENSEN_SONDE_BERICHT': bericht,
+        'MA_JENSEN_WARMSTART': '1',
+        'MA_JENSEN_SOLVER_LOG': '1',
+        'MA_JENSEN_MODELLANALYSE': '1',
+        'MA_JENSEN_IIS': '1',
+        'MA_JENSEN_WARMSTART_DATEI': os.path.join(verzeichnis, 'warmstart_cache.json')
+    })
+    ablauf = subprocess.run([sys.executable, SONDE_DATEI, skript], cwd=verzeichnis, env=umgebung,
+                            capture_output=True, text=True, timeout=120)
+    with open(bericht, 'r', encoding='utf-8') as f:
+        return ablauf, json.load(f)
+
+
+def test_skript_laeuft_mit_instrumentierter_klasse(tmp_path):
+    code = '''
+import amplpy
+import amplpy.ampl
+from amplpy import AMPL
+original = [klasse for klasse in AMPL.__mro__ if klasse.__module__ == 'amplpy.ampl'][0]
+assert AMPL is amplpy.AMPL is amplpy.ampl.AMPL
+assert AMPL is not original and AMPL.solve is not original.solve
+print('SKRIPT_OK')
+'''
+    ablauf, bericht = _starte_sonde(str(tmp_path), code)
+    assert ablauf.returncode == 0, ablauf.stderr
+    assert 'SKRIPT_OK' in ablauf.stdout
+    assert 'instrumentierung_fehler' not in bericht
+
+
+def test_solve_wird_gemessen(tmp_path):
+    try:
+        amplpy.AMPL().close()
+    except Exception as e:
+        pytest.skip(f"AMPL nicht startbar: {e}")
+    ablauf, bericht = _starte_sonde(str(tmp_path), TINY_LP)
+    assert ablauf.returncode == 0, ablauf.stderr
+    assert 'ERGEBNIS solved 10' in ablauf.stdout
+    assert len(bericht['solves']) == 1
+    assert bericht['solves'][0]['solve_result'] == 'solved'
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DES PROVIDER-VERGLEICHS
+Signifikanztests und gepaarter Bericht ohne AMPL und ohne API
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Vergleich.py
+"""
+
+import random
+
+import pytest
+
+from MA_Jensen_Vergleich import mcnemar_exakt, permutationstest, werte_paare_aus, PROVIDER
+
+
+def _lauf(erfolg, api_abbruch=False):
+    return {'erfolg': erfolg, 'latenz': 1.0, 'tokens': 100, 'versuche': 1, 'solver_zeit': 0.1,
+            'zielfunktion': 10.0 if erfolg else None, 'api_abbruch': api_abbruch}
+
+
+def test_mcnemar_exakt():
+    assert mcnemar_exakt(0, 0) == 1.0
+    assert mcnemar_exakt(3, 3) == 1.0
+    # 6 diskordante Paare, alle zugunsten einer Seite: 2 * 0.5^6
+    assert mcnemar_exakt(0, 6) == pytest.approx(2 / 64)
+    assert mcnemar_exakt(6, 0) == mcnemar_exakt(0, 6)
+
+
+def test_permutationstest():
+    assert permutationstest([]) is None
+    # exakt: nur alle + oder alle - erreichen |Summe| = 4
+    assert permutationstest([1.0, 1.0, 1.0, 1.0]) == pytest.approx(2 / 16)
+    assert permutationstest([1.0, -1.0]) == 1.0
+    p = permutationstest([1.0] * 20, permutationen=2000, zufall=random.Random(1))
+    assert 0 < p < 0.01
+
+
+def test_paare_mit_api_abbruch_werden_verworfen():
+    a_name, b_name = PROVIDER[:2]
+    paare = [
+        {a_name: _lauf(True), b_name: _lauf(True)},
+        {a_name: _lauf(True), b_name: _lauf(False)},
+        # kein Misserfolg von b, sondern ein API-Fehler
+        {a_name: _lauf(True), b_name: _lauf(False, api_abbruch=True)},
+    ]
+    auswertung = werte_paare_aus(paare)
+    assert auswertung['paare'] == 2
+    assert auswertung['verworfen'] == 1
+    assert auswertung['erfolg'][f'nur_{a_name}'] == 1
+    assert auswertung['zielfunktion']['uebereinstimmend'] == 1
@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+"""
+MASTERARBEIT JENSEN - TESTS DER VERTEILTEN SWEEPS
+Vergabe, Rückgabe und abgelaufene Leases auf einem temporären Spool-Verzeichnis
+
+Aufruf:
+    python -m pytest -q test_MA_Jensen_Verteilt.py
+"""
+
+import json
+import time
+import os
+
+import MA_Jensen_Verteilt as verteilt
+
+
+def _spool(tmp_path, *lauf_ids):
+    spool = str(tmp_path)
+    for bereich in verteilt.UNTERVERZEICHNISSE:
+        os.makedirs(os.path.join(spool, bereich), exist_ok=True)
+    for lauf_id in lauf_ids:
+        with open(os.path.join(spool, 'offen', f"{lauf_id}.json"), 'w', encoding='utf-8') as f:
+            json.dump({'id': lauf_id, 'vergaben': 0}, f)
+    return spool
+
+
+def test_hole_lauf_vergibt_jeden_lauf_einmal(tmp_path):
+    spool = _spool(tmp_path, 'a', 'b')
+    lauf, lease = verteilt.hole_lauf(spool, 'w1')
+    assert lauf['id'] == 'a' and lauf['vergaben'] == 1 and lauf['arbeiter'] == 'w1'
+    assert os.path.basename(lease) == 'a@w1.json'
+    assert verteilt.hole_lauf(spool, 'w2')[0]['id'] == 'b'
+    assert verteilt.hole_lauf(spool, 'w3') == (None, None)
+
+
+def test_gib_abgelaufene_frei(tmp_path):
+    spool = _spool(tmp_path, 'a')
+    _, lease = verteilt.hole_lauf(spool, 'w1')
+    assert verteilt.gib_abgelaufene_frei(spool) == 0
+    alt = time.time() - verteilt.LEASE_DAUER - 1
+    os.utime(lease, (alt, alt))
+    assert verteilt.gib_abgelaufene_frei(spool) == 1
+    lauf, _ = verteilt.hole_lauf(spool, 'w2')
+    assert lauf['vergaben'] == 2
+
+
+def test_gib_zurueck_und_max_vergaben(tmp_path):
+    spool = _spool(tmp_path, 'a')
+    for vergabe in range(1, verteilt.MAX_VERGABEN + 1):
+        lauf, lease = verteilt.hole_lauf(spool, 'w1')
+        assert lauf['vergaben'] == vergabe
+        assert verteilt.gib_zurueck(spool, lease)
+    assert verteilt.hole_lauf(spool, 'w1') == (None, None)
+    assert os.listdir(os.path.join(spool, 'fehlgeschlagen')) == ['a.json']
+    assert not verteilt.gib_zurueck(spool, lease)
+
+
+def test_einreichen_ueberspringt_vergebene_laeufe(tmp_path, monkeypatch):
+    spool = _spool(tmp_path, 'a')
+    verteilt.hole_lauf(spool, 'w1')
+    monkeypatch.setattr(verteilt, 'erstelle_laeufe', lambda sweep: [{'id': 'a'}, {'id': 'b'}])
+    assert verteilt.reiche_ein({}, spool) == 1
+    assert sorted(os.listdir(os.path.join(spool, 'offen'))) == ['b.json']